@@ -339,10 +339,7 @@ class StandardiseFieldCommand(Command):
         self.cache = dict()
 
     def undo(self):
-        for key_path, prev_data in self.cache.items():
-            print(key_path)
-            target_index = self.model.index_from_key_path(key_path)
-            self.model.update_dict(target_index, prev_data)
+        self.model.replace_dicts(self.cache)
 
         return "Original fields restored."
 
@@ -352,3 +349,29 @@ class StandardiseFieldCommand(Command):
 
     def __str__(self) -> str:
         return "StandardiseFieldCommand"
+
+
+class RenamePatchCommand(Command):
+    def __init__(self, model: OrderedDictModel, old_name: str, new_name: str) -> None:
+        super().__init__(model)
+        self.old_name = old_name
+        self.new_name = new_name
+        self.path_strs: list[str] | None = None
+
+    def undo(self):
+        # only the files renamed are restored, as other files may already have
+        # defined a patch with the new name
+        self.model.rename_patch(self.new_name, self.old_name, self.path_strs)
+        return f"Patch '{self.new_name}' renamed back to '{self.old_name}'."
+
+    def redo(self):
+        self.path_strs = self.model.rename_patch(
+            self.old_name, self.new_name, self.path_strs
+        )
+        return (
+            f"Patch '{self.old_name}' renamed to '{self.new_name}' in "
+            f"{len(self.path_strs)} file(s)."
+        )
+
+    def __str__(self) -> str:
+        return "RenamePatchCommand"
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from PyQt6.QtCore import QModelIndex, QObject, QPoint, Qt, pyqtSignal
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import (
@@ -13,8 +15,9 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from model.custom_ordered_dict import ChangeEvent
 from model.model import ModelCreateType, ModelDeleteType
-from util.constants import DictMenuFlag
+from util.constants import ChangeType, DictMenuFlag
 
 
 class CRUDManager(QObject):
@@ -29,6 +32,7 @@ class CRUDManager(QObject):
     add_row_above = pyqtSignal(QModelIndex, str, str)
     add_row_below = pyqtSignal(QModelIndex, str, str)
     fields_standardised = pyqtSignal(QModelIndex)
+    patch_renamed = pyqtSignal(str, str)
 
     def __init__(self, parent: QWidget | None = None):
         super().__init__(parent)
@@ -44,6 +48,7 @@ class CRUDManager(QObject):
         self.add_below = QAction("Add below", self)
         self.add_row_menu.addActions([self.add_above, self.add_below])
         self.standardise_fields = QAction("Standardise boundary fields", self)
+        self.rename_patch = QAction("Rename patch in all files", self)
 
         # Current item index selected
         self.current_index = QModelIndex()
@@ -75,6 +80,9 @@ class CRUDManager(QObject):
         self.standardise_fields.triggered.connect(
             lambda: self.show_standardise_fields_dialog(self.current_index)
         )
+        self.rename_patch.triggered.connect(
+            lambda: self.show_rename_patch_dialog(self.current_index)
+        )
 
     def show_field_menu(self, pos: QPoint, index: QModelIndex):
         self.current_index = index
@@ -114,6 +122,8 @@ class CRUDManager(QObject):
                 self.standardise_fields.setDisabled(True)
             else:
                 self.standardise_fields.setEnabled(True)
+            if flag == DictMenuFlag.PATCH:
+                dict_menu.addAction(self.rename_patch)
 
             dict_menu.exec(pos)
 
@@ -249,16 +259,51 @@ class CRUDManager(QObject):
             self.handle_clear_entries_action(index)
 
     def show_standardise_fields_dialog(self, index: QModelIndex):
-        response = QMessageBox.question(
-            None,
+        dialog = QMessageBox(
+            QMessageBox.Icon.Question,
             "Standardise boundary field",
             "Are you sure you want to standardise the boundary fields?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.Cancel,
-            QMessageBox.StandardButton.Cancel,
         )
-        if response == QMessageBox.StandardButton.Yes:
+        dialog.setDefaultButton(QMessageBox.StandardButton.Cancel)
+        # a dry run of the standardisation, whose errors are reported when it is run
+        try:
+            changes = index.model().preview_standardisation(index)  # type: ignore
+        except ValueError:
+            changes = None
+        if changes is not None:
+            dialog.setInformativeText(f"{len(changes)} file(s) will be modified.")
+            if changes:
+                dialog.setDetailedText(self.format_changes(changes))
+        if dialog.exec() == QMessageBox.StandardButton.Yes:
             self.handle_standardise_fields(index)
 
+    def show_rename_patch_dialog(self, index: QModelIndex):
+        old_name = str(index.data(Qt.ItemDataRole.DisplayRole))
+        new_name, ok = QInputDialog.getText(
+            None,
+            "Rename patch",
+            f"New name of the patch '{old_name}' in the fields and the mesh:",
+            QLineEdit.EchoMode.Normal,
+            old_name,
+        )
+        if not (new_name and ok) or new_name == old_name:
+            return
+
+        self.handle_rename_patch(old_name, new_name)
+
+    def format_changes(self, changes: dict[tuple, list[ChangeEvent]]) -> str:
+        """Lists the keys inserted (+), removed (-) and updated (~) in each file."""
+        symbols = {ChangeType.INSERT: "+", ChangeType.REMOVE: "-"}
+        lines = []
+        for key_path, file_changes in changes.items():
+            lines.append(f"{Path(key_path[-2]).name}:")
+            for change in file_changes:
+                nested_keys = [*change.key_path[len(key_path) :], change.key]
+                symbol = symbols.get(change.change_type, "~")
+                lines.append(f"  {symbol} {'/'.join(map(str, nested_keys))}")
+        return "\n".join(lines)
+
     def handle_create_new_file(self, index: QModelIndex, file_name: str):
         self.new_file_created.emit(index, file_name)
 
@@ -291,3 +336,6 @@ class CRUDManager(QObject):
 
     def handle_standardise_fields(self, index: QModelIndex):
         self.fields_standardised.emit(index)
+
+    def handle_rename_patch(self, old_name: str, new_name: str):
+        self.patch_renamed.emit(old_name, new_name)
@@ -6,20 +6,25 @@ from view.components.custom_combo_box import CustomComboBox
 
 
 class CustomComboBoxController(QObject):
+    """
+    Controller of a combo box of choices grouped in categories. The model of the
+    choices is read-only, and built once for all the combo boxes showing the same
+    choices.
+    """
+
     combo_item_highlighted = pyqtSignal(QStandardItem)
     combo_focus_lost = pyqtSignal()
 
+    # the models of the choices by the id of their data, which they keep alive
+    shared_models: dict[int, ComboBoxModel] = {}
+
     def __init__(
         self, view: CustomComboBox, data: dict, current_choice: str | None = None
     ):
         super().__init__()
         self.view = view
-        self.item_model = ComboBoxModel(data, self.view)
-
-        self.default_item = QStandardItem("Select...")
-        self.default_item.setSelectable(False)
-        self.item_model.appendRow(self.default_item)
-        self.item_model.load_model(data)
+        self.item_model = self.shared_model(data)
+        self.default_item = self.item_model.item(0)
 
         self.view.set_data(self.item_model)
         self.view.highlighted.connect(lambda index: self.on_highlighted(index))
@@ -29,9 +34,23 @@ class CustomComboBoxController(QObject):
         if current_choice:
             self.view.set_current_choice(current_choice)
 
+    @classmethod
+    def shared_model(cls, data: dict) -> ComboBoxModel:
+        """Returns the model of the choices of data, building it the first time."""
+        item_model = cls.shared_models.get(id(data))
+        if item_model is None:
+            item_model = ComboBoxModel(data)
+            default_item = QStandardItem("Select...")
+            default_item.setSelectable(False)
+            item_model.appendRow(default_item)
+            item_model.load_model(data)
+            cls.shared_models[id(data)] = item_model
+        return item_model
+
     def set_data(self, data: dict):
-        self.item_model.clear()
-        self.item_model.load_model(data)
+        self.item_model = self.shared_model(data)
+        self.default_item = self.item_model.item(0)
+        self.view.set_data(self.item_model)
 
     def on_highlighted(self, index: int):
         item = self.item_model.item(index)
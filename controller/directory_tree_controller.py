@@ -9,6 +9,7 @@ from controller.commands.command import (
     CreateItemCommand,
     DeleteFileCommand,
     DeleteItemCommand,
+    RenamePatchCommand,
     StandardiseFieldCommand,
 )
 from controller.commands.command_handler import CommandHandler
@@ -158,6 +159,15 @@ class DirectoryTreeController(QObject):
             )
         )
 
+        self.crud_manager.patch_renamed.connect(
+            lambda old_name, new_name: self.safe_execute(
+                lambda: self.command_handler.execute(
+                    RenamePatchCommand(self.model, old_name, new_name)
+                ),
+                "Patch renamed.",
+            )
+        )
+
         # D - delete
         self.crud_manager.item_deleted.connect(
             lambda index: self.safe_execute(
@@ -1,13 +1,24 @@
 from typing import Callable
 
-from PyQt6.QtCore import QItemSelection, QModelIndex, QObject, pyqtSignal
+from PyQt6.QtCore import (
+    QItemSelection,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    pyqtSignal,
+)
 from PyQt6.QtGui import QStandardItem
 
 from controller.commands.command import Command, UpdateItemCommand
 from controller.commands.command_handler import CommandHandler
 from controller.crud_manager import CRUDManager
 from controller.error_handler import ErrorHandler
-from model.model import ComboBoxModel, OrderedDictItem, OrderedDictModel
+from model.model import (
+    ComboBoxModel,
+    DictionaryEntryItem,
+    OrderedDictItem,
+    OrderedDictModel,
+)
 from util.boundary_conditions import DROPDOWN_CHOICES
 from util.constants import ModelCreateType, ModelUpdateType, ODictType
 from view.components.form import FieldEditor
@@ -30,11 +41,16 @@ class FieldEditorController(QObject):
         self.crud_manager = crud_manager
         self.command_handler = command_handler
         self.error_handler = ErrorHandler()
+        self.current_selection = QPersistentModelIndex()
 
         # Connect signals and slots
         self.view.current_selection_changed.connect(self.handle_selection_change)
         self.view.go_to_item.connect(self.handle_go_to_item)
         self.model.dataChanged.connect(self.handle_model_data_changed)
+        self.model.rowsInserted.connect(self.handle_rows_changed)
+        self.model.rowsRemoved.connect(self.handle_rows_changed)
+        self.model.modelReset.connect(self.handle_layout_changed)
+        self.model.layoutChanged.connect(self.handle_layout_changed)
         self.view.combobox_highlighted.connect(self.handle_combo_selection)
         self.view.combobox_closed.connect(self.handle_combo_defocus)
         self.view.add_field.connect(self.handle_add_field)
@@ -46,25 +62,42 @@ class FieldEditorController(QObject):
     def handle_model_data_changed(
         self, top_left: QModelIndex, bottom_right: QModelIndex, roles
     ):
-        for row in range(top_left.row(), bottom_right.row() + 1):
-            for col in range(top_left.column(), bottom_right.column() + 1):
-                # update view by rerendering parent item
-                item = self.model.customItemFromIndex(self.current_selection)
-                updated_widget = self.view.create_form_widget(item)
-                if updated_widget:
-                    self.view.update_form_widget(updated_widget)
+        selection = QModelIndex(self.current_selection)
+        if not selection.isValid():
+            return
+        if top_left.parent() == selection:
+            # only the rows of the form changed are read again
+            self.view.update_rows(top_left.row(), bottom_right.row())
+        elif (
+            top_left.parent() == selection.parent()
+            and top_left.row() <= selection.row() <= bottom_right.row()
+            and isinstance(
+                self.model.customItemFromIndex(selection), DictionaryEntryItem
+            )
+        ):
+            # the entry shown alone in the form changed
+            self.view.update_rows(0, 0)
+
+    def handle_rows_changed(self, parent: QModelIndex, first: int, last: int):
+        selection = QModelIndex(self.current_selection)
+        # the form is built again when its rows move, or when its entry is removed
+        if parent == selection or not selection.isValid():
+            self.view.set_form_item(self.model.customItemFromIndex(selection))
+
+    def handle_layout_changed(self):
+        selection = QModelIndex(self.current_selection)
+        self.view.set_form_item(self.model.customItemFromIndex(selection))
 
     def handle_selection_change(
         self, selected: QItemSelection, deselected: QItemSelection | None = None
     ):
         for selection in selected.indexes():
-            self.current_selection = selection
+            # the selection stays valid, or becomes invalid, as rows are edited
+            self.current_selection = QPersistentModelIndex(selection)
             item = self.model.customItemFromIndex(selection)
-            form_widget = self.view.create_form_widget(item)
-            if form_widget:
-                self.view.update_form_widget(form_widget)
+            self.view.set_form_item(item)
 
-    def handle_go_to_item(self, item: QStandardItem):
+    def handle_go_to_item(self, item: OrderedDictItem):
         selection = self.model.indexFromItem(item)
         self.jump_to_item.emit(selection)
 
@@ -80,7 +113,7 @@ class FieldEditorController(QObject):
         self.view.clear_info_display()
 
     def handle_add_field(self):
-        item = self.current_selection
+        item = QModelIndex(self.current_selection)
         item_type = item.data(OrderedDictItem.ROLE_TYPE)
 
         if item_type in {
@@ -90,9 +123,7 @@ class FieldEditorController(QObject):
         }:
             self.crud_manager.show_new_file_dialog(item)
         else:
-            self.crud_manager.show_add_row_dialog(
-                ModelCreateType.CHILD, self.current_selection
-            )
+            self.crud_manager.show_add_row_dialog(ModelCreateType.CHILD, item)
 
     def on_key_editing_finished(self, index: QModelIndex, new_key: str):
         self.safe_execute(
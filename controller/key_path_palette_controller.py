@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from PyQt6.QtCore import QModelIndex, QObject, pyqtSignal
+
+from model.database import Database
+from model.model import OrderedDictModel
+from view.components.key_path_palette import KeyPathPalette
+
+
+class KeyPathPaletteController(QObject):
+    """
+    Matches the queries of a key path palette against the key path index of the
+    database, and resolves the key paths chosen to the rows of the model.
+
+    Attributes:
+        jump_to_item (pyqtSignal): Signal emitted with the index of the key path chosen
+            by the user.
+    """
+
+    MATCH_LIMIT = 50
+
+    jump_to_item = pyqtSignal(QModelIndex)
+
+    def __init__(
+        self,
+        database: Database,
+        model: OrderedDictModel,
+        view: KeyPathPalette,
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.database = database
+        self.model = model
+        self.view = view
+
+        self.view.query_changed.connect(self.handle_query)
+        self.view.key_path_activated.connect(self.handle_key_path_activated)
+
+    def handle_query(self, query: str):
+        key_paths = self.database.find_key_paths(query, self.MATCH_LIMIT)
+        self.view.set_matches(
+            [(self.format_key_path(key_path), key_path) for key_path in key_paths]
+        )
+
+    def format_key_path(self, key_path: tuple) -> str:
+        """Returns a key path as the names of its directories and file, and its keys."""
+        names = []
+        keys = []
+        for key in key_path:
+            if key in self.database.directories or key in self.database.file_key_paths:
+                names.append(Path(key).name)
+            else:
+                keys.append(str(key))
+        return ".".join(["/".join(names), *keys])
+
+    def handle_key_path_activated(self, key_path: tuple):
+        index = self.model.index_from_key_path(key_path)
+        if index.isValid():
+            self.jump_to_item.emit(index)
+        else:
+            self.view.set_error("The entry no longer exists.")
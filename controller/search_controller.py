@@ -0,0 +1,57 @@
+import re
+
+from PyQt6.QtCore import QModelIndex, QObject, pyqtSignal
+
+from model.database import Database
+from model.model import OrderedDictModel
+from view.components.search_panel import SearchPanel
+
+
+class SearchController(QObject):
+    """
+    Runs the queries of a search panel against the search index of the database, and
+    resolves the entries found to the rows of the model.
+
+    Attributes:
+        jump_to_item (pyqtSignal): Signal emitted with the index of the entry found
+            activated by the user.
+    """
+
+    MATCH_LIMIT = 1000
+
+    jump_to_item = pyqtSignal(QModelIndex)
+
+    def __init__(
+        self,
+        database: Database,
+        model: OrderedDictModel,
+        view: SearchPanel,
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self.database = database
+        self.model = model
+        self.view = view
+
+        self.view.query_changed.connect(self.handle_query)
+        self.view.match_activated.connect(self.handle_match_activated)
+
+    def handle_query(self, query: str, regex: bool, case_sensitive: bool):
+        if not query:
+            self.view.set_matches([])
+            return
+        try:
+            matches = self.database.search(
+                query, regex, case_sensitive, self.MATCH_LIMIT
+            )
+        except re.error as e:
+            self.view.set_error(f"Invalid regular expression: {e}")
+            return
+        self.view.set_matches(matches, self.MATCH_LIMIT)
+
+    def handle_match_activated(self, key_path: tuple):
+        index = self.model.index_from_key_path(key_path)
+        if index.isValid():
+            self.jump_to_item.emit(index)
+        else:
+            self.view.set_error("The entry no longer exists.")
@@ -0,0 +1,154 @@
+import os
+import threading
+from pathlib import Path
+from typing import Callable
+
+from pyparsing import ParseException
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from model.content_store import StoredFile
+from model.core.foamfile import FoamFile
+from model.custom_ordered_dict import CustomOrderedDict
+
+
+class LoadedFile:
+    """A file read from a case, ready to be added to the database of the case."""
+
+    def __init__(
+        self,
+        path_str: str,
+        stat: os.stat_result,
+        foamfile: FoamFile,
+        foamdict: CustomOrderedDict,
+        stored_file: StoredFile | None = None,
+        postings: dict[str, list[tuple]] | None = None,
+    ) -> None:
+        self.path_str = path_str
+        self.stat = stat
+        self.foamfile = foamfile
+        self.foamdict = foamdict
+        self.stored_file = stored_file
+        # the entries of the file by the text of their keys and values, for searches
+        self.postings = postings
+
+
+def read_file_class(path_str: str) -> str | None:
+    """
+    Returns the OpenFOAM class declared in the header of a file, reading only its
+    header, or None if the file has no FoamFile header or cannot be read.
+    """
+    try:
+        return FoamFile(path_str).read_header(parse_banner=False).get("class")
+    except (ParseException, OSError):
+        return None
+
+
+class CaseLoader(QObject):
+    """
+    A worker that reads the files of a case directory off the Qt event loop.
+
+    The loader is moved to a QThread and started with `run`. It first scans the case
+    directories and reports every directory found, so that the directory tree can be
+    shown straight away, then reads the files one by one and reports each file as soon
+    as it is read. The system and constant directories are read before 0, whose field
+    files are usually the largest, so that they can be browsed while the fields are
+    still loading.
+
+    The loader never modifies the database itself: the files it reports are added by
+    the slots connected to its signals, which run on the thread of the database.
+
+    Attributes:
+        directory_found (pyqtSignal): Signal emitted with the key path of every
+            directory found.
+        files_classified (pyqtSignal): Signal emitted once the case is scanned, with
+            the class of every file found, read from its header only.
+        file_loaded (pyqtSignal): Signal emitted with the key path of the directory
+            containing a file and the LoadedFile read.
+        file_failed (pyqtSignal): Signal emitted with the path of a file or directory
+            that could not be read and the error message.
+        progress (pyqtSignal): Signal emitted with the number of files read and the
+            total number of files.
+        loading_finished (pyqtSignal): Signal emitted once loading stops, with whether
+            it was cancelled before every file was read.
+
+    Methods:
+        run():
+            Scans the case and reads its files, checking for cancellation between files.
+        cancel():
+            Requests the loader to stop before reading the next file.
+    """
+
+    SUBDIRS = ("0", "system", "constant")
+    LOAD_ORDER = ("system", "constant", "0")
+
+    directory_found = pyqtSignal(list)
+    files_classified = pyqtSignal(dict)
+    file_loaded = pyqtSignal(list, object)
+    file_failed = pyqtSignal(str, str)
+    progress = pyqtSignal(int, int)
+    loading_finished = pyqtSignal(bool)
+
+    def __init__(
+        self, case_dir: str, read_file: Callable[[str, os.stat_result], LoadedFile]
+    ) -> None:
+        super().__init__()
+        self.case_dir = case_dir
+        self.read_file = read_file
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self):
+        files_by_subdir = {subdir: [] for subdir in self.SUBDIRS}
+        for subdir in self.SUBDIRS:
+            path_str = str(Path(self.case_dir) / subdir)
+            try:
+                self.scan_directory([path_str], files_by_subdir[subdir])
+            except OSError as e:
+                self.file_failed.emit(path_str, str(e))
+
+        files = [
+            file for subdir in self.LOAD_ORDER for file in files_by_subdir[subdir]
+        ]
+        # the headers are probed before any file is parsed, so that every file is
+        # classified early, including those that fail to parse
+        self.files_classified.emit(
+            {entry.path: read_file_class(entry.path) for _, entry in files}
+        )
+        self.progress.emit(0, len(files))
+
+        done = 0
+        for parent_key_path, entry in files:
+            if self.is_cancelled():
+                break
+            try:
+                loaded_file = self.read_file(entry.path, entry.stat())
+            except (OSError, ParseException, ValueError) as e:
+                self.file_failed.emit(entry.path, str(e))
+            else:
+                self.file_loaded.emit(parent_key_path, loaded_file)
+            done += 1
+            self.progress.emit(done, len(files))
+
+        self.loading_finished.emit(done < len(files))
+
+    def scan_directory(self, key_path: list[str], files: list):
+        """
+        Reports a directory and its subdirectories, collecting the files under it.
+
+        Parameters:
+        -----------
+            key_path (list[str]): The key path of the directory, ending with its path.
+            files (list): The list to append (parent key path, directory entry) to.
+        """
+        self.directory_found.emit(key_path)
+        with os.scandir(key_path[-1]) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    files.append((key_path, entry))
+                elif entry.is_dir():
+                    self.scan_directory(key_path + [entry.path], files)
@@ -0,0 +1,122 @@
+import hashlib
+import threading
+from weakref import WeakValueDictionary
+
+from model.custom_ordered_dict import CustomOrderedDict
+
+
+def text_digest(text: str) -> bytes:
+    """Returns the content hash of the text of a file."""
+    return hashlib.blake2b(
+        text.encode("utf-8", errors="surrogateescape"), digest_size=16
+    ).digest()
+
+
+class StoredFile:
+    """A parsed file tree held in a ContentStore, together with its FoamFile header."""
+
+    def __init__(
+        self, tree: CustomOrderedDict, header: CustomOrderedDict, start_comment: list
+    ) -> None:
+        self.tree = tree
+        self.header = header
+        self.start_comment = start_comment
+
+    def checkout(self) -> CustomOrderedDict:
+        """Returns a private top level copy of the tree whose subtrees stay shared."""
+        return self.tree.unshared_copy()
+
+
+class ContentStore:
+    """
+    A content-addressed store of parsed file trees shared between open cases.
+
+    Files with identical text are parsed once, and structurally identical subtrees,
+    whether across files, cases or within one file, are stored once. Shared subtrees
+    are marked as such and are copied along the edited path by CustomOrderedDict
+    before being modified, so that an edit in one case never leaks into another.
+
+    Entries are held weakly and disappear once no open case references them. The
+    store is safe to use from the worker threads that load cases in the background.
+
+    Attributes:
+        files (WeakValueDictionary): Maps text digests to stored files.
+        subtrees (WeakValueDictionary): Maps structural digests to shared subtrees.
+        file_hits (int): The number of files that were not parsed as their text was
+            already stored.
+        subtree_hits (int): The number of subtrees replaced by a stored subtree.
+    """
+
+    def __init__(self) -> None:
+        self.files: WeakValueDictionary[bytes, StoredFile] = WeakValueDictionary()
+        self.subtrees: WeakValueDictionary[bytes, CustomOrderedDict] = (
+            WeakValueDictionary()
+        )
+        self.file_hits = 0
+        self.subtree_hits = 0
+        self.lock = threading.RLock()
+
+    def get_file(self, digest: bytes) -> StoredFile | None:
+        with self.lock:
+            stored_file = self.files.get(digest)
+            if stored_file is not None:
+                self.file_hits += 1
+        return stored_file
+
+    def add_file(
+        self,
+        digest: bytes | None,
+        tree: CustomOrderedDict,
+        header: CustomOrderedDict,
+        start_comment: list,
+    ) -> StoredFile:
+        """
+        Interns a freshly parsed file tree and stores it under the digest of its text.
+
+        Parameters:
+        -----------
+            digest (bytes | None): The digest of the file text, or None if unknown.
+            tree (CustomOrderedDict): The parsed tree, which must not be shared yet.
+            header (CustomOrderedDict): The FoamFile header of the file.
+            start_comment (list): The start comment of the file.
+
+        Returns:
+        --------
+            StoredFile: The stored file, whose tree is shared.
+        """
+        with self.lock:
+            stored_file = StoredFile(self.intern(tree)[0], header, start_comment)
+            if digest is not None:
+                self.files[digest] = stored_file
+        return stored_file
+
+    def intern(self, tree: CustomOrderedDict) -> tuple[CustomOrderedDict, bytes]:
+        """
+        Replaces every subtree of a tree by its stored equal, bottom up. Subtrees are
+        matched by their Merkle digest.
+
+        Parameters:
+        -----------
+            tree (CustomOrderedDict): The tree to intern. Unshared subtrees are
+                modified in place.
+
+        Returns:
+        --------
+            tuple[CustomOrderedDict, bytes]: The shared tree and its structural digest.
+        """
+        for key, value in tree.items():
+            if isinstance(value, CustomOrderedDict):
+                shared_value = self.intern(value)[0]
+                if shared_value is not value:
+                    tree[key] = shared_value
+        digest = tree.digest()
+
+        stored = self.subtrees.get(digest)
+        if stored is not None:
+            if stored is not tree:
+                self.subtree_hits += 1
+            return stored, digest
+
+        tree.shared = True
+        self.subtrees[digest] = tree
+        return tree, digest
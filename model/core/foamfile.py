@@ -1,5 +1,6 @@
 import os
 import re
+import threading
 from pathlib import Path
 
 import pyparsing as pp
@@ -17,9 +18,23 @@ from model.core.values import Scalar, Tensor, Value
 from model.custom_ordered_dict import CustomOrderedDict
 
 
+# Parsers shared by header-only reads, built once since pyparsing grammars are costly
+# to construct
+_HEADER_PROBE_PARSER = FoamDataHeaderParser()
+_HEADER_PARSER = _HEADER_PROBE_PARSER.create_parser()
+_START_COMMENT_PARSER = FoamCommentParser().create_parser()
+# Serialises use of the shared parsers, as cases can be loaded on worker threads
+_SHARED_PARSER_LOCK = threading.Lock()
+
+
 # Adapted from OpenFOAM file parser made by napyk
 # GitHub link: https://github.com/napyk/foamfile
 class FoamFile:
+    # Number of bytes read when probing for the header of a file
+    HEADER_PROBE_SIZE = 4096
+    # Upper bound on the bytes read before giving up on finding a header
+    HEADER_PROBE_LIMIT = 65536
+
     def __init__(self, path, mode="r", foam_class=None):
         self.mode = mode
         self.path = path
@@ -228,13 +243,72 @@ class FoamFile:
         if self.file is None:
             self.file = open(self.path, self.mode)
         text = self.file.read()
+        self.close()
+        return self.parse(text)
+
+    def parse(self, text: str):
+        """Parses the full text of a file, setting its start comment and header."""
         text = self.extract_start_comment(text)
         text = self.remove_comments(text)
         text = self.extract_and_remove_header(text)
         text = self.from_foam(text)
-        self.close()
         return text[0]
 
+    def read_header(
+        self, probe_size: int = HEADER_PROBE_SIZE, parse_banner: bool = True
+    ) -> CustomOrderedDict:
+        """
+        Reads only the start comment and the FoamFile header of the file.
+
+        Only the first few kilobytes of the file are read, so the class, object and
+        format of large field or mesh files can be inspected without parsing their
+        contents. The probe is widened up to HEADER_PROBE_LIMIT bytes if the header
+        does not fit in the first chunk.
+
+        Parameters:
+        -----------
+            probe_size (int): The number of bytes to read in the first probe.
+            parse_banner (bool): Whether to also parse the start comment. Scans that
+                only need the header can skip it, as it is the costlier of the two.
+
+        Returns:
+        --------
+            CustomOrderedDict: The key-value pairs of the FoamFile header.
+
+        Raises:
+        -------
+            ParseException: If no FoamFile header is found within the probe limit.
+        """
+        with open(self.path, "rb") as file:
+            chunk = file.read(probe_size)
+            while True:
+                raw_text = chunk.decode("utf-8", errors="replace")
+                text = self.remove_comments(raw_text)
+                match = _HEADER_PROBE_PARSER.pattern.search(text)
+                if match or len(chunk) >= self.HEADER_PROBE_LIMIT:
+                    break
+                more = file.read(len(chunk))
+                if not more:
+                    break
+                chunk += more
+
+        if not match:
+            raise ParseException(text, 0, f"FoamFile header not found in {self.path}")
+
+        if parse_banner:
+            # only the text before the header can hold the banner
+            banner_text = raw_text[: raw_text.find("FoamFile")]
+            try:
+                with _SHARED_PARSER_LOCK:
+                    banner = _START_COMMENT_PARSER.parse_string(banner_text)
+                self.start_comment = str.split(banner.as_list()[0], "\n")
+            except ParseException:
+                pass  # files without a banner keep the default start comment
+
+        with _SHARED_PARSER_LOCK:
+            self.header = _HEADER_PARSER.parse_string(match.group(0)).as_list()[0]
+        return self.header
+
     def to_foam(
         self,
         foam_object=None,
@@ -294,19 +368,22 @@ class FoamFile:
                         )
         return lines
 
+    def render(self, content=None) -> str:
+        """Returns the full text of the file with the given contents."""
+        return "\n".join(
+            self.start_comment
+            + self.to_foam({"FoamFile": self.header})
+            + self.spacer
+            + self.to_foam(content)
+            + self.end_comment
+        )
+
     def write(self, content=None):
+        text = self.render(content)
         if self.file is None:
             self.file = open(self.path, "w")
         os.makedirs(os.path.abspath(os.path.dirname(self.path)), exist_ok=True)
-        self.file.write(
-            "\n".join(
-                self.start_comment
-                + self.to_foam({"FoamFile": self.header})
-                + self.spacer
-                + self.to_foam(content)
-                + self.end_comment
-            )
-        )
+        self.file.write(text)
         self.close()
 
     def close(self):
@@ -1,16 +1,461 @@
-from typing import Any
+import hashlib
+import weakref
+from collections.abc import ItemsView, KeysView, ValuesView
+from typing import Any, Callable
+
+from util.constants import ChangeType
+from util.exceptions import SharedDictionaryError
+
+# Sentinel closing the circular linked list that holds the order of the keys
+_ROOT = object()
+
+
+def leaf_repr(value: Any) -> str:
+    """
+    Returns a canonical representation of a value that is not a CustomOrderedDict.
+
+    The type of every value is part of its representation, so that for example the
+    string "1" and the scalar 1 are told apart.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return f"{type(value).__name__}:{value!r}"
+    if isinstance(value, (list, tuple)):
+        items = ",".join(leaf_repr(v) for v in value)
+        return f"{type(value).__name__}[{items}]"
+    if isinstance(value, dict):
+        items = ",".join(f"{leaf_repr(k)}={leaf_repr(v)}" for k, v in value.items())
+        return f"{type(value).__name__}{{{items}}}"
+    attributes = ",".join(f"{k}={leaf_repr(v)}" for k, v in sorted(vars(value).items()))
+    return f"{type(value).__name__}({attributes})"
+
+
+def _encode(text: str) -> bytes:
+    return text.encode("utf-8", errors="surrogateescape")
+
+
+class ChangeEvent:
+    """
+    A record of a mutation made through the key path methods of a CustomOrderedDict.
+
+    Attributes:
+        change_type (ChangeType): The kind of mutation.
+        key_path (list[str]): The key path of the dictionary that was modified.
+        key (Any): The key inserted, renamed (its new key), updated or removed. None
+            when the dictionary was cleared.
+        index (int | None): The position of the key in the dictionary, before its
+            removal for a removed key. None when the dictionary was cleared, or when
+            no listener asked for positions, as finding one is O(n).
+        value (Any): The value at the key after the mutation.
+        old_value (Any): The value replaced or removed, or a copy of the dictionary
+            before it was cleared.
+        old_key (Any): The key before it was renamed.
+    """
+
+    def __init__(
+        self,
+        change_type: ChangeType,
+        key_path: list[str],
+        key: Any = None,
+        index: int | None = None,
+        value: Any = None,
+        old_value: Any = None,
+        old_key: Any = None,
+    ) -> None:
+        self.change_type = change_type
+        self.key_path = key_path
+        self.key = key
+        self.index = index
+        self.value = value
+        self.old_value = old_value
+        self.old_key = old_key
 
 
 class CustomOrderedDict(dict):
+    # Optional callable invoked with the dictionary whenever get_nested_value passes
+    # through it, e.g. to re-parse a file tree that has been evicted from memory. It
+    # returns True if it modified the dictionary.
+    access_hook = None
+    # Set on subtrees interned in a content store or taken in a snapshot, which may be
+    # referenced from several places. They are never modified in place: the key path
+    # methods copy them first, and modifying them directly raises an error.
+    shared = False
+    # Order of the keys as a circular doubly linked list, mapping every key and the
+    # _ROOT sentinel to their [previous key, next key]. The list is only built by the
+    # first positional insert or rename, which can then relink a key in O(1). Until
+    # then, the order of the keys is the insertion order kept by dict itself.
+    _links = None
+    # Callables notified with a ChangeEvent after every mutation made through the key
+    # path methods of this dictionary. Plain item assignment is not reported. Only the
+    # listeners in index_listeners are given the position of the key changed.
+    listeners: "tuple | list" = ()
+    index_listeners: "tuple | list" = ()
+    # Cached Merkle digest of the dictionary, reset by every mutation of the dictionary
+    # along with the digests of all its ancestors
+    _digest = None
+    # Weak references, by id, to the dictionaries whose cached digest was computed from
+    # this one, i.e. its parents. A dictionary is only cached while all its children
+    # are, so resetting a digest resets those of every ancestor in turn.
+    _dependents = None
+    # Nodes resolved by get_nested_value, keyed by key path tuple, and how often the
+    # cache was hit or missed. The nodes are held by weak references, with the
+    # version of every dictionary along the path, which is increased whenever a key
+    # of that dictionary is removed, moved or set to or from a dictionary. An entry
+    # is dropped once a node is freed or a version along its path has changed, so
+    # that only edits to the path itself invalidate it.
+    PATH_CACHE_SIZE = 4096
+    _path_cache = None
+    _version = 0
+    path_cache_hits = 0
+    path_cache_misses = 0
 
     def __init__(self, data=None) -> None:
         super().__init__(data or {})
 
     def __eq__(self, other: Any) -> bool:
+        """
+        Two dictionaries are equal if they have equal items in the same order. Cached
+        digests are not used, as they are not reset when a value such as a list is
+        modified in place, and as equal values, e.g. 1 and 1.0, have different
+        digests.
+        """
         if not isinstance(other, CustomOrderedDict):
             return False
+        if self is other:
+            return True
+        if len(self) != len(other):
+            return False
         return list(self.items()) == list(other.items())
 
+    def __ne__(self, other: Any) -> bool:
+        return not self == other
+
+    def __setitem__(self, key: Any, value: Any):
+        self._check_private()
+        self._reset_digest()
+        if isinstance(value, CustomOrderedDict) or isinstance(
+            dict.get(self, key), CustomOrderedDict
+        ):
+            self._version += 1
+        links = self._links
+        if links is not None and key not in self:
+            dict.__setitem__(self, key, value)
+            self._link(key, links[_ROOT][0], _ROOT)
+        else:
+            dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: Any):
+        self._check_private()
+        self._reset_digest()
+        self._version += 1
+        dict.__delitem__(self, key)
+        if self._links is not None:
+            self._unlink(key)
+
+    def __iter__(self):
+        if self._links is None:
+            return dict.__iter__(self)
+        return self._iter_links(1)
+
+    def __reversed__(self):
+        if self._links is None:
+            return dict.__reversed__(self)
+        return self._iter_links(0)
+
+    def __repr__(self) -> str:
+        if self._links is None:
+            return dict.__repr__(self)
+        return "{" + ", ".join(f"{k!r}: {v!r}" for k, v in self.items()) + "}"
+
+    def __reduce__(self):
+        return self.__class__, (list(self.items()),)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def keys(self):
+        if self._links is None:
+            return dict.keys(self)
+        return KeysView(self)
+
+    def values(self):
+        if self._links is None:
+            return dict.values(self)
+        return ValuesView(self)
+
+    def items(self):
+        if self._links is None:
+            return dict.items(self)
+        return ItemsView(self)
+
+    def pop(self, key: Any, *default):
+        self._check_private()
+        self._reset_digest()
+        self._version += 1
+        if self._links is not None and key in self:
+            self._unlink(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self) -> tuple[Any, Any]:
+        self._check_private()
+        if self._links is None:
+            self._reset_digest()
+            self._version += 1
+            return dict.popitem(self)
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        key = self._links[_ROOT][0]
+        return key, self.pop(key)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, other=(), /, **kwargs):
+        self._check_private()
+        if self._links is None:
+            self._reset_digest()
+            self._version += 1
+            dict.update(self, other, **kwargs)
+            return
+        if hasattr(other, "keys"):
+            for key in other.keys():
+                self[key] = other[key]
+        else:
+            for key, value in other:
+                self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def clear(self):
+        self._check_private()
+        self._reset_digest()
+        self._version += 1
+        dict.clear(self)
+        self._links = None
+
+    def _check_private(self):
+        if self.shared:
+            raise SharedDictionaryError(
+                "Shared dictionaries cannot be modified in place, modify them through"
+                " the key path methods or modify a copy."
+            )
+
+    def copy(self) -> "CustomOrderedDict":
+        return CustomOrderedDict(self)
+
+    def digest(self) -> bytes:
+        """
+        Returns the Merkle digest of the dictionary.
+
+        The digest hashes the keys in order and the representation of the values,
+        where nested dictionaries contribute their own digest. Digests are cached, so
+        that after a mutation only the digests along the modified key path are
+        computed again, and identical subtrees can be recognised at once.
+        """
+        digest = self._digest
+        if digest is None:
+            hasher = hashlib.blake2b(digest_size=16)
+            parent = weakref.ref(self)
+            for key, value in self.items():
+                hasher.update(_encode(leaf_repr(key)))
+                if isinstance(value, CustomOrderedDict):
+                    if value._dependents is None:
+                        value._dependents = {}
+                    value._dependents[id(self)] = parent
+                    hasher.update(b"\x01" + value.digest())
+                else:
+                    hasher.update(b"\x00" + _encode(leaf_repr(value)))
+            digest = self._digest = hasher.digest()
+        return digest
+
+    def _reset_digest(self):
+        """Resets the cached digest of the dictionary and those of its ancestors."""
+        if self._digest is None:
+            return
+        pending = [self]
+        while pending:
+            dictionary = pending.pop()
+            if dictionary is None or dictionary._digest is None:
+                continue
+            dictionary._digest = None
+            dependents = dictionary._dependents
+            if dependents:
+                dictionary._dependents = None
+                pending.extend(parent() for parent in dependents.values())
+
+    def diff(
+        self, other: "CustomOrderedDict", key_path: list[str] | None = None
+    ) -> list[ChangeEvent]:
+        """
+        Returns the changes turning this dictionary into the other one.
+
+        Nested dictionaries with the same digest are skipped without being visited,
+        so comparing two files, time steps or cases only walks their differences.
+        Keys found in both dictionaries at different positions are not reported.
+
+        Parameters:
+        -----------
+        other : CustomOrderedDict
+            The dictionary to compare with.
+        key_path : list[str] | None
+            The key path prepended to the key paths of the changes.
+
+        Returns:
+        --------
+        list[ChangeEvent]
+            An INSERT change for every key only found in the other dictionary, a
+            REMOVE change for every key only found in this dictionary, and an UPDATE
+            change for every value that differs, with the position of the key in the
+            dictionary that holds it.
+        """
+        key_path = key_path or []
+        changes = []
+        if self.digest() == other.digest():
+            return changes
+
+        for index, (key, value) in enumerate(self.items()):
+            if key not in other:
+                changes.append(
+                    ChangeEvent(
+                        ChangeType.REMOVE, key_path, key, index, old_value=value
+                    )
+                )
+        for index, (key, value) in enumerate(other.items()):
+            if key not in self:
+                changes.append(
+                    ChangeEvent(ChangeType.INSERT, key_path, key, index, value=value)
+                )
+                continue
+            old_value = dict.__getitem__(self, key)
+            old_is_dict = isinstance(old_value, CustomOrderedDict)
+            is_dict = isinstance(value, CustomOrderedDict)
+            if old_is_dict and is_dict:
+                changes.extend(old_value.diff(value, key_path + [key]))
+            elif old_is_dict or is_dict or leaf_repr(old_value) != leaf_repr(value):
+                changes.append(
+                    ChangeEvent(
+                        ChangeType.UPDATE,
+                        key_path,
+                        key,
+                        index,
+                        value=value,
+                        old_value=old_value,
+                    )
+                )
+        return changes
+
+    def find_identical_children(self) -> list[list[Any]]:
+        """
+        Returns the keys of the nested dictionaries that are identical to each other,
+        such as boundaryField patches with the same conditions, grouped together.
+        Nested dictionaries that are unique are left out.
+        """
+        groups: dict[bytes, list[Any]] = {}
+        for key, value in self.items():
+            if isinstance(value, CustomOrderedDict):
+                groups.setdefault(value.digest(), []).append(key)
+        return [keys for keys in groups.values() if len(keys) > 1]
+
+    def subscribe(self, listener: Callable[[ChangeEvent], None], index: bool = True):
+        """
+        Notifies a listener of the mutations made through the key path methods.
+
+        Parameters:
+        -----------
+        listener : Callable[[ChangeEvent], None]
+            The callable notified with every change.
+        index : bool
+            Whether the listener needs the position of the key changed. Finding it
+            walks the dictionary, so listeners that do not need it should say so.
+        """
+        self.listeners = [*self.listeners, listener]
+        if index:
+            self.index_listeners = [*self.index_listeners, listener]
+
+    def unsubscribe(self, listener: Callable[[ChangeEvent], None]):
+        self.listeners = [other for other in self.listeners if other != listener]
+        self.index_listeners = [
+            other for other in self.index_listeners if other != listener
+        ]
+
+    def notify(self, event: ChangeEvent):
+        for listener in self.listeners:
+            listener(event)
+
+    def _event_index(self, target_dict: "CustomOrderedDict", key: Any) -> int | None:
+        """Returns the position of a key for a change event, if a listener needs it."""
+        return target_dict.index_of(key) if self.index_listeners else None
+
+    def index_of(self, key: Any) -> int:
+        """Returns the position of a key in the dictionary."""
+        for index, k in enumerate(self):
+            if k == key:
+                return index
+        raise KeyError(f"Key {key} not found in the dictionary.")
+
+    def _iter_links(self, direction: int):
+        links = self._links
+        key = links[_ROOT][direction]
+        while key is not _ROOT:
+            yield key
+            key = links[key][direction]
+
+    def _build_links(self) -> dict:
+        links = {_ROOT: [_ROOT, _ROOT]}
+        prev = _ROOT
+        for key in dict.__iter__(self):
+            links[key] = [prev, _ROOT]
+            links[prev][1] = key
+            prev = key
+        links[_ROOT][0] = prev
+        self._links = links
+        return links
+
+    def _link(self, key: Any, prev: Any, next: Any):
+        links = self._links
+        links[key] = [prev, next]
+        links[prev][1] = key
+        links[next][0] = key
+
+    def _unlink(self, key: Any):
+        links = self._links
+        prev, next = links.pop(key)
+        links[prev][1] = next
+        links[next][0] = prev
+
+    def _insert_at(self, key: Any, value: Any, insert_key: Any, after: bool = False):
+        """Sets a key next to an existing key in O(1), moving the key if it exists."""
+        self._check_private()
+        links = self._links if self._links is not None else self._build_links()
+        self._reset_digest()
+        self._version += 1
+        if key == insert_key:
+            dict.__setitem__(self, key, value)
+            return
+        if key in self:
+            self._unlink(key)
+        if after:
+            prev, next = insert_key, links[insert_key][1]
+        else:
+            prev, next = links[insert_key][0], insert_key
+        dict.__setitem__(self, key, value)
+        self._link(key, prev, next)
+
+    def _rename(self, old_key: Any, new_key: Any):
+        """Renames a key in O(1), keeping its position. Replaces new_key if it exists."""
+        self._check_private()
+        links = self._links if self._links is not None else self._build_links()
+        self._reset_digest()
+        self._version += 1
+        if new_key in self:
+            del self[new_key]
+        value = dict.pop(self, old_key)
+        prev, next = links.pop(old_key)
+        dict.__setitem__(self, new_key, value)
+        self._link(new_key, prev, next)
+
     def rename_key(self, key_path: list[str], old_key: str, new_key: str):
         """
         Renames a key in a nested CustomOrderedDict.
@@ -56,7 +501,7 @@ class CustomOrderedDict(dict):
         """
 
         # Get the nested dictionary using the key_path provided
-        curr = self.get_nested_value(key_path)
+        curr = self.get_nested_value(key_path, unshare=True)
         if type(curr) is not CustomOrderedDict:
             raise ValueError(f"Value at key {old_key} is not a OrderedDict")
         if old_key not in curr.keys():
@@ -64,17 +509,21 @@ class CustomOrderedDict(dict):
         if old_key == new_key:
             return self  # No change needed if old_key is the same as new_key
 
-        # Get updated dictionary with new key
-        updated_dict = CustomOrderedDict(
-            {new_key if k == old_key else k: v for k, v in curr.items()}
-        )
-
-        # Update existing dictionary with renamed key dictionary
-        curr.clear()
-        curr.update(updated_dict)
+        curr._rename(old_key, new_key)
+        if self.listeners:
+            self.notify(
+                ChangeEvent(
+                    ChangeType.RENAME,
+                    list(key_path),
+                    new_key,
+                    self._event_index(curr, new_key),
+                    value=curr[new_key],
+                    old_key=old_key,
+                )
+            )
         return curr
 
-    # O(n) insertions for new fields
+    # O(1) insertions for new fields
     def insert(
         self,
         key_path: list[str],
@@ -83,70 +532,229 @@ class CustomOrderedDict(dict):
         insert_key: str | None = None,
         after: bool = False,
     ) -> None:
-        target_dict = self.get_nested_value(key_path)
+        target_dict = self.get_nested_value(key_path, unshare=True)
         if not isinstance(target_dict, CustomOrderedDict):
             raise ValueError("Expected dictionary, got string instead.")
 
-        keys = list(target_dict.keys())
+        old_value = target_dict.get(key)
         if not insert_key:
-            insert_pos = len(
-                keys
-            )  # default behaviour: insert at the back of the dictionary
+            # default behaviour: insert at the back of the dictionary
+            target_dict[key] = value
+        elif insert_key not in target_dict:
+            raise KeyError("Invalid index for dictionary.")
         else:
-            insert_pos = keys.index(insert_key)
-            if insert_pos < 0 or insert_pos >= len(target_dict):
-                raise KeyError("Invalid index for dictionary.")
+            target_dict._insert_at(key, value, insert_key, after)
 
-        if after:
-            keys.insert(insert_pos + 1, key)
-        else:
-            keys.insert(insert_pos, key)
-
-        new_dict = dict()
-        for k in keys:
-            new_dict[k] = target_dict.get(k, None)
-
-        target_dict.clear()
-        target_dict.update(new_dict)
-        target_dict[key] = value
+        if self.listeners:
+            self.notify(
+                ChangeEvent(
+                    ChangeType.INSERT,
+                    list(key_path),
+                    key,
+                    self._event_index(target_dict, key),
+                    value=value,
+                    old_value=old_value,
+                )
+            )
 
     def update_nested_value(
         self, key_path: list[str], key: str, new_value: "str | CustomOrderedDict"
     ):
-        target_dict = self.get_nested_value(key_path)
+        target_dict = self.get_nested_value(key_path, unshare=True)
         if not isinstance(target_dict, CustomOrderedDict):
             raise ValueError("Expected dictionary, got string instead.")
         if key not in target_dict.keys():
             raise KeyError(f"Key {key} not found in the dictionary.")
+        old_value = target_dict[key]
         target_dict[key] = new_value
-        print(f"Dictionary updated with key:value pair {key}:{new_value}.")
+        if self.listeners:
+            self.notify(
+                ChangeEvent(
+                    ChangeType.UPDATE,
+                    list(key_path),
+                    key,
+                    self._event_index(target_dict, key),
+                    value=new_value,
+                    old_value=old_value,
+                )
+            )
 
     def remove(self, key_path: list[str], key: str):
-        target_dict = self.get_nested_value(key_path)
+        target_dict = self.get_nested_value(key_path, unshare=True)
         if not isinstance(target_dict, CustomOrderedDict):
             raise ValueError("Expected dictionary, got string instead.")
 
-        target_dict.pop(key)
-        print(f"Dictionary entry with key {key} deleted.")
+        index = self._event_index(target_dict, key)
+        old_value = target_dict.pop(key)
+        if self.listeners:
+            self.notify(
+                ChangeEvent(
+                    ChangeType.REMOVE, list(key_path), key, index, old_value=old_value
+                )
+            )
 
     def remove_all(self, key_path: list[str]):
-        target_dict = self.get_nested_value(key_path)
+        target_dict = self.get_nested_value(key_path, unshare=True)
         if not isinstance(target_dict, CustomOrderedDict):
             raise ValueError("Expected dictionary, got string instead.")
 
+        old_value = target_dict.copy() if self.listeners else None
         target_dict.clear()
-        print(f"Dictionary entries cleared.")
+        if self.listeners:
+            self.notify(
+                ChangeEvent(ChangeType.CLEAR, list(key_path), old_value=old_value)
+            )
+
+    def get_nested_value(
+        self, key_path: list[str], unshare: bool = False
+    ) -> "CustomOrderedDict | str":
+        """
+        Returns the value at the end of the key path.
+
+        If unshare is set, shared dictionaries along the path are replaced by private
+        shallow copies, so that the returned dictionary can be modified without
+        affecting other trees that share it, and the digests along the path are reset.
 
-    def get_nested_value(self, key_path: list[str]) -> "CustomOrderedDict | str":
+        Dictionaries resolved from a key path are cached, so that resolving the same
+        key path again costs a single lookup while the structure of the tree has not
+        changed. The access hooks along the path are still invoked on every access.
+        """
+        key_path = tuple(key_path)
         if not key_path:
+            if unshare:
+                self._reset_digest()
             return self
-        current_level, next_level = self, self
+
+        cache = self._path_cache
+        entry = cache.get(key_path) if cache is not None else None
+        if entry is not None:
+            nodes = self._cached_nodes(entry)
+            if nodes is not None and not (
+                unshare and any(node.shared for node in nodes)
+            ):
+                self.path_cache_hits += 1
+                if unshare:
+                    self._reset_digest()
+                    for node in nodes:
+                        node._reset_digest()
+                return nodes[-1]
+            del cache[key_path]
+
+        self.path_cache_misses += 1
+        nodes = self._resolve(key_path, unshare)
+        curr = nodes[-1]
+        if all(isinstance(node, CustomOrderedDict) for node in nodes):
+            if cache is None or len(cache) >= self.PATH_CACHE_SIZE:
+                cache = self._path_cache = {}
+            cache[key_path] = (
+                tuple(weakref.ref(node) for node in nodes),
+                tuple(node._version for node in (self, *nodes[:-1])),
+            )
+        return curr
+
+    def _cached_nodes(self, entry: tuple) -> list | None:
+        """
+        Returns the nodes of a path cache entry, invoking their access hooks, or None
+        if a node has been freed or a dictionary along the path has changed since.
+        """
+        refs, versions = entry
+        nodes = [ref() for ref in refs]
+        if any(node is None for node in nodes):
+            return None
+        for index, node in enumerate(nodes):
+            access_hook = node.access_hook
+            if access_hook and access_hook(node):
+                self._reset_digest()
+                for ancestor in nodes[:index]:
+                    ancestor._reset_digest()
+        for node, version in zip((self, *nodes[:-1]), versions):
+            if node._version != version:
+                return None
+        return nodes
+
+    def _resolve(self, key_path: tuple, unshare: bool) -> list:
+        """Walks the key path from this dictionary, returning the values along it."""
+        curr = self
+        path = [self]
+        if unshare:
+            self._reset_digest()
         for key in key_path:
-            if key not in next_level:
+            if key not in curr:
                 raise KeyError(f"Key {key} not found in the dictionary.")
-            current_level = next_level
-            next_level = current_level[key]
-        return current_level[key_path[-1]]
+            parent, curr = curr, curr[key]
+            access_hook = getattr(curr, "access_hook", None)
+            if access_hook and access_hook(curr):
+                # the dictionary was modified, e.g. reloaded, so its ancestors changed
+                for node in path:
+                    node._reset_digest()
+            if unshare and isinstance(curr, CustomOrderedDict):
+                if curr.shared:
+                    curr = curr.unshared_copy()
+                    parent[key] = curr
+                curr._reset_digest()
+            path.append(curr)
+        return path[1:]
+
+    def get_path_cache_stats(self) -> dict[str, int]:
+        """Returns the number of key paths cached and of cache hits and misses."""
+        return {
+            "entries": len(self._path_cache or ()),
+            "hits": self.path_cache_hits,
+            "misses": self.path_cache_misses,
+        }
+
+    def unshared_copy(self) -> "CustomOrderedDict":
+        """
+        Returns a shallow copy that is private to its owner. The children are now
+        referenced by both dictionaries, so they are marked as shared in turn.
+        """
+        copy = CustomOrderedDict(self)
+        self.share_children()
+        if self.access_hook is not None:
+            copy.access_hook = self.access_hook
+        return copy
+
+    def snapshot(self, key_path: list[str] | None = None) -> Any:
+        """
+        Returns a persistent snapshot of the dictionary at the end of the key path.
+
+        Nothing is copied: the dictionary and its children are marked as shared, so
+        that the key path methods copy only the path to a node before modifying it.
+        Shared dictionaries raise a SharedDictionaryError when modified in place, so
+        the snapshot does not see changes made to the tree after it was taken, as
+        long as the values other than dictionaries are not modified in place either.
+        Taking a snapshot costs the number of keys of the dictionary, whatever the
+        size of its subtrees, and every later edit costs the length of its key path.
+        A snapshot of the root is a copy of its top level, as the root itself is
+        modified in place.
+
+        Values other than dictionaries are returned as they are.
+
+        Parameters:
+        -----------
+        key_path : list[str] | None
+            The key path of the value to take a snapshot of, or None for the root.
+
+        Returns:
+        --------
+        CustomOrderedDict | Any
+            The snapshot, which must not be modified in place.
+        """
+        target = self.get_nested_value(key_path or [])
+        if not isinstance(target, CustomOrderedDict):
+            return target
+        if target is self:
+            target = self.unshared_copy()
+        else:
+            target.share_children()
+        target.shared = True
+        return target
+
+    def share_children(self):
+        """Marks the nested dictionaries as shared, once they are referenced twice."""
+        for value in dict.values(self):
+            if isinstance(value, CustomOrderedDict):
+                value.shared = True
 
     def map_keys_to_target_dict(self, target_dict: "CustomOrderedDict"):
         """
@@ -1,10 +1,65 @@
+import contextlib
+import os
+import shutil
+import sys
+from collections import OrderedDict
+from functools import partial
 from pathlib import Path
 
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
 
 from env_var.environment import EnvironmentVariables
+from model.case_loader import CaseLoader, LoadedFile, read_file_class
+from model.content_store import ContentStore, StoredFile, text_digest
 from model.core.foamfile import FoamFile
-from model.custom_ordered_dict import CustomOrderedDict
+from model.custom_ordered_dict import ChangeEvent, CustomOrderedDict
+from model.key_path_index import KeyPathIndex
+from model.patch_index import (
+    PatchIndex,
+    field_patches,
+    read_mesh_patches,
+    rename_mesh_patch,
+)
+from model.search_index import SearchIndex, SearchMatch, index_tree
+from model.snapshot import WorkspaceSnapshot
+from util.constants import (
+    BOUNDARY_MESH_CLASS,
+    SNAPSHOT_FILE_NAME,
+    ODictType,
+)
+from util.exceptions import DuplicateKeyError
+
+
+def remove_files(path_strs: list[str]):
+    """Removes files, ignoring those that do not exist or cannot be removed."""
+    for path_str in path_strs:
+        with contextlib.suppress(OSError):
+            os.remove(path_str)
+
+
+def back_up_file(path_str: str, backup_path: str):
+    """
+    Gives a file a second name, so that it is kept when the file is replaced. The file
+    is hard linked if possible, and copied otherwise.
+    """
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(backup_path)
+    try:
+        os.link(path_str, backup_path)
+    except OSError:
+        shutil.copy2(path_str, backup_path)
+
+
+def estimate_size(value) -> int:
+    """Returns a rough estimate of the memory, in bytes, held by a parsed file tree."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + estimate_size(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            size += estimate_size(v)
+    return size
 
 
 class Database(QObject):
@@ -16,25 +71,129 @@ class Database(QObject):
     updates the database accordingly. The database is structured as a custom ordered
     dictionary.
 
+    File trees are kept in memory up to a configurable memory budget. Once the budget
+    is exceeded, the trees of the least recently accessed files that have no pending
+    writes are evicted and replaced by empty stubs, which are re-parsed transparently
+    the next time they are reached through `get_nested_value`.
+
+    A case can also be loaded in the background with `start_loading`, in which case
+    its directories and files are added one by one as a worker thread reads them.
+
+    The keys and values of the files are indexed for searches as the files are read,
+    on the worker thread when loading in the background. Edited files are indexed
+    again before the next search.
+
     Attributes:
         database_updated (pyqtSignal): Signal emitted when the database is updated.
+        memory_stats_changed (pyqtSignal): Signal emitted when files are evicted or
+            reloaded.
+        directory_loaded (pyqtSignal): Signal emitted with the key path of every
+            directory added during a background load.
+        file_loaded (pyqtSignal): Signal emitted with the key path of every file added
+            during a background load.
+        file_load_failed (pyqtSignal): Signal emitted with the path of a file that
+            could not be loaded and the error message.
+        loading_progress (pyqtSignal): Signal emitted with the number of files loaded
+            and the total number of files.
+        loading_finished (pyqtSignal): Signal emitted when a background load ends, with
+            whether it was cancelled.
 
     Methods:
         initialise_from_case(case_dir: Path):
             Initializes the database from the given case directory.
+        start_loading(case_dir: str):
+            Starts loading the given case directory on a worker thread.
+        cancel_loading():
+            Stops a background load after the file being read.
         fill_dict_from_subdir(odict: CustomOrderedDict, path: Path):
             Recursively fills the case directory dictionary with files and subdirectories.
         get_dict() -> CustomOrderedDict:
             Returns the current state of the database.
+        get_file_class(path_str: str) -> str | None:
+            Returns the OpenFOAM class of a file, probing its header if needed.
+        set_memory_budget(memory_budget: int | None):
+            Sets the memory budget, in bytes, for the parsed file trees.
+        enforce_memory_budget():
+            Evicts least recently used file trees until the budget is met.
+        save_snapshot():
+            Saves a binary snapshot of the case for a fast reopen.
+        search(query: str, regex: bool, case_sensitive: bool, limit: int | None):
+            Finds the entries whose key or value contains a query.
+        find_key_paths(query: str, limit: int):
+            Finds the key paths matching a fuzzy dotted query.
+        find_missing_patches() -> dict[str, set[str]]:
+            Returns the patches of the mesh missing from each field.
+        get_patch_conditions(path_str: str) -> dict[str, CustomOrderedDict | None]:
+            Returns the condition of a field applying to each patch of the mesh.
+        rename_patch(old_name: str, new_name: str) -> list[str]:
+            Renames a patch in the fields and the mesh, writing each file once.
     """
 
+    # types of the case directories, recognised by name
+    DIRECTORY_TYPES = {
+        "0": ODictType.ZERO_DIR,
+        "constant": ODictType.CONSTANT_DIR,
+        "system": ODictType.SYSTEM_DIR,
+    }
+
     database_updated = pyqtSignal()
+    memory_stats_changed = pyqtSignal()
+    directory_loaded = pyqtSignal(list)
+    file_loaded = pyqtSignal(list)
+    file_load_failed = pyqtSignal(str, str)
+    loading_progress = pyqtSignal(int, int)
+    loading_finished = pyqtSignal(bool)
 
-    def __init__(self, env_var: EnvironmentVariables) -> None:
+    def __init__(
+        self,
+        env_var: EnvironmentVariables,
+        memory_budget: int | None = None,
+        content_store: ContentStore | None = None,
+    ) -> None:
         super().__init__()
         self.env_var = env_var
+        # store shared with other open cases to deduplicate identical files and subtrees
+        self.content_store = content_store
+        # keeps the stored files backing the trees of this case alive
+        self.stored_files: dict[str, StoredFile] = dict()
+        self.case_dir = ""
         self.odict = CustomOrderedDict()
+        self.odict.subscribe(self.on_tree_changed, index=False)
         self.foamfile_store = dict()
+        # maps file paths to the (mtime_ns, size) of the file when last read or written
+        self.file_stats: dict[str, tuple[int, int]] = dict()
+        # maps file paths to the class declared in their FoamFile header
+        self.file_class_index: dict[str, str | None] = dict()
+
+        # memory budget in bytes for parsed file trees, or None for no limit
+        self.memory_budget = memory_budget
+        # resident file paths mapped to their estimated size, least recent first
+        self.file_lru: OrderedDict[str, int] = OrderedDict()
+        # maps file paths to the key path of the directory containing them. Key paths
+        # are kept rather than the directory dictionaries, as directories shared with a
+        # snapshot are replaced by copies when modified.
+        self.file_key_paths: dict[str, list[str]] = dict()
+        # paths of the directories of the case in the database dictionary
+        self.directories: set[str] = set()
+        self.evicted_files: set[str] = set()
+        # files with in-memory edits that have not been written yet
+        self.dirty_files: set[str] = set()
+        self.resident_size = 0
+        self.eviction_count = 0
+        # index of the keys and values of the files, and the files edited since they
+        # were indexed
+        self.search_index = SearchIndex()
+        self.stale_index_files: set[str] = set()
+        # index of the key paths of the case, kept up to date on every edit
+        self.key_path_index = KeyPathIndex()
+        # index of the patches defined by the fields and the mesh
+        self.patch_index = PatchIndex()
+        self.reload_count = 0
+        self._enforcement_pending = False
+
+        # worker reading the case in the background, and its thread, while loading
+        self.loader: CaseLoader | None = None
+        self.loader_thread: QThread | None = None
 
     def initialise_from_case(self, case_dir: str):
         """
@@ -44,18 +203,30 @@ class Database(QObject):
         directory, including files and subdirectories from '0', 'system', and 'constant'
         subdirectories. Emits the database_updated signal after initialization.
 
+        If the case has a workspace snapshot, files whose modification time and size
+        still match the snapshot are decoded from it instead of being parsed.
+
         Parameters:
         -----------
             case_dir (Path): The path to the case directory.
         """
+        self.case_dir = str(case_dir)
+        snapshot = self.read_snapshot()
         for dir in map(
             lambda subdir: Path(case_dir) / subdir,
             ["0", "system", "constant"],
         ):
-            self.fill_dict_from_subdir(self.odict, dir)
+            self.fill_dict_from_subdir(self.odict, dir, snapshot)
         self.database_updated.emit()
+        self.enforce_memory_budget()
 
-    def fill_dict_from_subdir(self, odict: CustomOrderedDict, path: Path):
+    def fill_dict_from_subdir(
+        self,
+        odict: CustomOrderedDict,
+        path: Path,
+        snapshot: WorkspaceSnapshot | None = None,
+        key_path: list[str] | None = None,
+    ):
         """
         Recursively fills the case directory dictionary with files and subdirectories.
 
@@ -67,48 +238,776 @@ class Database(QObject):
         -----------
             odict (CustomOrderedDict): The dictionary to be filled with directory contents.
             path (Path): The path to the current directory.
+            snapshot (WorkspaceSnapshot | None): A snapshot to decode unchanged files from.
+            key_path (list[str] | None): The key path of odict in the database
+                dictionary, which is the root if None.
         """
         subdir_dict = CustomOrderedDict()
         odict[str(path)] = subdir_dict
-        for p in path.iterdir():
-            if p.is_file():
-                foamfile = FoamFile(p)
-                self.foamfile_store[str(p)] = foamfile
+        self.directories.add(str(path))
+        subdir_key_path = (key_path or []) + [str(path)]
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    self.add_file(
+                        subdir_key_path,
+                        self.read_file(entry.path, entry.stat(), snapshot),
+                    )
+                elif entry.is_dir():
+                    self.fill_dict_from_subdir(
+                        subdir_dict, Path(entry.path), snapshot, subdir_key_path
+                    )
+
+    def start_loading(self, case_dir: str):
+        """
+        Starts loading the given case directory on a worker thread.
+
+        Directories and files are added to the database as the worker reads them, and
+        the directory_loaded and file_loaded signals are emitted for each of them, so
+        that views can show the case progressively. The loading_finished signal is
+        emitted once every file is loaded or loading is cancelled.
+
+        Parameters:
+        -----------
+            case_dir (str): The path to the case directory.
+        """
+        self.case_dir = str(case_dir)
+        snapshot = self.read_snapshot()
+
+        self.loader_thread = QThread()
+        self.loader = CaseLoader(
+            self.case_dir, partial(self.read_file, snapshot=snapshot)
+        )
+        self.loader.moveToThread(self.loader_thread)
+        self.loader_thread.started.connect(self.loader.run)
+        self.loader.directory_found.connect(self.on_directory_found)
+        self.loader.files_classified.connect(self.on_files_classified)
+        self.loader.file_loaded.connect(self.on_file_loaded)
+        self.loader.file_failed.connect(self.file_load_failed)
+        self.loader.progress.connect(self.loading_progress)
+        self.loader.loading_finished.connect(self.on_loading_finished)
+        self.loader_thread.start()
+
+    def is_loading(self) -> bool:
+        return self.loader is not None
+
+    def cancel_loading(self):
+        """Requests a background load to stop once the file being read is loaded."""
+        if self.loader is not None:
+            self.loader.cancel()
+
+    def stop_loading(self):
+        """
+        Stops a background load and waits for its worker thread to finish. Files read
+        by the worker but not yet added to the database are discarded.
+        """
+        if self.loader is None:
+            return
+        self.loader.cancel()
+        self.finish_loading()
+
+    def finish_loading(self):
+        if self.loader_thread is not None:
+            self.loader_thread.quit()
+            self.loader_thread.wait()
+        self.loader = None
+        self.loader_thread = None
+
+    def on_directory_found(self, key_path: list[str]):
+        if self.loader is None or not self.has_directory(key_path[:-1]):
+            return
+        self.odict.insert(key_path[:-1], key_path[-1], CustomOrderedDict())
+        self.directories.add(key_path[-1])
+        self.directory_loaded.emit(key_path)
+
+    def on_files_classified(self, classes: dict[str, str | None]):
+        if self.loader is None:
+            return
+        for path_str, foam_class in classes.items():
+            self.file_class_index.setdefault(path_str, foam_class)
+
+    def on_file_loaded(self, parent_key_path: list[str], loaded_file: LoadedFile):
+        if self.loader is None or not self.has_directory(parent_key_path):
+            return
+        self.add_file(parent_key_path, loaded_file)
+        self.file_loaded.emit(parent_key_path + [loaded_file.path_str])
+        self.schedule_memory_budget()
+
+    def has_directory(self, key_path: list[str]) -> bool:
+        """
+        Returns whether the directory at the given key path still exists, as it may be
+        renamed or deleted while the case is loading, in which case the entries found
+        in it are dropped.
+        """
+        try:
+            return isinstance(self.odict.get_nested_value(key_path), CustomOrderedDict)
+        except KeyError:
+            return False
+
+    def on_loading_finished(self, cancelled: bool):
+        if self.loader is None:
+            return
+        self.finish_loading()
+        self.enforce_memory_budget()
+        self.loading_finished.emit(cancelled)
+
+    def read_file(
+        self,
+        path_str: str,
+        stat: os.stat_result,
+        snapshot: WorkspaceSnapshot | None = None,
+    ) -> LoadedFile:
+        """
+        Reads a file, from the snapshot if it is current, without adding it to the
+        database. This method may run on a worker thread, so it only touches the
+        content store, which is thread-safe.
+
+        Parameters:
+        -----------
+            path_str (str): The path to the file.
+            stat (os.stat_result): The status of the file.
+            snapshot (WorkspaceSnapshot | None): A snapshot to decode the file from.
+
+        Returns:
+        --------
+            LoadedFile: The file read, to be passed to `add_file`.
+        """
+        foamfile = FoamFile(path_str)
+
+        foamdict = None
+        if snapshot is not None and snapshot.is_current(path_str, stat):
+            try:
+                header, start_comment, foamdict = snapshot.read_file(path_str)
+                foamfile.header, foamfile.start_comment = header, start_comment
+            except ValueError:
+                foamdict = None
+
+        stored_file = None
+        if foamdict is None:
+            foamdict, stored_file = self.parse_file(foamfile)
+        elif self.content_store is not None:
+            stored_file = self.content_store.add_file(
+                None, foamdict, foamfile.header, foamfile.start_comment
+            )
+            foamdict = stored_file.checkout()
+
+        return LoadedFile(
+            path_str, stat, foamfile, foamdict, stored_file, index_tree(foamdict)
+        )
+
+    def add_file(self, parent_key_path: list[str], loaded_file: LoadedFile):
+        """
+        Adds a file read by `read_file` to its directory dictionary.
+
+        Parameters:
+        -----------
+            parent_key_path (list[str]): The key path of the directory containing the
+                file.
+            loaded_file (LoadedFile): The file read.
+        """
+        path_str, stat, foamfile = (
+            loaded_file.path_str,
+            loaded_file.stat,
+            loaded_file.foamfile,
+        )
+        if loaded_file.stored_file is not None:
+            self.stored_files[path_str] = loaded_file.stored_file
+        self.foamfile_store[path_str] = foamfile
+        self.file_stats[path_str] = (stat.st_mtime_ns, stat.st_size)
+        self.file_class_index[path_str] = foamfile.header.get("class")
+        self.register_file(parent_key_path, path_str, loaded_file.foamdict)
+        postings = loaded_file.postings
+        if postings is None:
+            postings = index_tree(loaded_file.foamdict)
+        self.search_index.add_file(path_str, postings)
+        self.stale_index_files.discard(path_str)
+        self.key_path_index.add_file((*parent_key_path, path_str), loaded_file.foamdict)
+        self.index_patches(path_str, loaded_file.foamdict)
+
+    def index_patches(self, path_str: str, foamdict: CustomOrderedDict):
+        """
+        Indexes the patches of the boundaryField of a file, or those of the mesh if
+        the file is a polyBoundaryMesh file.
+        """
+        if self.get_file_class(path_str) == BOUNDARY_MESH_CLASS:
+            patches, groups = read_mesh_patches(path_str)
+            self.patch_index.add_file(path_str, patches, mesh=True, groups=groups)
+        else:
+            self.patch_index.add_file(path_str, field_patches(foamdict))
+
+    def parse_file(
+        self, foamfile: FoamFile
+    ) -> tuple[CustomOrderedDict, StoredFile | None]:
+        """
+        Parses a file, reusing the tree of a file with identical text if the content
+        store already holds one.
+
+        Parameters:
+        -----------
+            foamfile (FoamFile): The file to parse. Its header and start comment are set.
+
+        Returns:
+        --------
+            tuple[CustomOrderedDict, StoredFile | None]: The parsed tree of the file, and
+                the stored file backing it if the database has a content store.
+        """
+        if self.content_store is None:
+            return foamfile.read(), None
+
+        with open(foamfile.path) as file:
+            text = file.read()
+        digest = text_digest(text)
+        stored_file = self.content_store.get_file(digest)
+        if stored_file is None:
+            foamdict = foamfile.parse(text)
+            stored_file = self.content_store.add_file(
+                digest, foamdict, foamfile.header, foamfile.start_comment
+            )
+        else:
+            foamfile.header = stored_file.header
+            foamfile.start_comment = stored_file.start_comment
+
+        return stored_file.checkout(), stored_file
+
+    def register_file(
+        self, parent_key_path: list[str], path_str: str, foamdict: CustomOrderedDict
+    ):
+        """
+        Adds a parsed file tree to its directory dictionary and tracks it for eviction.
+
+        Parameters:
+        -----------
+            parent_key_path (list[str]): The key path of the directory containing the
+                file.
+            path_str (str): The path to the file.
+            foamdict (CustomOrderedDict): The parsed contents of the file.
+        """
+        self.get_directory(parent_key_path)[path_str] = foamdict
+        foamdict.access_hook = partial(self.on_file_access, path_str)
+        self.file_key_paths[path_str] = parent_key_path
+        self.evicted_files.discard(path_str)
+
+        size = estimate_size(foamdict)
+        self.resident_size += size - self.file_lru.pop(path_str, 0)
+        self.file_lru[path_str] = size
+
+    def on_file_access(self, path_str: str, foamdict: CustomOrderedDict) -> bool:
+        """
+        Marks a file as recently used, re-parsing its tree in place if it was evicted.
+
+        Parameters:
+        -----------
+            path_str (str): The path to the file accessed.
+            foamdict (CustomOrderedDict): The file tree, or its stub if evicted.
+
+        Returns:
+        --------
+            bool: Whether the tree was re-parsed.
+        """
+        if path_str not in self.evicted_files:
+            if path_str in self.file_lru:
+                self.file_lru.move_to_end(path_str)
+            return False
+
+        foamfile = FoamFile(path_str)
+        content, stored_file = self.parse_file(foamfile)
+        # a stub shared with snapshots stands for the file on disk in all of them, so
+        # it is filled in place, and its children are shared in turn
+        shared, foamdict.shared = foamdict.shared, False
+        foamdict.update(content)
+        if shared:
+            foamdict.shared = True
+            foamdict.share_children()
+        if stored_file is not None:
+            self.stored_files[path_str] = stored_file
+        self.foamfile_store[path_str] = foamfile
+        self.update_file_stats(path_str)
+        self.evicted_files.discard(path_str)
+        self.reload_count += 1
+
+        size = estimate_size(foamdict)
+        self.resident_size += size
+        self.file_lru[path_str] = size
+        self.memory_stats_changed.emit()
+        self.schedule_memory_budget()
+        return True
+
+    def on_tree_changed(self, event: ChangeEvent):
+        """
+        Marks the file modified by a change to the database dictionary as having
+        pending writes, so that it is not evicted before `update_file` writes it, and
+        updates the indexes of the file.
+        """
+        path_str = self.get_file_key(event.key_path)
+        if path_str is not None:
+            self.dirty_files.add(path_str)
+            self.stale_index_files.add(path_str)
+            self.key_path_index.apply_change(event)
+            # patches are only affected by changes down to the entries of a patch
+            nested_keys = event.key_path[event.key_path.index(path_str) + 1 :]
+            if not nested_keys or (
+                nested_keys[0] == "boundaryField" and len(nested_keys) <= 2
+            ):
+                file_key_path = self.file_key_paths[path_str] + [path_str]
+                self.index_patches(path_str, self.odict.get_nested_value(file_key_path))
+
+    def get_file_key(self, key_path: list[str]) -> str | None:
+        """Returns the path of the file containing the given key path, if any."""
+        for key in key_path:
+            if key in self.file_key_paths:
+                return key
+        return None
+
+    def get_item_type(self, key: str) -> ODictType:
+        """
+        Returns the type of an entry of the database dictionary from its key.
+
+        Directories and files are recognised from the paths indexed when they were
+        loaded, without accessing the filesystem, so that nested keys which happen to
+        match a path relative to the working directory are not mistaken for them.
+        """
+        if key in self.directories:
+            return self.DIRECTORY_TYPES.get(os.path.basename(key), ODictType.OTHER_DIR)
+        if key in self.file_key_paths:
+            return ODictType.FILE
+        if key == "boundaryField":
+            return ODictType.BOUNDARY_FIELD
+        return ODictType.OTHER
+
+    def get_directory(self, key_path: list[str]) -> CustomOrderedDict:
+        """
+        Returns the directory dictionary at the given key path, ready to be modified.
+        Directories shared with a snapshot of the database dictionary are copied first.
+        """
+        return self.odict.get_nested_value(key_path, unshare=True)  # type: ignore
+
+    def set_memory_budget(self, memory_budget: int | None):
+        """
+        Sets the memory budget for parsed file trees and evicts trees to meet it.
+
+        Parameters:
+        -----------
+            memory_budget (int | None): The budget in bytes, or None for no limit.
+        """
+        self.memory_budget = memory_budget
+        self.enforce_memory_budget()
 
-                foamdict = foamfile.read()
-                subdir_dict[str(p)] = foamdict
-            elif p.is_dir():
-                self.fill_dict_from_subdir(subdir_dict, p)
+    def schedule_memory_budget(self):
+        """
+        Enforces the memory budget once control returns to the event loop, so that a
+        file is never evicted in the middle of an operation that is editing it.
+        """
+        if self.memory_budget is None or self.resident_size <= self.memory_budget:
+            return
+        if not self._enforcement_pending:
+            self._enforcement_pending = True
+            QTimer.singleShot(0, self.enforce_memory_budget)
+
+    def enforce_memory_budget(self):
+        """
+        Evicts the least recently used file trees until the memory budget is met.
+
+        Files with pending writes are never evicted, and the most recently used file
+        always stays resident.
+        """
+        self._enforcement_pending = False
+        if self.memory_budget is None:
+            return
+
+        evicted = False
+        for path_str in list(self.file_lru)[:-1]:
+            if self.resident_size <= self.memory_budget:
+                break
+            if path_str in self.dirty_files:
+                continue
+            self.evict_file(path_str)
+            evicted = True
+
+        if evicted:
+            self.memory_stats_changed.emit()
+
+    def evict_file(self, path_str: str):
+        """
+        Replaces the tree of a file with an empty stub that is re-parsed on access.
+
+        Parameters:
+        -----------
+            path_str (str): The path to the file to evict.
+        """
+        self.resident_size -= self.file_lru.pop(path_str)
+        stub = CustomOrderedDict()
+        stub.access_hook = partial(self.on_file_access, path_str)
+        self.get_directory(self.file_key_paths[path_str])[path_str] = stub
+        self.foamfile_store.pop(path_str, None)
+        self.stored_files.pop(path_str, None)
+        self.evicted_files.add(path_str)
+        self.eviction_count += 1
+
+    def update_file_stats(self, path_str: str):
+        stat = os.stat(path_str)
+        self.file_stats[path_str] = (stat.st_mtime_ns, stat.st_size)
+
+    def get_snapshot_path(self) -> str:
+        return os.path.join(self.case_dir, SNAPSHOT_FILE_NAME)
+
+    def read_snapshot(self) -> WorkspaceSnapshot | None:
+        """
+        Reads the workspace snapshot of the case, if it has a valid one.
+
+        Returns:
+        --------
+            WorkspaceSnapshot | None: The snapshot, or None if it is missing or corrupted.
+        """
+        try:
+            return WorkspaceSnapshot.read(self.get_snapshot_path())
+        except (OSError, ValueError):
+            return None
+
+    def save_snapshot(self):
+        """
+        Saves a binary snapshot of every file in the case, to be validated and decoded
+        on the next `initialise_from_case` instead of parsing the files again.
+
+        Evicted files, and files with pending writes whose tree differs from the text
+        on disk, are parsed again from disk to be included in the snapshot.
+
+        Raises:
+        -------
+            ValueError: If a file tree contains a value that cannot be encoded.
+        """
+        if not self.case_dir:
+            return
+
+        files = []
+        for path_str, (mtime_ns, size) in self.file_stats.items():
+            if path_str in self.evicted_files or path_str in self.dirty_files:
+                foamfile = FoamFile(path_str)
+                content = foamfile.read()
+            else:
+                foamfile = self.foamfile_store[path_str]
+                content = self.odict.get_nested_value(
+                    self.file_key_paths[path_str]
+                )[path_str]
+            files.append(
+                (
+                    path_str,
+                    mtime_ns,
+                    size,
+                    foamfile.header,
+                    foamfile.start_comment,
+                    content,
+                )
+            )
+        WorkspaceSnapshot.write(self.get_snapshot_path(), files)
+
+    def get_memory_stats(self) -> dict[str, int]:
+        """Returns the resident size, budget, and eviction statistics of the database."""
+        return {
+            "resident_size": self.resident_size,
+            "memory_budget": self.memory_budget or 0,
+            "resident_files": len(self.file_lru),
+            "evicted_files": len(self.evicted_files),
+            "evictions": self.eviction_count,
+            "reloads": self.reload_count,
+        }
+
+    def search(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        limit: int | None = None,
+    ) -> list[SearchMatch]:
+        """
+        Finds the entries of the case whose key or value contains a query. Files
+        edited since they were last indexed are indexed again first.
+
+        Parameters:
+        -----------
+            query (str): The text to find, or a regular expression.
+            regex (bool): Whether the query is a regular expression.
+            case_sensitive (bool): Whether the case of the query must match.
+            limit (int | None): The maximum number of entries returned.
+
+        Returns:
+        --------
+            list[SearchMatch]: The entries found, those whose key or value is the
+                query first.
+
+        Raises:
+        -------
+            re.error: If the query is not a valid regular expression.
+        """
+        for path_str in self.stale_index_files:
+            if path_str in self.file_key_paths:
+                file_key_path = self.file_key_paths[path_str] + [path_str]
+                self.search_index.add_file(
+                    path_str, index_tree(self.odict.get_nested_value(file_key_path))
+                )
+        self.stale_index_files.clear()
+
+        matches = []
+        for path_str, key_path, text in self.search_index.search(
+            query, regex, case_sensitive, limit
+        ):
+            file_key_path = (*self.file_key_paths[path_str], path_str)
+            matches.append(SearchMatch(file_key_path + key_path, text, path_str))
+        return matches
+
+    def find_key_paths(self, query: str, limit: int = 50) -> list[tuple]:
+        """
+        Finds the key paths of the case matching a fuzzy dotted query, such as
+        `U.bF.waterin.type`, best matches first.
+
+        Parameters:
+        -----------
+            query (str): The segments of the key paths to find, separated by dots.
+            limit (int): The maximum number of key paths returned.
+
+        Returns:
+        --------
+            list[tuple]: The key paths found in the database dictionary.
+        """
+        return self.key_path_index.find(query, limit)
+
+    def find_missing_patches(self) -> dict[str, set[str]]:
+        """
+        Returns the patches missing from the boundaryField of each field lacking any:
+        the patches of constant/polyMesh/boundary, or those of the other fields if the
+        case has no mesh.
+        """
+        return self.patch_index.missing_patches()
+
+    def get_patch_conditions(
+        self, path_str: str
+    ) -> dict[str, CustomOrderedDict | None]:
+        """
+        Returns the entry of the boundaryField of a field applying to each patch of the
+        mesh, resolving the patch groups and regular expression keys of the field.
+
+        Parameters:
+        -----------
+            path_str (str): The path to the field.
+
+        Returns:
+        --------
+            dict[str, CustomOrderedDict | None]: The condition applying to each patch,
+                which is None if no entry of the field applies to the patch.
+        """
+        resolution = self.patch_index.resolve(path_str)
+        file_key_path = self.file_key_paths[path_str] + [path_str]
+        boundary_field = self.odict.get_nested_value(file_key_path)["boundaryField"]
+        return {
+            patch: None if key is None else boundary_field[key]
+            for patch, key in resolution.items()
+        }
 
     def get_dict(self):
         return self.odict
 
+    def get_file_class(self, path_str: str) -> str | None:
+        """
+        Returns the OpenFOAM class declared in the header of a file.
+
+        The classes of the files are indexed by a background scan from their headers
+        before the files are parsed, and taken from the header of every file loaded.
+        Other files are probed with a header-only read, and the result is cached in
+        the file class index.
+
+        Parameters:
+        -----------
+            path_str (str): The path to the file.
+
+        Returns:
+        --------
+            str | None: The class of the file, or None if it has no FoamFile header.
+        """
+        if path_str not in self.file_class_index:
+            self.file_class_index[path_str] = read_file_class(path_str)
+        return self.file_class_index[path_str]
+
     def get_foamfile(self, key_path: list[str]) -> FoamFile:
         file_path, file_key_seq = self.get_file_path(key_path)
+        # reloads the file if it has been evicted
+        self.odict.get_nested_value(file_key_seq)
         return self.foamfile_store[str(file_path)]
 
     def get_file_path(self, key_path: list[str]) -> tuple[str, list[str]]:
         """
-        Given a key path, traverses through the key path until we reach the first non-file key.
+        Returns the file containing the given key path, found from the paths indexed
+        when the files were loaded, without accessing the filesystem.
 
         Returns:
         --------
-        1. The first return value will be the path of the foamfile odict we require.
-        2. The second return value represents the sequence of keys leading to the file's odict.
+        1. The path of the file, or an empty string if the key path is not in a file.
+        2. The key path of the file's odict, or an empty list.
         """
-        res, seq = "", []
-        for k in key_path:
-            if not Path(k).exists():
-                break
-            res = k
-            seq.append(k)
-        return res, seq
+        path_str = self.get_file_key(key_path)
+        if path_str is None:
+            return "", []
+        return path_str, self.file_key_paths[path_str] + [path_str]
 
     def update_file(self, key_path: list[str]):
         path, edited_file_seq = self.get_file_path(key_path)
-        foamfile: FoamFile = self.foamfile_store[str(path)]
         content_to_write = self.odict.get_nested_value(edited_file_seq)
+        foamfile: FoamFile = self.foamfile_store[str(path)]
+
+        # the file stays dirty, and so resident, if writing fails. Edits made through
+        # the database dictionary have already marked it as dirty.
+        self.dirty_files.add(str(path))
         foamfile.write(content_to_write)
+        self.on_file_written(str(path), content_to_write)
+
+    def update_files(self, path_strs: list[str], texts: dict[str, str] | None = None):
+        """
+        Writes several files at once. The text of every file is rendered and written
+        to a temporary file before any file is replaced, so that no file is replaced
+        if one cannot be written.
+
+        Parameters:
+        -----------
+            path_strs (list[str]): The paths of the files whose tree to write.
+            texts (dict[str, str] | None): The text to write to other files, by path,
+                e.g. for mesh files, whose contents are not held in the tree.
+        """
+        contents = {
+            path_str: self.odict.get_nested_value(
+                self.file_key_paths[path_str] + [path_str]
+            )
+            for path_str in path_strs
+        }
+        texts = dict(texts or {})
+        for path_str, content in contents.items():
+            self.dirty_files.add(path_str)
+            texts[path_str] = self.foamfile_store[path_str].render(content)
+
+        self.write_texts(texts)
+        for path_str in texts:
+            self.on_file_written(path_str, contents.get(path_str))
+
+    def write_texts(self, texts: dict[str, str]):
+        """
+        Writes the text of several files, by path. Every text is written to a
+        temporary file first, and the files are only replaced once all of them have
+        been written. The temporary files are removed if one cannot be written, and
+        the files already replaced are restored if another one cannot be replaced.
+        """
+        tmp_paths = []
+        try:
+            for path_str, text in texts.items():
+                tmp_paths.append(path_str + ".tmp")
+                with open(tmp_paths[-1], "w") as file:
+                    file.write(text)
+        except BaseException:
+            remove_files(tmp_paths)
+            raise
+
+        # the previous files are kept under a second name until all are replaced
+        backup_paths = []
+        replaced = []
+        try:
+            for path_str in texts:
+                if os.path.exists(path_str):
+                    backup_paths.append(path_str + ".bak")
+                    back_up_file(path_str, backup_paths[-1])
+                os.replace(path_str + ".tmp", path_str)
+                replaced.append(path_str)
+        except BaseException:
+            for path_str in replaced:
+                with contextlib.suppress(OSError):
+                    if path_str + ".bak" in backup_paths:
+                        os.replace(path_str + ".bak", path_str)
+                    else:
+                        os.remove(path_str)
+            remove_files(tmp_paths + backup_paths)
+            raise
+        remove_files(backup_paths)
+
+    def on_file_written(self, path_str: str, content: CustomOrderedDict | None):
+        """Records that a file has been written, with the tree written if any."""
+        self.dirty_files.discard(path_str)
+        self.update_file_stats(path_str)
+        # the file no longer matches the text it was stored under
+        self.stored_files.pop(path_str, None)
+        # a tree is written with the header of its file, and other texts are probed
+        # again when the class of the file is next requested
+        if content is not None:
+            header = self.foamfile_store[path_str].header
+            self.file_class_index[path_str] = header.get("class")
+        else:
+            self.file_class_index.pop(path_str, None)
+
+        if content is not None and path_str in self.file_lru:
+            size = estimate_size(content)
+            self.resident_size += size - self.file_lru[path_str]
+            self.file_lru[path_str] = size
+            self.schedule_memory_budget()
+
+    def rename_patch(
+        self, old_name: str, new_name: str, path_strs: list[str] | None = None
+    ) -> list[str]:
+        """
+        Renames a patch in every file defining it: the boundaryField of the fields
+        loaded from the 0 directory, and the polyBoundaryMesh files. Every file is
+        written once, and all of them are written before any is replaced or any tree
+        is renamed, so that a failure leaves both the files and the trees as they
+        were.
+
+        Parameters:
+        -----------
+            old_name (str): The name of the patch.
+            new_name (str): The new name of the patch.
+            path_strs (list[str] | None): The files to rename the patch in, which are
+                all the files defining it if None.
+
+        Returns:
+        --------
+            list[str]: The paths of the files modified.
+
+        Raises:
+        -------
+            KeyError: If no file defines the patch.
+            DuplicateKeyError: If a file defining the patch already defines a patch
+                with the new name.
+        """
+        if path_strs is None:
+            path_strs = sorted(self.patch_index.files_defining(old_name))
+        if not path_strs:
+            raise KeyError(f"No file defines the patch '{old_name}'.")
+        if self.patch_index.files_defining(new_name).intersection(path_strs):
+            raise DuplicateKeyError(new_name)
+
+        # every file is rendered from a renamed copy and written, and the trees of
+        # the fields are only renamed once every file has been written
+        texts = dict()
+        field_files = []
+        for path_str in path_strs:
+            if path_str in self.patch_index.mesh_files:
+                with open(path_str) as file:
+                    texts[path_str] = rename_mesh_patch(file.read(), old_name, new_name)
+                continue
+            content = self.odict.get_nested_value(
+                self.file_key_paths[path_str] + [path_str]
+            ).copy()
+            boundary_field = content["boundaryField"].copy()
+            boundary_field.rename_key([], old_name, new_name)
+            content["boundaryField"] = boundary_field
+            texts[path_str] = self.foamfile_store[path_str].render(content)
+            field_files.append(path_str)
+        self.write_texts(texts)
+
+        for path_str in field_files:
+            file_key_path = self.file_key_paths[path_str] + [path_str]
+            self.odict.rename_key(file_key_path + ["boundaryField"], old_name, new_name)
+            self.on_file_written(path_str, self.odict.get_nested_value(file_key_path))
+        for path_str in texts.keys() - set(field_files):
+            self.on_file_written(path_str, None)
+            # the header and the tree of a mesh file are read again from its new text
+            self.add_file(
+                self.file_key_paths[path_str],
+                self.read_file(path_str, os.stat(path_str)),
+            )
+        return list(path_strs)
 
     def delete_file(self, path_str: str):
         """
@@ -129,6 +1028,19 @@ class Database(QObject):
             raise FileNotFoundError(f"The file at {path_str} does not exist.")
 
         path.unlink()
+        self.resident_size -= self.file_lru.pop(path_str, 0)
+        self.foamfile_store.pop(path_str, None)
+        self.file_stats.pop(path_str, None)
+        self.file_class_index.pop(path_str, None)
+        self.stored_files.pop(path_str, None)
+        self.evicted_files.discard(path_str)
+        self.dirty_files.discard(path_str)
+        self.search_index.remove_file(path_str)
+        self.stale_index_files.discard(path_str)
+        self.patch_index.remove_file(path_str)
+        file_key_path = self.file_key_paths.pop(path_str, None)
+        if file_key_path is not None:
+            self.key_path_index.remove_file((*file_key_path, path_str))
 
     def create_file(
         self,
@@ -0,0 +1,331 @@
+from pathlib import Path
+from typing import Any
+
+from model.custom_ordered_dict import ChangeEvent, CustomOrderedDict
+from util.constants import ChangeType
+
+
+def trigrams(text: str) -> set[str]:
+    folded = text.casefold()
+    return {folded[i : i + 3] for i in range(len(folded) - 2)}
+
+
+def match_component(segment: str, component: str) -> int:
+    """
+    Returns how well a segment of a query, in lower case, matches a component of a
+    key path: 4 if equal, 3 for a prefix, 2 for a substring and 1 if its characters
+    appear in order, like `bf` in `boundaryField`. Returns 0 if it does not match.
+    """
+    folded = component.casefold()
+    if folded == segment:
+        return 4
+    if folded.startswith(segment):
+        return 3
+    if segment in folded:
+        return 2
+    position = 0
+    for char in segment:
+        position = folded.find(char, position) + 1
+        if not position:
+            return 0
+    return 1
+
+
+class KeyPathIndex:
+    """
+    A trigram index of the key paths of a case, for fuzzy lookups of dotted key paths
+    such as `U.bF.waterin.type`.
+
+    The key paths are held as a tree of nodes, one per directory, file and entry, whose
+    component is the name of the directory or file, or the key of the entry. Every
+    segment of a query must match a component of a key path, in order, but components
+    may be skipped, and the last segment must match the last component. The distinct
+    components are indexed by their trigrams, so that the components matching a
+    segment of three characters or more are found without scanning them, and every
+    component maps to the nodes holding it. Only the subtrees of the nodes matching
+    the most selective segment of a query are then visited.
+
+    The index is updated from the changes to the database dictionary: renaming a key
+    only updates its own node, and inserting one only adds the nodes below it.
+
+    Attributes:
+        keys (dict[int, Any]): Maps nodes to their key.
+        parents (dict[int, int]): Maps nodes to their parent node.
+        children (dict[int, dict[Any, int]]): Maps nodes to their child nodes by key.
+        component_nodes (dict[str, set[int]]): Maps components to the nodes holding
+            them.
+        trigram_components (dict[str, set[str]]): Maps trigrams, in lower case, to the
+            components containing them.
+    """
+
+    ROOT = 0
+    # the number of nodes visited by a query after which it returns the best matches
+    # among those found so far
+    MAX_VISITED = 20000
+
+    def __init__(self) -> None:
+        self.keys: dict[int, Any] = {self.ROOT: None}
+        self.parents: dict[int, int] = dict()
+        self.children: dict[int, dict[Any, int]] = {self.ROOT: dict()}
+        self.components: dict[int, str] = dict()
+        self.component_nodes: dict[str, set[int]] = dict()
+        self.trigram_components: dict[str, set[str]] = dict()
+        self.next_node = self.ROOT + 1
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def add_component(self, node: int, component: str):
+        self.components[node] = component
+        nodes = self.component_nodes.get(component)
+        if nodes is None:
+            nodes = self.component_nodes[component] = set()
+            for trigram in trigrams(component):
+                self.trigram_components.setdefault(trigram, set()).add(component)
+        nodes.add(node)
+
+    def remove_component(self, node: int):
+        component = self.components.pop(node)
+        nodes = self.component_nodes[component]
+        nodes.discard(node)
+        if nodes:
+            return
+        del self.component_nodes[component]
+        for trigram in trigrams(component):
+            components = self.trigram_components[trigram]
+            components.discard(component)
+            if not components:
+                del self.trigram_components[trigram]
+
+    def add_node(self, parent: int, key: Any, component: str | None = None) -> int:
+        """Adds a child node, replacing the child with the same key, if any."""
+        siblings = self.children.setdefault(parent, dict())
+        if key in siblings:
+            self.remove_node(siblings[key])
+        node = self.next_node
+        self.next_node += 1
+        self.keys[node] = key
+        self.parents[node] = parent
+        siblings[key] = node
+        self.add_component(node, str(key) if component is None else component)
+        return node
+
+    def remove_node(self, node: int, include_node: bool = True):
+        """Removes a node, unless include_node is False, and the nodes below it."""
+        stack = list(self.children.pop(node, dict()).values())
+        while stack:
+            child = stack.pop()
+            stack.extend(self.children.pop(child, dict()).values())
+            self.remove_component(child)
+            del self.keys[child], self.parents[child]
+        if include_node:
+            parent = self.parents.pop(node)
+            del self.children[parent][self.keys.pop(node)]
+            self.remove_component(node)
+
+    def add_value(self, node: int, value: Any):
+        """Adds the nodes of the entries nested in the value of a node."""
+        stack = [(node, value)]
+        while stack:
+            parent, foamdict = stack.pop()
+            if isinstance(foamdict, CustomOrderedDict):
+                for key, nested_value in foamdict.items():
+                    stack.append((self.add_node(parent, key), nested_value))
+
+    def find_node(self, key_path: tuple | list) -> int | None:
+        node = self.ROOT
+        for key in key_path:
+            node = self.children.get(node, {}).get(key)
+            if node is None:
+                return None
+        return node
+
+    def get_key_path(self, node: int) -> tuple:
+        keys = []
+        while node != self.ROOT:
+            keys.append(self.keys[node])
+            node = self.parents[node]
+        return tuple(reversed(keys))
+
+    def get_components(self, node: int) -> list[str]:
+        components = []
+        while node != self.ROOT:
+            components.append(self.components[node])
+            node = self.parents[node]
+        components.reverse()
+        return components
+
+    def add_file(self, file_key_path: tuple | list, tree: CustomOrderedDict):
+        """
+        Indexes a file and its entries, replacing its previous entries.
+
+        Parameters:
+        -----------
+            file_key_path (tuple | list): The key path of the file, ending with its
+                path. Directories and files are matched by their name.
+            tree (CustomOrderedDict): The parsed contents of the file.
+        """
+        node = self.ROOT
+        for key in file_key_path[:-1]:
+            child = self.children.get(node, {}).get(key)
+            if child is None:
+                child = self.add_node(node, key, Path(key).name)
+            node = child
+        path_str = file_key_path[-1]
+        file_node = self.add_node(node, path_str, Path(path_str).name)
+        self.add_value(file_node, tree)
+
+    def remove_file(self, file_key_path: tuple | list):
+        node = self.find_node(file_key_path)
+        if node is not None:
+            self.remove_node(node)
+
+    def apply_change(self, event: ChangeEvent):
+        """
+        Updates the nodes below a dictionary of a file that has been modified.
+
+        Parameters:
+        -----------
+            event (ChangeEvent): The change to the database dictionary.
+        """
+        parent = self.find_node(event.key_path)
+        if parent is None:
+            return
+        siblings = self.children.setdefault(parent, dict())
+        if event.change_type == ChangeType.INSERT:
+            self.add_value(self.add_node(parent, event.key), event.value)
+        elif event.change_type == ChangeType.REMOVE:
+            if event.key in siblings:
+                self.remove_node(siblings[event.key])
+        elif event.change_type == ChangeType.RENAME:
+            node = siblings.pop(event.old_key, None)
+            if node is None:
+                return
+            if event.key in siblings:
+                self.remove_node(siblings[event.key])
+            siblings[event.key] = node
+            self.keys[node] = event.key
+            self.remove_component(node)
+            self.add_component(node, str(event.key))
+        elif event.change_type == ChangeType.UPDATE:
+            node = siblings.get(event.key)
+            if node is None:
+                node = self.add_node(parent, event.key)
+            self.remove_node(node, include_node=False)
+            self.add_value(node, event.value)
+        elif event.change_type == ChangeType.CLEAR:
+            self.remove_node(parent, include_node=False)
+
+    def match_segment(self, segment: str) -> dict[str, int]:
+        """
+        Returns the components matching a segment of a query, with their score. The
+        components are only scanned for the characters of the segment in order if
+        none contains it.
+        """
+        scores = dict()
+        if len(segment) >= 3:
+            component_sets = sorted(
+                (
+                    self.trigram_components.get(trigram, set())
+                    for trigram in trigrams(segment)
+                ),
+                key=len,
+            )
+            for component in component_sets[0].intersection(*component_sets[1:]):
+                score = match_component(segment, component)
+                if score > 1:
+                    scores[component] = score
+            if scores:
+                return scores
+        for component in self.component_nodes:
+            score = match_component(segment, component)
+            if score:
+                scores[component] = score
+        return scores
+
+    def find(self, query: str, limit: int = 50) -> list[tuple]:
+        """
+        Finds the key paths matching a dotted query, best matches first.
+
+        Matches score higher when their components equal or start with the segments
+        of the query, when fewer components are skipped, and for shorter key paths.
+
+        Parameters:
+        -----------
+            query (str): The query, e.g. `U.bF.waterin.type`.
+            limit (int): The maximum number of key paths returned.
+
+        Returns:
+        --------
+            list[tuple]: The key paths found.
+        """
+        segments = [segment.casefold() for segment in query.split(".") if segment]
+        if not segments:
+            return []
+        segment_scores = [self.match_segment(segment) for segment in segments]
+        if not all(segment_scores):
+            return []
+
+        # the nodes of the most selective segment anchor the search: matches are
+        # those nodes if it is the last segment, or nodes below them otherwise
+        anchor = min(
+            range(len(segments)),
+            key=lambda i: sum(
+                len(self.component_nodes[component]) for component in segment_scores[i]
+            ),
+        )
+        # best matching anchors first, should the search stop early
+        anchor_scores = segment_scores[anchor]
+        anchors = [
+            node
+            for component in sorted(anchor_scores, key=anchor_scores.get, reverse=True)
+            for node in self.component_nodes[component]
+        ]
+        last_scores = segment_scores[-1]
+        if anchor == len(segments) - 1:
+            candidates = anchors
+        else:
+            candidates = []
+            visited = 0
+            for anchor_node in anchors:
+                stack = list(self.children.get(anchor_node, {}).values())
+                while stack and visited < self.MAX_VISITED:
+                    node = stack.pop()
+                    visited += 1
+                    if self.components[node] in last_scores:
+                        candidates.append(node)
+                    stack.extend(self.children.get(node, {}).values())
+
+        ranked = []
+        for node in candidates[: self.MAX_VISITED]:
+            components = self.get_components(node)
+            score = self.score(segment_scores, components)
+            if score is not None:
+                ranked.append((-score, len(components), node))
+        ranked.sort()
+        return [self.get_key_path(node) for _, _, node in ranked[:limit]]
+
+    @staticmethod
+    def score(
+        segment_scores: list[dict[str, int]], components: list[str]
+    ) -> int | None:
+        """
+        Matches the segments of a query to the components of a key path in order, the
+        last segment to the last component, returning the score of the match, or None
+        if a segment is not matched.
+        """
+        total = 0
+        position = 0
+        for scores in segment_scores[:-1]:
+            last = len(components) - 1
+            while position < last and components[position] not in scores:
+                position += 1
+                total -= 1
+            if position == len(components) - 1:
+                return None
+            total += 10 * scores[components[position]]
+            position += 1
+        last_score = segment_scores[-1].get(components[-1])
+        if not last_score:
+            return None
+        return total + 10 * last_score - (len(components) - 1 - position)
@@ -1,157 +1,496 @@
+from bisect import bisect_left
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable
 
-from PyQt6.QtCore import QModelIndex, QObject, Qt
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, QObject, Qt
 from PyQt6.QtGui import QIcon, QStandardItem, QStandardItemModel
 
-from model.custom_ordered_dict import CustomOrderedDict
+from model.custom_ordered_dict import ChangeEvent, CustomOrderedDict
 from model.database import Database
 from util.constants import ModelCreateType, ModelDeleteType, ModelUpdateType, ODictType
 from util.exceptions import DuplicateKeyError, InvalidModelIndexError
 
 
-class DictionaryEntryItem(QStandardItem):
+class ModelItem:
     """
-    DictionaryEntryItem is a subclass of QStandardItem that represents a key-value pair within a dictionary.
+    ModelItem is a lightweight handle on an entry of the data tree of an
+    OrderedDictModel, used as the internal pointer of the model indexes.
+
+    Handles only hold the key of their entry and their parent handle: values are read
+    straight from the data tree, so that the tree is never duplicated in the model.
+    The methods mirror those of QStandardItem.
+
+    Handles cache their key path as a tuple built from the cached path of their
+    parent, so that edits never walk up the tree. The cached paths of a handle and
+    of its loaded descendants are dropped when its key is renamed.
 
     Attributes:
-        key (str): The key to the dictionary entry.
-        value (str): The value of the dictionary entry.
-        is_editable (bool): Flag indicating whether the item is editable.
+        key (Any): The key of the entry in the dictionary containing it.
+        model (OrderedDictModel | None): The model the handle belongs to.
     """
 
-    def __init__(
-        self, key: str, value: str, is_editable: bool = True, is_flag: bool = False
-    ) -> None:
-        super().__init__()
+    ROLE_KEY = Qt.ItemDataRole.UserRole + 1
+    ROLE_TYPE = Qt.ItemDataRole.UserRole + 2
+
+    __slots__ = ("key", "model", "_parent", "_key_path")
+
+    def __init__(self, key: Any, parent: "OrderedDictItem | None" = None) -> None:
         self.key = key
-        self.value = value
-        self.dict_id = key
-        self.is_flag = is_flag
-        self.setEditable(is_editable)
-        self.initUI()
+        self._parent = parent
+        self.model = parent.model if parent is not None else None
+        self._key_path: tuple | None = None
 
-    def initUI(self):
-        self.update_display()
+    @property
+    def dict_id(self) -> Any:
+        return self.key
 
-    def set_key(self, key: str):
+    def set_key(self, key: Any):
+        if self._parent is not None:
+            self._parent.rename_child(self.key, key)
         self.key = key
-        self.dict_id = key
-        self.update_display()
+        self.invalidate_key_path()
+
+    def parent(self) -> "OrderedDictItem | None":
+        """Returns the parent handle, or None for top level entries."""
+        parent = self._parent
+        if parent is None or parent._parent is None:
+            return None
+        return parent
+
+    def row(self) -> int:
+        """Returns the row of the handle, or -1 if its entry has been removed."""
+        if self._parent is None:
+            return -1
+        row = self._parent.row_of(self.key)
+        if row < 0 or self._parent.children()[row] is not self:
+            return -1
+        return row
+
+    def index(self) -> QModelIndex:
+        row = self.row()
+        if self.model is None or row < 0:
+            return QModelIndex()
+        return self.model.createIndex(row, 0, self)
+
+    def key_path(self) -> tuple:
+        """Returns the cached key path of the entry, () for the invisible root."""
+        key_path = self._key_path
+        if key_path is None:
+            if self._parent is None:
+                key_path = ()
+            else:
+                key_path = self._parent.key_path() + (self.key,)
+            self._key_path = key_path
+        return key_path
 
-    def set_value(self, value: str):
-        self.value = value
-        self.update_display()
+    def invalidate_key_path(self):
+        self._key_path = None
+
+    def text(self) -> str:
+        return str(self.key)
+
+    def icon(self) -> QIcon | None:
+        return None
+
+    def item_type(self) -> ODictType | None:
+        return None
+
+    def edit_value(self) -> Any:
+        return self.key
+
+    def data(self, role: int = Qt.ItemDataRole.UserRole + 1) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.text()
+        if role == Qt.ItemDataRole.EditRole:
+            return self.edit_value()
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icon()
+        if role == ModelItem.ROLE_KEY:
+            return self.key
+        if role == ModelItem.ROLE_TYPE:
+            return self.item_type()
+        return None
+
+    def isEditable(self) -> bool:
+        return True
+
+    def child(self, row: int, column: int = 0) -> "ModelItem | None":
+        return None
+
+    def rowCount(self) -> int:
+        return 0
+
+    def hasChildren(self) -> bool:
+        return False
 
-    def update_display(self):
-        if not self.value:
-            self.setText(f"{self.key}")
-        else:
-            self.setText(f"{self.key}: {self.value}")
+
+class DictionaryEntryItem(ModelItem):
+    """
+    DictionaryEntryItem is a handle on a key-value pair within a dictionary.
+
+    Attributes:
+        key (str): The key to the dictionary entry.
+        value (str): The value of the dictionary entry, read from the data tree, or
+            "-" for flags, which have no value.
+    """
+
+    __slots__ = ()
+
+    def raw_value(self) -> Any:
+        if self.model is None or self._parent is None:
+            return None
+        foamdict = self.model._data.get_nested_value(self._parent.key_path())
+        return foamdict[self.key]
+
+    @property
+    def value(self) -> str:
+        value = self.raw_value()
+        return str(value) if value else "-"
+
+    @property
+    def is_flag(self) -> bool:
+        return not self.raw_value()
+
+    def text(self) -> str:
+        return f"{self.key}: {self.value}"
+
+    def edit_value(self) -> str:
+        return self.value
+
+    def isEditable(self) -> bool:
+        return not self.is_flag
 
     def no_value(self):
         return self.is_flag
 
 
-class OrderedDictItem(QStandardItem):
-    ROLE_KEY = Qt.ItemDataRole.UserRole + 1
-    ROLE_TYPE = Qt.ItemDataRole.UserRole + 2
-
+class OrderedDictItem(ModelItem):
     """
-    OrderedDictItem is a subclass of QStandardItem that represents a folder or dictionary name
-    in OpenFOAM input files.
+    OrderedDictItem is a handle on a folder or dictionary name in OpenFOAM input
+    files. The handles of its entries are only created once they are first needed,
+    e.g. when the item is expanded in a view.
 
     Attributes:
-        text (str): The text to be displayed for this item.
-        is_editable (bool): A flag indicating whether this item is editable.
+        key (str): The key of the dictionary, which is the path of directories and
+            files.
+        type (ODictType): The type of the dictionary.
     """
 
-    def __init__(self, text: str) -> None:
-        super().__init__()
-        self.dict_id = text
-        self.set_key(text)
-        self.initUI(text)
-
-    def initUI(self, text: str):
-        item_type = self.determine_item_type(text)
-        self.setData(item_type, OrderedDictItem.ROLE_TYPE)
-        self.set_display_text_and_icon(text, item_type)
-
-    def determine_item_type(self, text: str):
-        path = Path(text)
-        if path.is_dir():
-            name = path.name
-            if name == "0":
-                return ODictType.ZERO_DIR
-            elif name == "constant":
-                return ODictType.CONSTANT_DIR
-            elif name == "system":
-                return ODictType.SYSTEM_DIR
-            else:
-                return ODictType.OTHER_DIR
-        elif path.is_file():
-            return ODictType.FILE
-        elif text == "boundaryField":
+    __slots__ = ("type", "_children", "_rows", "_valid_rows", "_digest", "_partial")
+
+    _folder_icon = None
+
+    def __init__(
+        self,
+        text: str,
+        parent: "OrderedDictItem | None" = None,
+        item_type: ODictType | None = None,
+    ) -> None:
+        super().__init__(text, parent)
+        self.type = item_type or self.determine_item_type(text)
+        self._children: list[ModelItem] | None = None
+        # maps the keys of the entries to their rows. Only the rows of the first
+        # _valid_rows entries are up to date, those after a row inserted or removed
+        # are numbered again when next looked up.
+        self._rows: dict[Any, int] = {}
+        self._valid_rows = 0
+        # the digest of the dictionary when the rows were last refreshed
+        self._digest: bytes | None = None
+        # the dictionary, its keys and the handles created so far while the handles
+        # are created a chunk at a time
+        self._partial: tuple[CustomOrderedDict, list, list[ModelItem]] | None = None
+
+    def determine_item_type(self, text: str) -> ODictType:
+        """
+        Returns the type of the dictionary from the index of directories and files of
+        the database of the model, without accessing the filesystem.
+        """
+        if self.model is not None:
+            return self.model.db.get_item_type(text)
+        if text == "boundaryField":
             return ODictType.BOUNDARY_FIELD
-        else:
-            return ODictType.OTHER
+        return ODictType.OTHER
 
-    def set_display_text_and_icon(self, text: str, type: ODictType):
-        if type in {
+    def item_type(self) -> ODictType:
+        return self.type
+
+    def text(self) -> str:
+        if self.type in {
             ODictType.ZERO_DIR,
             ODictType.CONSTANT_DIR,
             ODictType.SYSTEM_DIR,
             ODictType.OTHER_DIR,
             ODictType.FILE,
         }:
-            name = Path(text).name
-        else:
-            name = text
-        self.setText(name)
+            return Path(self.key).name
+        return str(self.key)
 
-        if type in {ODictType.ZERO_DIR, ODictType.CONSTANT_DIR, ODictType.SYSTEM_DIR}:
-            self.setIcon(QIcon.fromTheme("folder"))
+    def icon(self) -> QIcon | None:
+        if self.type in {
+            ODictType.ZERO_DIR,
+            ODictType.CONSTANT_DIR,
+            ODictType.SYSTEM_DIR,
+        }:
+            if OrderedDictItem._folder_icon is None:
+                OrderedDictItem._folder_icon = QIcon.fromTheme("folder")
+            return OrderedDictItem._folder_icon
+        return None
 
-    # only for dictionary items, not subdirectories
-    def set_key(self, key: str):
-        self.dict_id = key
-        self.setData(key, OrderedDictItem.ROLE_KEY)
-        self.key = key
-        self.setText(key)
+    def children(self) -> list[ModelItem]:
+        """Returns the handles of the entries, creating them from the data tree."""
+        if self._children is None:
+            if self.model is None:
+                return []
+            self.load_children()
+        return self._children  # type: ignore
+
+    def load_children(self, chunk_size: int | None = None) -> bool:
+        """
+        Creates the handles of the entries from the data tree, or only the next
+        chunk_size of them. The handles created a chunk at a time are kept, and become
+        the children of the item once they are all created, unless the dictionary
+        changed in the meantime.
 
+        Parameters:
+        -----------
+            chunk_size (int | None): The number of handles to create, or None to
+                create all the handles left.
 
-class OrderedDictModel(QStandardItemModel):
+        Returns:
+        --------
+            bool: Whether every handle has been created.
+        """
+        if self._children is not None:
+            return True
+        foamdict = self.model._data.get_nested_value(self.key_path())
+        partial = self._partial
+        # the handles created so far are dropped if the dictionary was replaced
+        if (
+            partial is None
+            or partial[0] is not foamdict
+            or len(partial[1]) != len(foamdict)
+        ):
+            partial = self._partial = (foamdict, list(foamdict), [])
+        _, keys, handles = partial
+
+        start = len(handles)
+        end = len(keys) if chunk_size is None else start + chunk_size
+        handles.extend(create_item(key, foamdict[key], self) for key in keys[start:end])
+        if len(handles) < len(keys):
+            return False
+
+        # the handles created earlier must still match the entries of the dictionary
+        if list(foamdict) != keys or any(
+            isinstance(handle, OrderedDictItem)
+            != isinstance(foamdict[handle.key], CustomOrderedDict)
+            for handle in handles
+        ):
+            handles = [create_item(key, value, self) for key, value in foamdict.items()]
+        self.set_children(handles)
+        return True
+
+    def partial_children(self) -> list[ModelItem]:
+        """Returns the handles of the entries created so far."""
+        if self._children is not None:
+            return self._children
+        return self._partial[2] if self._partial else []
+
+    def set_children(self, children: list[ModelItem] | None):
+        self._children = children
+        self._partial = None
+        self._rows = {child.key: row for row, child in enumerate(children or ())}
+        self._valid_rows = len(self._rows)
+        self._digest = None
+
+    def insert_children(self, row: int, items: list[ModelItem]):
+        self.children()[row:row] = items
+        for offset, item in enumerate(items):
+            self._rows[item.key] = row + offset
+        self._valid_rows = min(self._valid_rows, row)
+
+    def remove_children(self, row: int, count: int = 1):
+        children = self.children()
+        for item in children[row : row + count]:
+            self._rows.pop(item.key, None)
+        del children[row : row + count]
+        self._valid_rows = min(self._valid_rows, row)
+
+    def rename_child(self, old_key: Any, new_key: Any):
+        if old_key in self._rows:
+            self._rows[new_key] = self._rows.pop(old_key)
+
+    def row_of(self, key: Any) -> int:
+        """Returns the row of the entry with the given key, or -1 if there is none."""
+        children = self.children()
+        row = self._rows.get(key, -1)
+        if row >= self._valid_rows or (row < 0 and self._valid_rows < len(children)):
+            for valid_row in range(self._valid_rows, len(children)):
+                self._rows[children[valid_row].key] = valid_row
+            self._valid_rows = len(children)
+            row = self._rows.get(key, -1)
+        return row
+
+    def child_by_key(self, key: Any) -> ModelItem | None:
+        row = self.row_of(key)
+        return self._children[row] if row >= 0 else None  # type: ignore
+
+    def is_loaded(self) -> bool:
+        """Returns whether the handles of the entries have been created."""
+        return self._children is not None
+
+    def invalidate_key_path(self):
+        super().invalidate_key_path()
+        for child in self.partial_children():
+            child.invalidate_key_path()
+
+    def child(self, row: int, column: int = 0) -> ModelItem | None:
+        children = self.children()
+        if column != 0 or not 0 <= row < len(children):
+            return None
+        return children[row]
+
+    def rowCount(self) -> int:
+        return len(self.children())
+
+    def hasChildren(self) -> bool:
+        # entries not created yet are assumed to exist, to avoid reading the data tree
+        if self._children is None:
+            return self.model is not None
+        return len(self._children) > 0
+
+
+def create_item(key: Any, value: Any, parent: OrderedDictItem) -> ModelItem:
+    """Returns a handle on an entry of the dictionary of the parent handle."""
+    if isinstance(value, CustomOrderedDict):
+        return OrderedDictItem(key, parent)
+    return DictionaryEntryItem(key, parent)
+
+
+def stable_rows(rows: list[int]) -> set[int]:
+    """
+    Returns the positions of a longest increasing subsequence of rows, i.e. the
+    largest set of entries that keep their relative order.
     """
-    Custom model that stores and displays data extracted from a CustomOrderedDict.
+    tails: list[int] = []
+    tail_positions: list[int] = []
+    previous = [-1] * len(rows)
+    for position, row in enumerate(rows):
+        length = bisect_left(tails, row)
+        if length == len(tails):
+            tails.append(row)
+            tail_positions.append(position)
+        else:
+            tails[length] = row
+            tail_positions[length] = position
+        previous[position] = tail_positions[length - 1] if length else -1
+
+    stable = set()
+    position = tail_positions[-1] if tail_positions else -1
+    while position >= 0:
+        stable.add(position)
+        position = previous[position]
+    return stable
+
 
-    This class extends QStandardItemModel to create a model that can hold and display
-    hierarchical data stored in a CustomOrderedDict. It provides methods to load and
-    update the model with data from the CustomOrderedDict.
+class OrderedDictModel(QAbstractItemModel):
+    """
+    Custom model that displays the data of a CustomOrderedDict.
+
+    This class extends QAbstractItemModel to present the hierarchical data stored in
+    the CustomOrderedDict of a database without copying it. The internal pointer of
+    every index is a lightweight handle holding the key of its entry, and values are
+    read from the data tree whenever they are displayed. Every edit made through the
+    model modifies the data tree and notifies the views of the rows changed.
 
     Attributes:
-        _data (CustomOrderedDict): The data to be stored and displayed in the model.
+        _data (CustomOrderedDict): The data to be displayed in the model.
 
     Methods:
-        load_model(data: CustomOrderedDict | str, parent_item: QStandardItem | None):
-            Recursively loads data from a CustomOrderedDict object into the model.
+        load_model(parent_item: OrderedDictItem | None):
+            Refreshes the rows below an item from the data tree.
         update_model():
-            Updates the model by loading the data from the CustomOrderedDict into the
-            invisible root item.
+            Refreshes every row shown from the data tree.
     """
 
     def __init__(self, db: Database, parent: QObject | None = None) -> None:
         super().__init__(parent)
         self.db = db
         self._data = self.db.get_dict()
+        self._root = OrderedDictItem("", item_type=ODictType.OTHER)
+        self._root.model = self
+
+    def index(
+        self, row: int, column: int, parent: QModelIndex = QModelIndex()
+    ) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.item_or_root(parent).child(row))
+
+    def parent(self, index: QModelIndex | None = None):  # type: ignore
+        # without an index, this is the parent of the model as a QObject
+        if index is None:
+            return super().parent()
+        if not index.isValid():
+            return QModelIndex()
+        parent_item = index.internalPointer()._parent
+        if parent_item is None or parent_item is self._root:
+            return QModelIndex()
+        return self.createIndex(parent_item.row(), 0, parent_item)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return self.item_or_root(parent).rowCount()
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if parent.column() > 0:
+            return False
+        return self.item_or_root(parent).hasChildren()
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        return index.internalPointer().data(role)
+
+    def setData(
+        self, index: QModelIndex, value: Any, role: int = Qt.ItemDataRole.EditRole
+    ) -> bool:
+        item = self.customItemFromIndex(index)
+        if not item or role != Qt.ItemDataRole.EditRole:
+            return False
+        if isinstance(item, DictionaryEntryItem):
+            self.update_data(ModelUpdateType.VALUE, index, value)
+        else:
+            self.update_data(ModelUpdateType.KEY, index, value)
+        return True
 
-    def flags(self, index):
-        default_flags = super().flags(index)
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
         item = self.itemFromIndex(index)
-        if item and item.isEditable():
-            return default_flags | Qt.ItemFlag.ItemIsEditable
-        return default_flags
+        if not item:
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if item.isEditable():
+            return flags | Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def invisibleRootItem(self) -> OrderedDictItem:
+        return self._root
+
+    def item_or_root(self, index: QModelIndex) -> OrderedDictItem:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def itemFromIndex(self, index: QModelIndex) -> ModelItem | None:
+        if not index.isValid() or index.model() is not self:
+            return None
+        return index.internalPointer()
+
+    def indexFromItem(self, item: ModelItem) -> QModelIndex:
+        return item.index()
 
-    def handle_selection_change(self, item: QStandardItem):
+    def handle_selection_change(self, item: ModelItem):
         self.current_selection = item
 
     def is_duplicate_key(self, key: str, odict: CustomOrderedDict):
@@ -159,93 +498,212 @@ class OrderedDictModel(QStandardItemModel):
             return True
         return False
 
-    def load_model(
-        self,
-        data: CustomOrderedDict,
-        parent_item: QStandardItem | OrderedDictItem | None,
-    ):
+    def load_model(self, parent_item: OrderedDictItem | None = None):
         """
-        Recursively loads data from a CustomOrderedDict object into the model.
-
-        This method traverses the CustomOrderedDict and creates QStandardItem instances
-        for each key-value pair. If a value is another CustomOrderedDict, the method
-        calls itself recursively to process the nested dictionary. If a value is a
-        string, it creates a QStandardItem with the string.
+        Refreshes the rows below an item from the data tree.
 
         Parameters:
         -----------
-            data (CustomOrderedDict | str): The data to be loaded into the model.
-            parent_item (QStandardItem | None): The parent item to which the data will be appended. If None, the method returns.
+            parent_item (OrderedDictItem | None): The item whose rows are refreshed,
+                or None for the invisible root item.
+        """
+        if parent_item is None or parent_item is self._root:
+            self.update_model()
+            return
+        if not parent_item.is_loaded():
+            # the rows have not been shown yet, so are read without notifying views
+            parent_item.load_children()
+            return
+        self.refresh_item(parent_item)
+
+    def update_model(self):
+        """
+        Refreshes every row shown from the data tree, e.g. after the database has
+        been updated. Only the rows that changed are reported to the views, so that
+        expanded rows and the selection are kept.
         """
-        if not parent_item:
+        if not self._root.is_loaded():
+            self._root.load_children()
             return
+        self.refresh_item(self._root)
 
-        # Clear all entries in parent_item
-        parent_item.removeRows(0, parent_item.rowCount())
+    def refresh_item(self, parent_item: OrderedDictItem):
+        """
+        Brings the loaded rows below an item in line with the data tree with as few
+        row insertions and removals as possible.
 
-        for key, value in data.items():
-            if isinstance(value, CustomOrderedDict):
-                # Create a new OrderedDictItem for nested dictionaries
-                item = OrderedDictItem(key)
-                self.load_model(value, item)
-                parent_item.appendRow(item)
-            else:
-                # Create a new DictionaryEntryItem for normal key-value pairs
-                if not value:
-                    item = DictionaryEntryItem(
-                        key, "-", is_editable=False, is_flag=True
-                    )
-                else:
-                    item = DictionaryEntryItem(key, str(value))
-                parent_item.appendRow(item)
+        Rows are matched by key. The rows whose key is gone or whose value changed
+        between an entry and a dictionary are removed, as are the fewest rows needed
+        for the remaining ones to be in the order of the data. The missing rows are
+        then inserted, and the rows kept are refreshed. Dictionaries whose digest is
+        unchanged since their last refresh are skipped.
 
-    def update_model(self):
+        Parameters:
+        -----------
+            parent_item (OrderedDictItem): The loaded item to refresh.
         """
-        Updates the model by loading the data from the CustomOrderedDict into the
-        invisible root item.
+        foamdict = self._data.get_nested_value(parent_item.key_path())
+        if not isinstance(foamdict, CustomOrderedDict):
+            return
+        digest = foamdict.digest()
+        children = parent_item.children()
+        if digest == parent_item._digest and len(children) == len(foamdict):
+            return
+
+        new_rows = {key: row for row, key in enumerate(foamdict)}
+        kept, kept_rows = [], []
+        for position, child in enumerate(children):
+            row = new_rows.get(child.key)
+            if row is not None and isinstance(child, OrderedDictItem) == isinstance(
+                foamdict[child.key], CustomOrderedDict
+            ):
+                kept.append(position)
+                kept_rows.append(row)
+        stable = {kept[position] for position in stable_rows(kept_rows)}
 
-        This method clears the existing data in the model and reloads it from the
-        CustomOrderedDict, ensuring that the model reflects the current state of the
-        data. As such, all listeners dependent on the model will be rerendered.
+        parent_index = parent_item.index()
+        # removes the rows not kept bottom up, one run of rows at a time
+        last = len(children) - 1
+        while last >= 0:
+            if last in stable:
+                last -= 1
+                continue
+            first = last
+            while first > 0 and first - 1 not in stable:
+                first -= 1
+            self.beginRemoveRows(parent_index, first, last)
+            parent_item.remove_children(first, last - first + 1)
+            self.endRemoveRows()
+            last = first - 1
+
+        # inserts the missing rows top down, one run of rows at a time. The rows kept
+        # are in the order of the data, so a run ends at the next row kept.
+        keys = list(new_rows)
+        row = 0
+        while row < len(keys):
+            if row < len(children) and children[row].key == keys[row]:
+                row += 1
+                continue
+            end = new_rows[children[row].key] if row < len(children) else len(keys)
+            self.beginInsertRows(parent_index, row, end - 1)
+            parent_item.insert_children(
+                row,
+                [create_item(key, foamdict[key], parent_item) for key in keys[row:end]],
+            )
+            self.endInsertRows()
+            row = end
+
+        # values are not copied in the model, so the entries kept are reported as
+        # changed, one run of rows at a time
+        first = None
+        for row, child in enumerate(children + [None]):
+            if isinstance(child, DictionaryEntryItem):
+                first = row if first is None else first
+                continue
+            if first is not None:
+                self.dataChanged.emit(
+                    self.createIndex(first, 0, children[first]),
+                    self.createIndex(row - 1, 0, children[row - 1]),
+                )
+                first = None
+            if isinstance(child, OrderedDictItem) and child.is_loaded():
+                self.refresh_item(child)
+        parent_item._digest = digest
+
+    def insert_item(self, parent_item: OrderedDictItem, key: Any) -> ModelItem:
         """
-        self.load_model(self._data, self.invisibleRootItem())
+        Adds the row of a key that has just been inserted in the dictionary of an item.
+        If the key replaced or moved an existing key, the rows of the item are
+        reloaded instead.
 
-    def get_key_path(self, index: QModelIndex) -> list[str]:
-        key_path = []
-        curr_index = index
-        while curr_index.isValid():
-            item = self.customItemFromIndex(curr_index)
-            if not item:
-                raise InvalidModelIndexError(curr_index)
-            key_path.insert(0, item.dict_id)
-            curr_index = curr_index.parent()
+        Parameters:
+        -----------
+            parent_item (OrderedDictItem): The item of the dictionary.
+            key (Any): The key inserted.
 
-        return key_path
+        Returns:
+        --------
+            ModelItem: The handle of the key.
+        """
+        foamdict = self._data.get_nested_value(parent_item.key_path())
+        row = foamdict.index_of(key)
+        if parent_item.is_loaded():
+            if parent_item.rowCount() == len(foamdict):
+                self.load_model(parent_item)
+            else:
+                self.beginInsertRows(parent_item.index(), row, row)
+                parent_item.insert_children(
+                    row, [create_item(key, foamdict[key], parent_item)]
+                )
+                self.endInsertRows()
+        return parent_item.children()[row]
+
+    def remove_item(self, item: ModelItem):
+        """Removes the row of a key that has been removed from the data tree."""
+        parent_item = item._parent
+        row = item.row()
+        self.beginRemoveRows(parent_item.index(), row, row)
+        parent_item.remove_children(row)
+        self.endRemoveRows()
+
+    def insert_loaded_entry(self, key_path: list[str]):
+        """
+        Appends a row for a directory or file that has just been loaded in the
+        background, below the row of its parent directory.
 
-    def index_from_key_path(self, key_path: Iterable[str]) -> QModelIndex:
-        # TODO: fix bug with this function
-        """Converts a key_path (list of ids) back to a QModelIndex."""
-        root_item = self.invisibleRootItem()  # Start from the root index
-        if not root_item:
-            raise ValueError(f"Root item not found.")
+        Parameters:
+        -----------
+            key_path (list[str]): The key path of the directory or file loaded.
+        """
+        if len(key_path) == 1:
+            parent_item = self._root
+        else:
+            parent_item = self.itemFromIndex(self.index_from_key_path(key_path[:-1]))
+        if not isinstance(parent_item, OrderedDictItem) or not parent_item.is_loaded():
+            # the rows are read from the data tree when they are first shown
+            return
 
-        curr_index = root_item.index()
+        parent_dict = self._data.get_nested_value(key_path[:-1])
+        if parent_item.rowCount() < len(parent_dict):
+            self.insert_item(parent_item, key_path[-1])
 
+    def get_key_path(self, index: QModelIndex) -> tuple:
+        """Returns the cached key path of the item at the index."""
+        if not index.isValid():
+            return ()
+        item = self.customItemFromIndex(index)
+        if not item:
+            raise InvalidModelIndexError(index)
+        return item.key_path()
+
+    def index_from_key_path(self, key_path: Iterable[str]) -> QModelIndex:
+        """
+        Converts a key_path (list of ids) back to a QModelIndex, looking up the row of
+        every key in the row map of its parent.
+        """
+        item = self._root
         for item_id in key_path:
-            item_found = False
-            # Traverse child indices
-            for row in range(self.rowCount(curr_index)):
-                child_index = self.index(row, 0, curr_index)
-                child_item = self.customItemFromIndex(child_index)
-                if child_item and child_item.dict_id == item_id:
-                    curr_index = child_index
-                    item_found = True
-                    break
-
-            if not item_found:
+            if not isinstance(item, OrderedDictItem):
+                return QModelIndex()
+            item = item.child_by_key(item_id)
+            if item is None:
                 return QModelIndex()  # Return an invalid index if not found
 
-        return curr_index
+        return item.index()
+
+    def loaded_item(self, key_path: Iterable[str]) -> ModelItem | None:
+        """
+        Returns the item at a key path if it has been created, without creating the
+        handles of any item along the path.
+        """
+        item = self._root
+        for key in key_path:
+            if not isinstance(item, OrderedDictItem) or not item.is_loaded():
+                return None
+            item = item.child_by_key(key)
+            if item is None:
+                return None
+        return item
 
     def customItemFromIndex(self, index):
         item = self.itemFromIndex(index)
@@ -284,27 +742,34 @@ class OrderedDictModel(QStandardItemModel):
         last_key = key_path[-1]
 
         item = self.customItemFromIndex(index)
-        if not item:
+        if not isinstance(item, OrderedDictItem):
             raise InvalidModelIndexError(index)
 
-        new_file_path = Path(item.key, file_name)
-        new_file_path_str = str(new_file_path)
-        new_file_item = OrderedDictItem(new_file_path_str)
-        new_file_item.setText(file_name)
+        new_file_path_str = str(Path(item.key, file_name))
 
-        # create file
+        # create file, which reads the directory again
         self.db.create_file(last_key, new_file_path_str, "dictionary", content)
 
+        # move the file to its row
+        subdir_dict = self._data.get_nested_value(key_path)
+        other_keys = [key for key in subdir_dict if key != new_file_path_str]
+        if target_row is not None and target_row < len(other_keys):
+            self._data.insert(
+                key_path,
+                new_file_path_str,
+                subdir_dict[new_file_path_str],
+                insert_key=other_keys[target_row],
+            )
+
         # modify model
-        row_count = item.rowCount()
-        self._data.insert(key_path, file_name, content)
-        if target_row is not None:
-            item.insertRow(target_row, new_file_item)
+        if item.is_loaded() and [child.key for child in item.children()] != other_keys:
+            # the directory read again is ordered differently
+            self.load_model(item)
+            new_file_item = item.children()[
+                self._data.get_nested_value(key_path).index_of(new_file_path_str)
+            ]
         else:
-            item.insertRow(row_count, new_file_item)
-
-        if content:
-            self.load_model(content, new_file_item)
+            new_file_item = self.insert_item(item, new_file_path_str)
 
         # notify observers of changes
         self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
@@ -370,40 +835,29 @@ class OrderedDictModel(QStandardItemModel):
         item = self.customItemFromIndex(index)
         if not item:
             raise InvalidModelIndexError(index)
-
-        parent_item = item.parent()
-        if not parent_item:
+        if not item.parent():
             raise InvalidModelIndexError(index)
 
-        # create model item
-        if isinstance(value, str):
-            new_item = DictionaryEntryItem(key, value)
-        elif isinstance(value, CustomOrderedDict):
-            new_item = OrderedDictItem(key)
-            self.load_model(value, new_item)
-
-        row = index.row()
-        parent_index = parent_item.index()
-        # modify model
+        # modify data, then model
         if create_type == ModelCreateType.BEFORE:
             self._data.insert(parent_key_path, key, value, insert_key=item.key)
-            parent_item.insertRow(row, new_item)
+            new_item = self.insert_item(item._parent, key)
         elif create_type == ModelCreateType.AFTER:
             self._data.insert(
                 parent_key_path, key, value, insert_key=item.key, after=True
             )
-            parent_item.insertRow(row + 1, new_item)
+            new_item = self.insert_item(item._parent, key)
         elif create_type == ModelCreateType.CHILD:
             self._data.insert(key_path, key, value)
-            item.insertRow(item.rowCount(), new_item)
+            new_item = self.insert_item(item, key)
 
         # update database
-        if Path(last_key).exists():
+        if self.db.get_item_type(last_key) == ODictType.FILE:
             self.db.update_file(key_path)
             index_changed = index
         else:
             self.db.update_file(parent_key_path)
-            index_changed = parent_item.index()
+            index_changed = index.parent()
 
         # notify observers of changes
         self.dataChanged.emit(
@@ -477,10 +931,12 @@ class OrderedDictModel(QStandardItemModel):
             raise DuplicateKeyError(new_key)
 
         old_key = item.key
-        if isinstance(item, (DictionaryEntryItem, OrderedDictItem)):
-            item.set_key(new_key)
         self._data.rename_key(key_path, old_key, new_key)
+        item.set_key(new_key)
         self.db.update_file(key_path)
+        self.dataChanged.emit(
+            index, index, [Qt.ItemDataRole.DisplayRole, ModelItem.ROLE_KEY]
+        )
 
         return old_key
 
@@ -505,9 +961,9 @@ class OrderedDictModel(QStandardItemModel):
 
         old_value = item.value
         key_path = self.get_key_path(index.parent())
-        item.set_value(new_value)
         self._data.update_nested_value(key_path, item.key, new_value)
         self.db.update_file(key_path)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
 
         return old_value
 
@@ -519,19 +975,17 @@ class OrderedDictModel(QStandardItemModel):
             )
 
         key_path = self.get_key_path(index)[:-1]
-        print(key_path)
-        print(target_item.key)
         self._data.update_nested_value(key_path, target_item.key, data)
         self.db.update_file(key_path)
-        self.load_model(data, target_item)
+        self.load_model(target_item)
 
-    def find_field(self, parent_item: QStandardItem, type: ODictType):
+    def find_field(self, parent_item: ModelItem, type: ODictType):
         """
         Searches for and returns an item with a specified ODictType among the children of the given parent item.
 
         Parameters:
         -----------
-        parent_item : QStandardItem
+        parent_item : ModelItem
             The parent item whose children will be searched.
         type : ODictType
             The type of ODictType to search for among the children of the parent item.
@@ -554,11 +1008,21 @@ class OrderedDictModel(QStandardItemModel):
         """
         Standardises a first-level dictionary item across all items within the current subdirectory.
 
+        The standardised fields are all computed before any of them is replaced, so
+        that nothing is modified if a field is missing, and every file is then
+        written once.
+
         Parameters:
         -----------
         template_item_index : QModelIndex
             The index of the template item to use for standardisation.
 
+        Returns:
+        --------
+        dict[tuple, CustomOrderedDict]
+            Snapshots of the fields modified before standardisation, by key path, to
+            be restored on undo.
+
         Raises:
         -------
         InvalidModelIndexError
@@ -566,11 +1030,70 @@ class OrderedDictModel(QStandardItemModel):
         ValueError
             If a child item is expected but not found, or if a target field required for standardisation is missing.
         """
+        standardised_fields = self.get_standardised_fields(template_item_index)
+
+        # store snapshots in cache, which later edits do not modify
+        cache = {
+            key_path: self._data.snapshot(key_path) for key_path in standardised_fields
+        }
+        self.replace_dicts(standardised_fields)
+        return cache
+
+    def preview_standardisation(
+        self, template_item_index: QModelIndex
+    ) -> dict[tuple, list[ChangeEvent]]:
+        """
+        Returns the changes standardising a field would make to each file, without
+        making them.
+
+        Parameters:
+        -----------
+        template_item_index : QModelIndex
+            The index of the template item to use for standardisation.
+
+        Returns:
+        --------
+        dict[tuple, list[ChangeEvent]]
+            The changes to each field modified, by key path.
+        """
+        return {
+            key_path: self._data.get_nested_value(key_path).diff(
+                standardised_field, list(key_path)
+            )
+            for key_path, standardised_field in self.get_standardised_fields(
+                template_item_index
+            ).items()
+        }
+
+    def get_standardised_fields(
+        self, template_item_index: QModelIndex
+    ) -> dict[tuple, CustomOrderedDict]:
+        """
+        Computes the standardised fields of every file in the subdirectory of a
+        template field, leaving out those already standardised.
+
+        Parameters:
+        -----------
+        template_item_index : QModelIndex
+            The index of the template item to use for standardisation.
+
+        Returns:
+        --------
+        dict[tuple, CustomOrderedDict]
+            The standardised fields, by key path.
+        """
         template_item = self.customItemFromIndex(template_item_index)
         if not template_item:
             raise InvalidModelIndexError(template_item_index)
         template_type = template_item.data(OrderedDictItem.ROLE_TYPE)
 
+        # the entries of the template are shared between the standardised fields, so
+        # they are taken from a snapshot which is copied before being modified
+        template_key_path = template_item.key_path()
+        template_dict = self._data.snapshot(template_key_path)
+        if not isinstance(template_dict, CustomOrderedDict):
+            raise ValueError("Dictionary expected, got str instead")
+
         file_index = template_item_index.parent()
         subdir_index = file_index.parent()
 
@@ -579,8 +1102,7 @@ class OrderedDictModel(QStandardItemModel):
         if not subdir_item:
             raise InvalidModelIndexError(subdir_index)
 
-        # dictionary to store file:content mapping to be cached for undo/redo
-        cache = dict()
+        standardised_fields = dict()
 
         # Iterate through all children of parent item
         for row in range(subdir_item.rowCount()):
@@ -588,24 +1110,94 @@ class OrderedDictModel(QStandardItemModel):
             if not child_item:
                 raise ValueError(f"Expected item at row {row}, but got None")
 
-            # Look for same item in child
-            target_field_index = self.find_field(child_item, template_type)
-
-            if target_field_index.isValid():
-                key_path_to_child = self.get_key_path(target_field_index)
-                key_path_tuple = tuple(key_path_to_child)
-
-                # store in cache
-                cache[key_path_tuple] = self._data.get_nested_value(
-                    self.get_key_path(target_field_index)
-                )
-                self.standardise_to_item(target_field_index, template_item_index)
+            # Look for same item in child. Files with a boundary field are looked up in
+            # the patch index, without loading the rows of the file.
+            if template_type == ODictType.BOUNDARY_FIELD:
+                target_key_path = ()
+                if self.db.patch_index.has_boundary_field(child_item.key):
+                    target_key_path = (*child_item.key_path(), "boundaryField")
             else:
+                target_key_path = self.get_key_path(
+                    self.find_field(child_item, template_type)
+                )
+            if not target_key_path:
                 raise ValueError(
                     f"Missing target field required to standardise in item '{child_item.text()}'"
                 )
 
-        return cache
+            if target_key_path == template_key_path:
+                continue
+            target_dict = self._data.get_nested_value(target_key_path)
+            if not isinstance(target_dict, CustomOrderedDict):
+                continue
+            standardised_field = template_dict.map_keys_to_target_dict(target_dict)
+            if standardised_field.digest() != target_dict.digest():
+                standardised_fields[target_key_path] = standardised_field
+
+        return standardised_fields
+
+    def replace_dicts(self, dicts: dict[tuple, CustomOrderedDict]):
+        """
+        Replaces several dictionaries at once, e.g. a field in every file of a
+        directory. All the dictionaries are replaced before the files containing them
+        are written, each once, and the rows are then refreshed in a single pass.
+
+        Parameters:
+        -----------
+        dicts (dict[tuple, CustomOrderedDict]): The new dictionaries, by key path.
+        """
+        if not dicts:
+            return
+        for key_path, data in dicts.items():
+            self._data.update_nested_value(key_path[:-1], key_path[-1], data)
+        for parent_key_path in dict.fromkeys(key_path[:-1] for key_path in dicts):
+            self.db.update_file(parent_key_path)
+
+        # refreshes the rows below the deepest item containing every dictionary
+        common_key_path = list(next(iter(dicts))[:-1])
+        for key_path in dicts:
+            while tuple(key_path[: len(common_key_path)]) != tuple(common_key_path):
+                common_key_path.pop()
+        common_item = self.itemFromIndex(self.index_from_key_path(common_key_path))
+        if common_item is None:
+            self.update_model()
+        elif isinstance(common_item, OrderedDictItem):
+            self.load_model(common_item)
+
+    def rename_patch(
+        self, old_name: str, new_name: str, path_strs: list[str] | None = None
+    ) -> list[str]:
+        """
+        Renames a patch in the fields of the 0 directory and in the mesh, each file
+        being written once, and renames the rows of the patch already created.
+
+        Parameters:
+        -----------
+        old_name : str
+            The name of the patch.
+        new_name : str
+            The new name of the patch.
+        path_strs : list[str] | None
+            The files to rename the patch in, which are all the files defining it if
+            None.
+
+        Returns:
+        --------
+        list[str]
+            The paths of the files modified.
+        """
+        path_strs = self.db.rename_patch(old_name, new_name, path_strs)
+        for path_str in path_strs:
+            boundary_key_path = [*self.db.file_key_paths[path_str], path_str]
+            item = self.loaded_item(boundary_key_path + ["boundaryField", old_name])
+            if item is None:
+                continue
+            item.set_key(new_name)
+            index = item.index()
+            self.dataChanged.emit(
+                index, index, [Qt.ItemDataRole.DisplayRole, ModelItem.ROLE_KEY]
+            )
+        return path_strs
 
     def standardise_to_item(
         self,
@@ -651,11 +1243,11 @@ class OrderedDictModel(QStandardItemModel):
 
         if isinstance(target_dict, CustomOrderedDict):
             revised_dict = template_dict.map_keys_to_target_dict(target_dict)
-            self.load_model(revised_dict, target_item)
             self._data.update_nested_value(
                 target_key_path[:-1], target_key_path[-1], revised_dict
             )
             self.db.update_file(target_key_path[:-1])
+            self.load_model(target_item)
         else:
             self.delete_data(ModelDeleteType.KEY_VALUE, target_index)
 
@@ -690,14 +1282,12 @@ class OrderedDictModel(QStandardItemModel):
             if isinstance(item, DictionaryEntryItem):
                 value = item.value
             elif isinstance(item, OrderedDictItem):
-                value = self._data.get_nested_value(self.get_key_path(index))
-            row = item.row()
-            parent_index = index.parent()
-            key_path = self.get_key_path(parent_index)
+                value = self._data.snapshot(self.get_key_path(index))
+            key_path = self.get_key_path(index.parent())
 
             self._data.remove(key_path, item.key)
             self.db.update_file(key_path)
-            self.removeRow(row, parent_index)
+            self.remove_item(item)
 
             return key, value
 
@@ -708,25 +1298,25 @@ class OrderedDictModel(QStandardItemModel):
 
             if not isinstance(deleted_data, CustomOrderedDict):
                 raise ValueError("Expected CustomOrderedDict, got str instead.")
-            to_return_data = deleted_data.copy()
+            # the dictionary is copied by remove_all instead of being cleared in place
+            to_return_data = self._data.snapshot(key_path)
 
             self._data.remove_all(key_path)
             self.db.update_file(key_path)
-            item.removeRows(0, item.rowCount())
+            self.load_model(item)
 
             return dict_name, to_return_data
 
-        def delete_file(item: QStandardItem):
+        def delete_file(item: ModelItem):
             key_path = self.get_key_path(index)
             file_path = key_path[-1]
-            row = item.row()
-            parent_index = index.parent()
 
             foam_file = self.db.get_foamfile(key_path)
             foam_content = foam_file.read()
 
             self.db.delete_file(file_path)
-            self.removeRow(row, parent_index)
+            self._data.remove(key_path[:-1], file_path)
+            self.remove_item(item)
 
             return foam_file, foam_content
 
@@ -772,6 +1362,7 @@ class ComboBoxModel(QStandardItemModel):
         for obj in data.items():
             key, value = obj[0], obj[1]
             item = QStandardItem(key)
+            item.setEditable(False)
             if parent_item:
                 item.setData(ComboBoxModel.TYPE_CHILD, ComboBoxModel.ROLE_ITEM_TYPE)
                 item.setData(parent_item.text(), ComboBoxModel.ROLE_BOUNDARY_CATEGORY)
@@ -0,0 +1,352 @@
+import re
+
+from model.custom_ordered_dict import CustomOrderedDict
+from util.constants import TYPE
+
+# a patch of a polyBoundaryMesh file, with the entries of its dictionary
+MESH_PATCH_PATTERN = re.compile(r"([^\s{}()]+)\s*\{([^{}]*)\}")
+MESH_PATCH_TYPE_PATTERN = re.compile(r"\btype\s+([^\s;]+)\s*;")
+MESH_PATCH_GROUPS_PATTERN = re.compile(r"\binGroups\s+(?:\d+\s*)?\(([^()]*)\)")
+# characters making a quoted key a regular expression rather than a patch name
+REGEX_CHARACTERS = frozenset(".*+?|()[]{}^$\\")
+BACKREFERENCE_PATTERN = re.compile(r"\\\d|\(\?P[=<]")
+# inline flags, which only apply to the whole expression at its start
+GLOBAL_FLAGS_PATTERN = re.compile(r"\(\?([aiLmsux]+)\)")
+
+
+def patch_key_pattern(key: str) -> str | None:
+    """
+    Returns the regular expression of a key of a boundaryField, such as
+    `"(inlet|outlet).*"`, or None if the key names a patch or a patch group.
+    """
+    if len(key) < 2 or key[0] != '"' or key[-1] != '"':
+        return None
+    pattern = key[1:-1]
+    return pattern if REGEX_CHARACTERS.intersection(pattern) else None
+
+
+def scope_flags(pattern: str) -> str:
+    """
+    Returns a regular expression with its leading inline flags, such as `(?i)`, turned
+    into a group they are scoped to, so that it can be combined with others.
+    """
+    flags = ""
+    while match := GLOBAL_FLAGS_PATTERN.match(pattern):
+        flags += match.group(1)
+        pattern = pattern[match.end() :]
+    return f"(?{flags}:{pattern})" if flags else pattern
+
+
+def patch_key_name(key: str) -> str:
+    """Returns the patch or group named by a key, which may be quoted."""
+    if len(key) >= 2 and key[0] == '"' and key[-1] == '"':
+        return key[1:-1]
+    return key
+
+
+def field_patches(foamdict: CustomOrderedDict) -> dict[str, str] | None:
+    """
+    Returns the patches of the boundaryField of a file with their type, which is empty
+    if a patch has none, or None if the file has no boundaryField.
+    """
+    boundary_field = foamdict.get("boundaryField")
+    if not isinstance(boundary_field, CustomOrderedDict):
+        return None
+    patches = dict()
+    for patch, patch_dict in boundary_field.items():
+        patch_type = ""
+        if isinstance(patch_dict, CustomOrderedDict):
+            patch_type = str(patch_dict.get(TYPE) or "")
+        patches[str(patch)] = patch_type
+    return patches
+
+
+def mesh_patches_start(text: str) -> int:
+    """Returns the position of the list of patches in a polyBoundaryMesh file."""
+    # the patches follow the header, in the first list of the file
+    header_end = text.find("}", text.find("FoamFile"))
+    return text.find("(", header_end) + 1
+
+
+def read_mesh_patches(path_str: str) -> tuple[dict[str, str], dict[str, list[str]]]:
+    """
+    Returns the patches of a polyBoundaryMesh file, e.g. constant/polyMesh/boundary,
+    with their type, and the groups of the patches in groups. The list of patches of
+    these files is read directly from their text, as the parser only reads
+    dictionaries.
+    """
+    with open(path_str) as file:
+        text = file.read()
+    body = text[mesh_patches_start(text) :]
+    patches = dict()
+    groups = dict()
+    for match in MESH_PATCH_PATTERN.finditer(body):
+        patch, entries = match.groups()
+        type_match = MESH_PATCH_TYPE_PATTERN.search(entries)
+        patches[patch] = type_match.group(1) if type_match else ""
+        groups_match = MESH_PATCH_GROUPS_PATTERN.search(entries)
+        if groups_match:
+            groups[patch] = groups_match.group(1).split()
+    return patches, groups
+
+
+def rename_mesh_patch(text: str, old_name: str, new_name: str) -> str:
+    """
+    Returns the text of a polyBoundaryMesh file with a patch renamed, along with the
+    references to it of the cyclic patches.
+    """
+    start = mesh_patches_start(text)
+    old = re.escape(old_name)
+    body = re.sub(
+        rf"(?<![^\s(]){old}(?=\s*\{{)", lambda match: new_name, text[start:]
+    )
+    body = re.sub(
+        rf"(\bneighbourPatch\s+){old}(?=\s*;)",
+        lambda match: match.group(1) + new_name,
+        body,
+    )
+    return text[:start] + body
+
+
+class PatchMatcher:
+    """
+    The regular expression keys of a boundaryField compiled into a single pattern,
+    matching a patch name against every key at once.
+
+    The keys are tried from the last defined to the first, as the last regular
+    expression key matching a patch applies to it, and must match the whole name.
+    Leading inline flags, such as `(?i)`, are scoped to their key. Keys which are not
+    valid regular expressions, or which have backreferences or named groups, never
+    match. The key matched by each patch is cached, as fields with the same keys
+    share a matcher.
+
+    Attributes:
+        keys (list[str]): The keys of the alternatives of the pattern, in order.
+        pattern (re.Pattern | None): The combined pattern, or None if no key is a
+            valid regular expression or the keys cannot be combined.
+        patterns (list[re.Pattern]): The pattern of each key, in the order of the
+            keys, if the keys cannot be combined.
+        results (dict[str, str | None]): The key matched by each patch matched.
+    """
+
+    def __init__(self, keys: list[str]) -> None:
+        self.keys = []
+        alternatives = []
+        for key in reversed(keys):
+            pattern = scope_flags(patch_key_pattern(key) or "")
+            # the groups of such keys would clash with those of the other keys
+            if BACKREFERENCE_PATTERN.search(pattern):
+                continue
+            try:
+                re.compile(pattern)
+            except re.error:
+                continue
+            # the name of the group of a key, from which the key matched is known
+            alternatives.append(f"(?P<k{len(self.keys)}>{pattern})")
+            self.keys.append(key)
+        self.pattern = None
+        # the patterns of the keys, tried in turn if they cannot be combined
+        self.patterns: list[re.Pattern] = []
+        if alternatives:
+            try:
+                self.pattern = re.compile("|".join(alternatives))
+            except re.error:
+                self.patterns = [re.compile(pattern) for pattern in alternatives]
+        self.results: dict[str, str | None] = dict()
+
+    def match(self, patch: str) -> str | None:
+        """Returns the key applying to a patch, or None if none matches it."""
+        if patch in self.results:
+            return self.results[patch]
+        key = None
+        if self.pattern is not None:
+            match = self.pattern.fullmatch(patch)
+            # the group of the key closes last, so it is the last group matched
+            if match is not None:
+                key = self.keys[int(match.lastgroup[1:])]  # type: ignore
+        else:
+            for index, pattern in enumerate(self.patterns):
+                if pattern.fullmatch(patch):
+                    key = self.keys[index]
+                    break
+        self.results[patch] = key
+        return key
+
+
+class PatchIndex:
+    """
+    An index of the patches defined by the files of a case: the patches of the
+    boundaryField of every field file, and those of the polyBoundaryMesh files.
+
+    The entry of a boundaryField applying to each patch of the mesh is resolved with
+    the precedence of OpenFOAM: the entry named after the patch, then the last entry
+    named after a group of the patch, then the last regular expression key matching
+    the whole patch name. The resolutions are cached until the field or the mesh
+    changes, and the regular expression keys shared by several fields are compiled
+    once.
+
+    Attributes:
+        patch_files (dict[str, set[str]]): Maps keys of the boundaryFields, and
+            patches of the mesh, to the paths of the files defining them.
+        file_patches (dict[str, dict[str, str]]): Maps the paths of the files with a
+            boundaryField, or of the mesh files, to the type of each of their keys.
+        mesh_files (set[str]): The paths of the polyBoundaryMesh files.
+        patch_groups (dict[str, list[str]]): Maps the patches of the mesh in groups
+            to their groups.
+    """
+
+    def __init__(self) -> None:
+        self.patch_files: dict[str, set[str]] = dict()
+        self.file_patches: dict[str, dict[str, str]] = dict()
+        self.mesh_files: set[str] = set()
+        self.patch_groups: dict[str, list[str]] = dict()
+        # the key applying to each patch of the mesh, by field
+        self.resolved: dict[str, dict[str, str | None]] = dict()
+        self.patch_list: list[str] | None = None
+        # matchers by regular expression keys, shared by the fields with the same keys
+        self.matchers: dict[tuple[str, ...], PatchMatcher] = dict()
+
+    def add_file(
+        self,
+        path_str: str,
+        patches: dict[str, str] | None,
+        mesh: bool = False,
+        groups: dict[str, list[str]] | None = None,
+    ):
+        """
+        Indexes the patches of a file, replacing its previous patches.
+
+        Parameters:
+        -----------
+            path_str (str): The path to the file.
+            patches (dict[str, str] | None): The type of each patch of the file, or
+                None if it defines no patch.
+            mesh (bool): Whether the file is a polyBoundaryMesh file.
+            groups (dict[str, list[str]] | None): The groups of the patches of a mesh
+                file in groups.
+        """
+        self.remove_file(path_str)
+        if patches is None:
+            return
+        self.file_patches[path_str] = patches
+        for patch in patches:
+            self.patch_files.setdefault(patch, set()).add(path_str)
+        if mesh:
+            self.mesh_files.add(path_str)
+            self.patch_groups.update(groups or {})
+        self.invalidate(path_str, mesh)
+
+    def remove_file(self, path_str: str):
+        patches = self.file_patches.pop(path_str, None)
+        if patches is None:
+            return
+        for patch in patches:
+            files = self.patch_files[patch]
+            files.discard(path_str)
+            if not files:
+                del self.patch_files[patch]
+        mesh = path_str in self.mesh_files
+        if mesh:
+            self.mesh_files.discard(path_str)
+            for patch in patches:
+                self.patch_groups.pop(patch, None)
+        self.invalidate(path_str, mesh)
+
+    def invalidate(self, path_str: str, mesh: bool):
+        """Drops the resolutions affected by a change to the patches of a file."""
+        # without a mesh, the patches are those named by every field
+        if mesh or not self.mesh_files:
+            self.resolved.clear()
+            self.patch_list = None
+        else:
+            self.resolved.pop(path_str, None)
+
+    def has_boundary_field(self, path_str: str) -> bool:
+        return path_str in self.file_patches and path_str not in self.mesh_files
+
+    def files_defining(self, patch: str) -> set[str]:
+        return self.patch_files.get(patch, set())
+
+    def patch_type(self, path_str: str, patch: str) -> str | None:
+        """
+        Returns the type of the entry applying to a patch in a file, or None if no
+        entry of the file applies to it.
+        """
+        patches = self.file_patches.get(path_str)
+        if patches is None:
+            return None
+        key = patch if patch in patches else self.resolve(path_str).get(patch)
+        return None if key is None else patches[key]
+
+    def mesh_patches(self) -> list[str]:
+        """
+        Returns the patches of the mesh, or those named by the fields if the case has
+        no polyBoundaryMesh file.
+        """
+        if self.patch_list is None:
+            files = self.mesh_files or self.file_patches
+            keys = (key for path_str in files for key in self.file_patches[path_str])
+            self.patch_list = list(
+                dict.fromkeys(
+                    patch_key_name(key)
+                    for key in keys
+                    if patch_key_pattern(key) is None
+                )
+            )
+        return self.patch_list
+
+    def resolve(self, path_str: str) -> dict[str, str | None]:
+        """
+        Returns the key of the entry of the boundaryField of a field applying to each
+        patch of the mesh, which is None if no entry applies to a patch.
+
+        Parameters:
+        -----------
+            path_str (str): The path to the field.
+
+        Returns:
+        --------
+            dict[str, str | None]: The key applying to each patch, by patch.
+        """
+        resolution = self.resolved.get(path_str)
+        if resolution is not None:
+            return resolution
+
+        # the position of the entries named after a patch or group, by name
+        named = dict()
+        regex_keys = []
+        for position, key in enumerate(self.file_patches.get(path_str, ())):
+            if patch_key_pattern(key) is None:
+                named[patch_key_name(key)] = (position, key)
+            else:
+                regex_keys.append(key)
+        matcher = self.matchers.get(tuple(regex_keys))
+        if matcher is None:
+            matcher = self.matchers[tuple(regex_keys)] = PatchMatcher(regex_keys)
+
+        resolution = dict()
+        for patch in self.mesh_patches():
+            entry = named.get(patch)
+            if entry is None:
+                group_entries = [
+                    named[group]
+                    for group in self.patch_groups.get(patch, ())
+                    if group in named
+                ]
+                entry = max(group_entries, default=None)
+            resolution[patch] = entry[1] if entry else matcher.match(patch)
+        self.resolved[path_str] = resolution
+        return resolution
+
+    def missing_patches(self) -> dict[str, set[str]]:
+        """Returns the patches of the mesh missing from each field file lacking any."""
+        missing = dict()
+        for path_str in self.file_patches:
+            if path_str in self.mesh_files:
+                continue
+            file_missing = {
+                patch for patch, key in self.resolve(path_str).items() if key is None
+            }
+            if file_missing:
+                missing[path_str] = file_missing
+        return missing
@@ -0,0 +1,156 @@
+import re
+
+from model.custom_ordered_dict import CustomOrderedDict
+
+
+def index_tree(tree: CustomOrderedDict) -> dict[str, list[tuple]]:
+    """
+    Returns the key paths of the entries of a file tree by the text of their key and
+    of their value. Key paths are relative to the tree, and flags, which have no
+    value, are only indexed by their key.
+    """
+    postings: dict[str, list[tuple]] = {}
+    stack: list[tuple[tuple, CustomOrderedDict]] = [((), tree)]
+    while stack:
+        parent_path, foamdict = stack.pop()
+        for key, value in foamdict.items():
+            entry_path = parent_path + (key,)
+            key_text = str(key)
+            postings.setdefault(key_text, []).append(entry_path)
+            if isinstance(value, CustomOrderedDict):
+                stack.append((entry_path, value))
+            elif value:
+                value_text = str(value)
+                if value_text != key_text:
+                    postings.setdefault(value_text, []).append(entry_path)
+    return postings
+
+
+class SearchMatch:
+    """
+    An entry of the database dictionary found by a search.
+
+    Attributes:
+        key_path (tuple): The key path of the entry in the database dictionary.
+        text (str): The text of the key or value of the entry that matched.
+        path_str (str): The path to the file containing the entry.
+    """
+
+    def __init__(self, key_path: tuple, text: str, path_str: str) -> None:
+        self.key_path = key_path
+        self.text = text
+        self.path_str = path_str
+
+    def nested_keys(self) -> tuple:
+        """Returns the key path of the entry within its file."""
+        return self.key_path[self.key_path.index(self.path_str) + 1 :]
+
+    def __repr__(self) -> str:
+        return f"SearchMatch({self.key_path!r}, {self.text!r})"
+
+
+class SearchIndex:
+    """
+    An inverted index of the text of the keys and values of the files of a case.
+
+    The index maps every distinct text, or term, to the entries holding it in each
+    file. Queries are matched against the distinct terms only, which are far fewer
+    than the entries of a case, and the entries of the terms matched are then listed.
+    Files are indexed separately, so that a file can be indexed again on its own once
+    it is edited.
+
+    Attributes:
+        postings (dict[str, dict[str, list[tuple]]]): Maps terms to the key paths of
+            the entries holding them, relative to their file, by file path.
+        file_terms (dict[str, list[str]]): Maps file paths to the terms of the file.
+    """
+
+    def __init__(self) -> None:
+        self.postings: dict[str, dict[str, list[tuple]]] = dict()
+        self.file_terms: dict[str, list[str]] = dict()
+        # terms in lower case, for searches ignoring case
+        self.folded_terms: dict[str, str] = dict()
+
+    def add_file(self, path_str: str, file_postings: dict[str, list[tuple]]):
+        """
+        Indexes a file, replacing its previous entries.
+
+        Parameters:
+        -----------
+            path_str (str): The path to the file.
+            file_postings (dict[str, list[tuple]]): The key paths of the entries of
+                the file by term, as returned by `index_tree`.
+        """
+        self.remove_file(path_str)
+        for term, key_paths in file_postings.items():
+            files = self.postings.get(term)
+            if files is None:
+                files = self.postings[term] = dict()
+                self.folded_terms[term] = term.casefold()
+            files[path_str] = key_paths
+        self.file_terms[path_str] = list(file_postings)
+
+    def remove_file(self, path_str: str):
+        for term in self.file_terms.pop(path_str, ()):
+            files = self.postings[term]
+            del files[path_str]
+            if not files:
+                del self.postings[term]
+                del self.folded_terms[term]
+
+    def match_terms(
+        self, query: str, regex: bool = False, case_sensitive: bool = False
+    ) -> list[str]:
+        """
+        Returns the terms matching a query, those equal to the query first, then the
+        shortest.
+
+        Raises:
+        -------
+            re.error: If the query is not a valid regular expression.
+        """
+        if regex:
+            pattern = re.compile(query, 0 if case_sensitive else re.IGNORECASE)
+            terms = [term for term in self.postings if pattern.search(term)]
+        elif case_sensitive:
+            terms = [term for term in self.postings if query in term]
+        else:
+            folded_query = query.casefold()
+            terms = [
+                term
+                for term, folded_term in self.folded_terms.items()
+                if folded_query in folded_term
+            ]
+        terms.sort(key=lambda term: (term != query, len(term)))
+        return terms
+
+    def search(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        limit: int | None = None,
+    ) -> list[tuple[str, tuple, str]]:
+        """
+        Finds the entries whose key or value contains a query.
+
+        Parameters:
+        -----------
+            query (str): The text to find, or a regular expression.
+            regex (bool): Whether the query is a regular expression.
+            case_sensitive (bool): Whether the case of the query must match.
+            limit (int | None): The maximum number of entries returned.
+
+        Returns:
+        --------
+            list[tuple[str, tuple, str]]: The path of the file, the key path of the
+                entry relative to the file and the term matched of every entry found.
+        """
+        results: list[tuple[str, tuple, str]] = []
+        for term in self.match_terms(query, regex, case_sensitive):
+            for path_str, key_paths in self.postings[term].items():
+                for key_path in key_paths:
+                    if limit is not None and len(results) >= limit:
+                        return results
+                    results.append((path_str, key_path, term))
+        return results
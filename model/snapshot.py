@@ -0,0 +1,309 @@
+import os
+import struct
+from typing import Any
+
+from model.core.dimensioned_scalar import DimensionedScalar
+from model.core.list import List as FoamList
+from model.core.values import List, Scalar, Tensor, Value
+from model.custom_ordered_dict import CustomOrderedDict
+
+# Value tags of the binary encoding
+TAG_NONE = 0
+TAG_STR = 1
+TAG_INT = 2
+TAG_BIGINT = 3
+TAG_FLOAT = 4
+TAG_BOOL = 5
+TAG_ODICT = 6
+TAG_DICT = 7
+TAG_LIST = 8
+TAG_FOAM_LIST = 9
+TAG_SCALAR = 10
+TAG_TENSOR = 11
+TAG_VALUE = 12
+TAG_VALUE_LIST = 13
+TAG_DIMENSIONED_SCALAR = 14
+
+_U8 = struct.Struct("<B")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_FILE_RECORD = struct.Struct("<IqqQQ")
+
+
+class SnapshotEncoder:
+    """
+    Encodes parsed file trees into a compact tagged binary form.
+
+    Strings are interned into a shared string table and referenced by index, so keys
+    and values repeated across files, such as `type` or `zeroGradient`, are stored
+    once.
+    """
+
+    def __init__(self) -> None:
+        self.strings: dict[str, int] = {}
+        self.body = bytearray()
+
+    def intern(self, string: str) -> int:
+        index = self.strings.get(string)
+        if index is None:
+            index = self.strings[string] = len(self.strings)
+        return index
+
+    def write_str(self, string: str):
+        self.body += _U32.pack(self.intern(string))
+
+    def write_value(self, value: Any):
+        body = self.body
+        if value is None:
+            body += _U8.pack(TAG_NONE)
+        elif isinstance(value, str):
+            body += _U8.pack(TAG_STR)
+            self.write_str(value)
+        elif isinstance(value, bool):
+            body += _U8.pack(TAG_BOOL) + _U8.pack(value)
+        elif isinstance(value, int):
+            if -(2**63) <= value < 2**63:
+                body += _U8.pack(TAG_INT) + _I64.pack(value)
+            else:
+                body += _U8.pack(TAG_BIGINT)
+                self.write_str(str(value))
+        elif isinstance(value, float):
+            body += _U8.pack(TAG_FLOAT) + _F64.pack(value)
+        elif isinstance(value, dict):
+            tag = TAG_ODICT if isinstance(value, CustomOrderedDict) else TAG_DICT
+            body += _U8.pack(tag) + _U32.pack(len(value))
+            for k, v in value.items():
+                self.write_value(k)
+                self.write_value(v)
+        elif isinstance(value, FoamList):
+            body += _U8.pack(TAG_FOAM_LIST)
+            self.write_sequence(value)
+        elif isinstance(value, (list, tuple)):
+            body += _U8.pack(TAG_LIST)
+            self.write_sequence(value)
+        elif isinstance(value, Scalar):
+            body += _U8.pack(TAG_SCALAR)
+            self.write_value(value.value)
+        elif isinstance(value, Tensor):
+            body += _U8.pack(TAG_TENSOR)
+            self.write_sequence(value.components)
+        elif isinstance(value, Value):
+            body += _U8.pack(TAG_VALUE) + _U8.pack(value.uniform)
+            self.write_value(value.value)
+        elif isinstance(value, List):
+            body += _U8.pack(TAG_VALUE_LIST)
+            self.write_sequence(value.lst)
+            self.write_value(value.len)
+            self.write_value(value.el)
+        elif isinstance(value, DimensionedScalar):
+            body += _U8.pack(TAG_DIMENSIONED_SCALAR)
+            self.write_sequence(value.values)
+        else:
+            raise ValueError(f"Cannot encode value of type {type(value).__name__}.")
+
+    def write_sequence(self, values):
+        self.body += _U32.pack(len(values))
+        for value in values:
+            self.write_value(value)
+
+    def string_table(self) -> bytes:
+        table = bytearray(_U32.pack(len(self.strings)))
+        for string in self.strings:
+            encoded = string.encode("utf-8", errors="surrogatepass")
+            table += _U32.pack(len(encoded)) + encoded
+        return bytes(table)
+
+
+class SnapshotDecoder:
+    """Decodes values written by SnapshotEncoder from a buffer."""
+
+    def __init__(self, buffer: memoryview, strings: list[str]) -> None:
+        self.buffer = buffer
+        self.strings = strings
+        self.pos = 0
+
+    def read(self, fmt: struct.Struct):
+        value = fmt.unpack_from(self.buffer, self.pos)[0]
+        self.pos += fmt.size
+        return value
+
+    def read_str(self) -> str:
+        return self.strings[self.read(_U32)]
+
+    def read_sequence(self) -> list:
+        return [self.read_value() for _ in range(self.read(_U32))]
+
+    def read_value(self) -> Any:
+        tag = self.read(_U8)
+        if tag == TAG_NONE:
+            return None
+        elif tag == TAG_STR:
+            return self.read_str()
+        elif tag == TAG_BOOL:
+            return bool(self.read(_U8))
+        elif tag == TAG_INT:
+            return self.read(_I64)
+        elif tag == TAG_BIGINT:
+            return int(self.read_str())
+        elif tag == TAG_FLOAT:
+            return self.read(_F64)
+        elif tag == TAG_ODICT or tag == TAG_DICT:
+            count = self.read(_U32)
+            items = [(self.read_value(), self.read_value()) for _ in range(count)]
+            return CustomOrderedDict(items) if tag == TAG_ODICT else dict(items)
+        elif tag == TAG_FOAM_LIST:
+            return FoamList(self.read_sequence())
+        elif tag == TAG_LIST:
+            return self.read_sequence()
+        elif tag == TAG_SCALAR:
+            return Scalar(self.read_value())
+        elif tag == TAG_TENSOR:
+            return Tensor(self.read_sequence())
+        elif tag == TAG_VALUE:
+            uniform = bool(self.read(_U8))
+            return Value(uniform, self.read_value())
+        elif tag == TAG_VALUE_LIST:
+            lst = self.read_sequence()
+            return List(lst, self.read_value(), self.read_value())
+        elif tag == TAG_DIMENSIONED_SCALAR:
+            return DimensionedScalar(self.read_sequence())
+        raise ValueError(f"Unknown tag {tag} in snapshot.")
+
+
+class WorkspaceSnapshot:
+    """
+    A compact binary snapshot of every parsed file of a case.
+
+    For each file, the snapshot stores its modification time and size, together with
+    its FoamFile header, start comment and parsed tree. The whole snapshot is read
+    with a single file read, and each file is only decoded when requested, after its
+    recorded modification time and size have been checked against the file system.
+
+    Layout (little endian):
+        magic, string table, file count, then one record per file of
+        (path string index, mtime_ns, size, body offset, body length), then the body.
+    """
+
+    MAGIC = b"FGSNAP02"
+
+    def __init__(self) -> None:
+        # maps file paths to (mtime_ns, size, body offset, body length)
+        self.records: dict[str, tuple[int, int, int, int]] = {}
+        self.strings: list[str] = []
+        self.body = memoryview(b"")
+
+    @staticmethod
+    def write(path: str, files: list[tuple[str, int, int, Any, list, Any]]):
+        """
+        Writes a snapshot of the given files atomically.
+
+        Parameters:
+        -----------
+            path (str): The path of the snapshot file.
+            files (list): Tuples of (file path, mtime_ns, size, header, start comment,
+                parsed tree) for every file to store.
+
+        Raises:
+        -------
+            ValueError: If a file tree contains a value that cannot be encoded, or
+                exceeds the sizes of the encoding.
+        """
+        encoder = SnapshotEncoder()
+        try:
+            records = bytearray(_U32.pack(len(files)))
+            for file_path, mtime_ns, size, header, start_comment, content in files:
+                offset = len(encoder.body)
+                encoder.write_value(header)
+                encoder.write_value(start_comment)
+                encoder.write_value(content)
+                records += _FILE_RECORD.pack(
+                    encoder.intern(file_path),
+                    mtime_ns,
+                    size,
+                    offset,
+                    len(encoder.body) - offset,
+                )
+            string_table = encoder.string_table()
+        except struct.error as e:
+            raise ValueError(f"Workspace snapshot too large to encode: {e}")
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(WorkspaceSnapshot.MAGIC)
+            file.write(string_table)
+            file.write(records)
+            file.write(encoder.body)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def read(cls, path: str) -> "WorkspaceSnapshot":
+        """
+        Reads a snapshot with a single read of the snapshot file.
+
+        Raises:
+        -------
+            ValueError: If the file is not a snapshot or is corrupted.
+            OSError: If the file cannot be read.
+        """
+        with open(path, "rb") as file:
+            data = memoryview(file.read())
+        if data[: len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError(f"{path} is not a workspace snapshot.")
+
+        snapshot = cls()
+        try:
+            pos = len(cls.MAGIC)
+            (string_count,) = _U32.unpack_from(data, pos)
+            pos += _U32.size
+            for _ in range(string_count):
+                (length,) = _U32.unpack_from(data, pos)
+                pos += _U32.size
+                snapshot.strings.append(
+                    str(data[pos : pos + length], "utf-8", errors="surrogatepass")
+                )
+                pos += length
+
+            (file_count,) = _U32.unpack_from(data, pos)
+            pos += _U32.size
+            for _ in range(file_count):
+                path_index, mtime_ns, size, offset, length = _FILE_RECORD.unpack_from(
+                    data, pos
+                )
+                pos += _FILE_RECORD.size
+                snapshot.records[snapshot.strings[path_index]] = (
+                    mtime_ns,
+                    size,
+                    offset,
+                    length,
+                )
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            raise ValueError(f"Corrupted workspace snapshot {path}: {e}")
+
+        snapshot.body = data[pos:]
+        return snapshot
+
+    def is_current(self, path_str: str, stat: os.stat_result) -> bool:
+        """Returns whether the stored file matches the modification time and size given."""
+        record = self.records.get(path_str)
+        return (
+            record is not None
+            and record[0] == stat.st_mtime_ns
+            and record[1] == stat.st_size
+        )
+
+    def read_file(self, path_str: str) -> tuple[CustomOrderedDict, list, Any]:
+        """
+        Decodes the header, start comment and parsed tree stored for a file.
+
+        Raises:
+        -------
+            KeyError: If the file is not in the snapshot.
+            ValueError: If the stored data is corrupted.
+        """
+        _, _, offset, length = self.records[path_str]
+        decoder = SnapshotDecoder(self.body[offset : offset + length], self.strings)
+        try:
+            return decoder.read_value(), decoder.read_value(), decoder.read_value()
+        except (struct.error, IndexError) as e:
+            raise ValueError(f"Corrupted snapshot entry for {path_str}: {e}")
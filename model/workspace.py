@@ -0,0 +1,114 @@
+import struct
+from collections import OrderedDict
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from env_var.environment import EnvironmentVariables
+from model.content_store import ContentStore
+from model.database import Database
+from util.constants import DEFAULT_MAX_OPEN_CASES
+
+
+class Workspace(QObject):
+    """
+    A class to manage the cases open at the same time in the FoamGUI application.
+
+    The workspace holds one Database per open case, up to a maximum number of cases.
+    Reopening a case that is still open returns its Database immediately, and opening
+    a case beyond the limit closes the least recently used one. All databases share a
+    content store, so that files and subtrees that are identical across cases, as is
+    common in parameter studies, are stored once.
+
+    Attributes:
+        case_opened (pyqtSignal): Signal emitted with the case directory of a newly
+            opened case.
+        case_closed (pyqtSignal): Signal emitted with the case directory of a case
+            that has been closed.
+        snapshot_save_failed (pyqtSignal): Signal emitted with the case directory of a
+            closed case whose snapshot could not be saved, and the error message.
+
+    Methods:
+        open_case(case_dir: str, background: bool) -> Database:
+            Returns the database of a case, opening it if needed.
+        close_case(case_dir: str):
+            Saves the snapshot of a case and closes it.
+        close_all():
+            Closes every open case.
+        get_open_cases() -> list[str]:
+            Returns the open cases, most recently used last.
+    """
+
+    case_opened = pyqtSignal(str)
+    case_closed = pyqtSignal(str)
+    snapshot_save_failed = pyqtSignal(str, str)
+
+    def __init__(
+        self,
+        env_var: EnvironmentVariables,
+        max_open_cases: int = DEFAULT_MAX_OPEN_CASES,
+        memory_budget: int | None = None,
+    ) -> None:
+        super().__init__()
+        self.env_var = env_var
+        self.max_open_cases = max_open_cases
+        self.memory_budget = memory_budget
+        self.content_store = ContentStore()
+        # open case directories mapped to their database, least recently used first
+        self.databases: OrderedDict[str, Database] = OrderedDict()
+
+    def open_case(self, case_dir: str, background: bool = False) -> Database:
+        """
+        Returns the database of a case, loading the case if it is not open yet.
+
+        Parameters:
+        -----------
+            case_dir (str): The path to the case directory.
+            background (bool): Whether to load the case on a worker thread, in which
+                case the database is returned empty and filled as files are loaded.
+
+        Returns:
+        --------
+            Database: The database of the case.
+        """
+        database = self.databases.get(case_dir)
+        if database is not None:
+            self.databases.move_to_end(case_dir)
+            return database
+
+        database = Database(self.env_var, self.memory_budget, self.content_store)
+        if background:
+            database.start_loading(case_dir)
+        else:
+            database.initialise_from_case(case_dir)
+        self.databases[case_dir] = database
+        self.case_opened.emit(case_dir)
+
+        while len(self.databases) > self.max_open_cases:
+            self.close_case(next(iter(self.databases)))
+
+        return database
+
+    def close_case(self, case_dir: str):
+        """
+        Saves the snapshot of a case and removes its database from the workspace.
+
+        Parameters:
+        -----------
+            case_dir (str): The path to the case directory.
+        """
+        database = self.databases.pop(case_dir, None)
+        if database is None:
+            return
+        database.stop_loading()
+        try:
+            database.save_snapshot()
+        except (OSError, ValueError, struct.error) as e:
+            self.snapshot_save_failed.emit(case_dir, str(e))
+        self.case_closed.emit(case_dir)
+
+    def close_all(self):
+        for case_dir in list(self.databases):
+            self.close_case(case_dir)
+
+    def get_open_cases(self) -> list[str]:
+        return list(self.databases)
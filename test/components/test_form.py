@@ -0,0 +1,152 @@
+from unittest.mock import MagicMock
+
+import pytest
+from PyQt6.QtCore import QItemSelection
+from PyQt6.QtTest import QSignalSpy
+from PyQt6.QtWidgets import QApplication
+
+from model.custom_ordered_dict import CustomOrderedDict
+from controller.form_controller import FieldEditorController
+from model.model import OrderedDictModel
+from util.constants import ModelDeleteType, ModelUpdateType, ODictType
+from view.components.form import FieldEditor, FormRow
+
+
+@pytest.fixture
+def app():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def model():
+    class MockDatabase:
+        def get_dict(self):
+            return CustomOrderedDict(
+                {
+                    "big": CustomOrderedDict(
+                        {f"key{i}": f"value{i}" for i in range(500)}
+                    ),
+                    "boundaryField": CustomOrderedDict(
+                        {"inlet": CustomOrderedDict({"type": "fixedValue"})}
+                    ),
+                }
+            )
+
+        def get_item_type(self, key):
+            if key == "boundaryField":
+                return ODictType.BOUNDARY_FIELD
+            return ODictType.OTHER
+
+        def update_file(self, key_path):
+            pass
+
+    yield OrderedDictModel(MockDatabase())
+
+
+@pytest.fixture
+def editor(app, model):
+    editor = FieldEditor(model)
+    editor.resize(400, 300)
+    editor.show()
+    yield editor
+    editor.setParent(None)
+
+
+def shown_keys(editor: FieldEditor) -> list[str]:
+    rows = [row for row in editor.form_view.rows if not row.isHidden()]
+    return [row.key_field.text() for row in sorted(rows, key=lambda row: row.y())]
+
+
+def test_rows_are_recycled(editor, model):
+    big = model.invisibleRootItem().child(0)
+    editor.set_form_item(big)
+    pool_size = len(editor.form_view.rows)
+    assert pool_size < 50
+    assert shown_keys(editor)[0] == "key0"
+
+    # scrolling to the end binds the rows of the pool to the last entries
+    scroll_bar = editor.form_view.verticalScrollBar()
+    scroll_bar.setValue(scroll_bar.maximum())
+    assert shown_keys(editor)[-1] == "key499"
+
+    for _ in range(20):
+        editor.set_form_item(model.invisibleRootItem().child(1))
+        editor.set_form_item(big)
+    assert len(editor.form_view.rows) == pool_size
+    assert len(editor.form_view.viewport().findChildren(FormRow)) == pool_size
+
+
+def test_edits_apply_to_the_entry_shown(editor, model):
+    big = model.invisibleRootItem().child(0)
+    editor.set_form_item(big)
+    spy = QSignalSpy(editor.value_updated)
+
+    row = editor.form_view.rows[3]
+    row.value_field.setText("edited")
+    row.value_field.setModified(True)
+    # the edit is emitted when the row is recycled for another entry
+    editor.set_form_item(model.invisibleRootItem().child(1))
+
+    assert len(spy) == 1
+    assert spy[0][0] == big.child(3).index()
+    assert spy[0][1] == "edited"
+
+
+def test_combo_boxes_share_one_model(editor, model):
+    boundary_field = model.invisibleRootItem().child(1)
+    editor.set_form_item(boundary_field.child(0))
+    editor.set_form_item(model.invisibleRootItem().child(0))
+    editor.set_form_item(boundary_field.child(0))
+
+    combo_boxes = [row.combo_box for row in editor.form_view.rows if row.combo_box]
+    assert len(combo_boxes) == 1
+    other = FormRow()
+    other.bind(boundary_field.child(0).child(0))
+    assert other.combo_box.model() is combo_boxes[0].model()
+    assert other.combo_box.currentText() == "fixedValue"
+
+
+def test_edits_update_only_their_row(editor, model):
+    controller = FieldEditorController(model, editor, MagicMock(), MagicMock())
+    big = model.invisibleRootItem().child(0)
+    controller.handle_selection_change(QItemSelection(big.index(), big.index()))
+    for row in editor.form_view.rows:
+        row.bind = MagicMock(wraps=row.bind)
+
+    model.update_data(ModelUpdateType.VALUE, big.child(3).index(), "edited")
+    rebound = [row for row in editor.form_view.rows if row.bind.called]
+    assert len(rebound) == 1
+    assert rebound[0].value_field.text() == "edited"
+
+    # removing a row builds the form again
+    model.delete_data(ModelDeleteType.KEY_VALUE, big.child(0).index())
+    assert editor.form_view.row_count == 499
+    assert shown_keys(editor)[0] == "key1"
+
+
+def test_large_dictionaries_load_in_chunks(editor, model):
+    big, boundary_field = [model.invisibleRootItem().child(row) for row in (0, 1)]
+    form_view = editor.form_view
+    form_view.CHUNK_SIZE = 100
+    form_view.LOAD_SLICE = 0
+
+    editor.set_form_item(big)
+    # the first entries are shown at once
+    assert not big.is_loaded()
+    assert form_view.row_count == 100
+    assert shown_keys(editor)[0] == "key0"
+    assert form_view.load_timer.isActive()
+
+    # the loading stops when another item is selected, and resumes after
+    form_view.on_load_timeout()
+    editor.set_form_item(boundary_field)
+    assert not form_view.load_timer.isActive()
+    editor.set_form_item(big)
+    assert form_view.row_count == 300
+    while form_view.load_timer.isActive():
+        form_view.on_load_timeout()
+    assert big.is_loaded()
+    assert form_view.row_count == 500
+    assert big.partial_children() is big.children()
+    assert big.child(499).key == "key499"
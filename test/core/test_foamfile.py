@@ -0,0 +1,61 @@
+import pytest
+from pyparsing import ParseException
+
+from model.core.foamfile import FoamFile
+
+HEADER = """/*--------------------------------*- C++ -*----------------------------------*\\
+| =========                 |                                                 |
+| \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox           |
+|  \\\\    /   O peration     | Version:  4.0                                   |
+|   \\\\  /    A nd           | Web:      www.OpenFOAM.org                      |
+|    \\\\/     M anipulation  |                                                 |
+\\*---------------------------------------------------------------------------*/
+FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       volScalarField;
+    object      p_rgh;
+}
+// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //
+"""
+
+
+@pytest.fixture
+def field_file(tmp_path):
+    path = tmp_path / "p_rgh"
+    body = "".join(f"entry{i}    {i};\n" for i in range(5000))
+    path.write_text(HEADER + "\ndimensions      [1 -1 -2 0 0 0 0];\n" + body)
+    yield path
+
+
+def test_read_header(field_file):
+    header = FoamFile(field_file).read_header()
+    assert header["class"] == "volScalarField"
+    assert header["object"] == "p_rgh"
+    assert header["format"] == "ascii"
+
+
+def test_read_header_parses_banner(field_file):
+    foamfile = FoamFile(field_file)
+    foamfile.read_header()
+    assert "OpenFOAM: The Open Source CFD Toolbox" in foamfile.start_comment[2]
+
+
+def test_read_header_small_probe(field_file):
+    header = FoamFile(field_file).read_header(probe_size=64)
+    assert header["class"] == "volScalarField"
+
+
+def test_read_header_matches_full_read(field_file):
+    probed = FoamFile(field_file).read_header()
+    foamfile = FoamFile(field_file)
+    foamfile.read()
+    assert probed == foamfile.header
+
+
+def test_read_header_missing_header(tmp_path):
+    path = tmp_path / "README"
+    path.write_text("not an OpenFOAM file\n")
+    with pytest.raises(ParseException):
+        FoamFile(path).read_header()
@@ -1,6 +1,10 @@
+import copy
+
 import pytest
 
 from model.custom_ordered_dict import CustomOrderedDict
+from util.constants import ChangeType
+from util.exceptions import SharedDictionaryError
 
 
 @pytest.fixture
@@ -546,3 +550,285 @@ def test_map_keys_to_target_target_with_extra_keys():
     expected = CustomOrderedDict({"a": 1, "b": 2})
 
     assert result == expected
+
+
+def test_update_shared_subtree_copies_path(simple_odict):
+    shared = simple_odict["b"]
+    shared.shared = True
+    other = CustomOrderedDict({"b": shared})
+
+    simple_odict.update_nested_value(["b"], "ba", "updated_value")
+
+    assert simple_odict["b"]["ba"] == "updated_value"
+    assert other["b"]["ba"] == 21
+    assert not simple_odict["b"].shared
+
+
+def test_positional_inserts_keep_order(simple_odict):
+    for i in range(3):
+        simple_odict.insert([], f"x{i}", i, "c")
+    simple_odict.insert([], "first", 0, "a")
+    simple_odict.insert([], "last", 9, "c", after=True)
+
+    expected_keys = ["first", "a", "b", "x0", "x1", "x2", "c", "last"]
+    assert list(simple_odict) == expected_keys
+    assert list(simple_odict.keys()) == expected_keys
+    assert list(reversed(simple_odict)) == expected_keys[::-1]
+    assert [k for k, _ in simple_odict.items()] == expected_keys
+    assert list(simple_odict.values())[3:6] == [0, 1, 2]
+
+
+def test_order_kept_after_rename_and_remove(simple_odict):
+    simple_odict.insert([], "x", 0, "b")
+    simple_odict.rename_key([], "b", "new_b")
+    simple_odict.remove([], "x")
+    simple_odict["d"] = 4
+
+    assert list(simple_odict) == ["a", "new_b", "c", "d"]
+    assert simple_odict.popitem() == ("d", 4)
+    assert simple_odict.pop("a") == 1
+    assert list(simple_odict) == ["new_b", "c"]
+
+
+def test_reordered_dict_copies_and_repr(simple_odict):
+    simple_odict.insert([], "x", 0, "a")
+
+    assert repr(simple_odict) == repr(
+        {"x": 0, "a": 1, "b": {"ba": 21, "bb": 22}, "c": 3}
+    )
+    assert list(simple_odict.copy()) == ["x", "a", "b", "c"]
+    assert list(CustomOrderedDict(simple_odict)) == ["x", "a", "b", "c"]
+    assert list(dict(simple_odict)) == ["x", "a", "b", "c"]
+    assert list(copy.deepcopy(simple_odict)) == ["x", "a", "b", "c"]
+    assert simple_odict == CustomOrderedDict(
+        {"x": 0, "a": 1, "b": CustomOrderedDict({"ba": 21, "bb": 22}), "c": 3}
+    )
+    assert not simple_odict == CustomOrderedDict(
+        {"a": 1, "x": 0, "b": CustomOrderedDict({"ba": 21, "bb": 22}), "c": 3}
+    )
+
+
+def test_mutations_notify_listeners(simple_odict):
+    events = []
+    simple_odict.subscribe(events.append)
+
+    simple_odict.insert(["b"], "bx", 0, "bb")
+    simple_odict.rename_key(["b"], "bx", "by")
+    simple_odict.update_nested_value(["b"], "by", 1)
+    simple_odict.remove(["b"], "ba")
+    simple_odict.remove_all(["b"])
+
+    assert [e.change_type for e in events] == [
+        ChangeType.INSERT,
+        ChangeType.RENAME,
+        ChangeType.UPDATE,
+        ChangeType.REMOVE,
+        ChangeType.CLEAR,
+    ]
+    assert all(e.key_path == ["b"] for e in events)
+    assert [e.key for e in events] == ["bx", "by", "by", "ba", None]
+    assert [e.index for e in events] == [1, 1, 1, 0, None]
+    assert events[1].old_key == "bx"
+    assert (events[2].old_value, events[2].value) == (0, 1)
+    assert events[3].old_value == 21
+    assert events[4].old_value == CustomOrderedDict({"by": 1, "bb": 22})
+
+
+def test_positions_only_found_when_needed(simple_odict, monkeypatch):
+    events = []
+    simple_odict.subscribe(events.append, index=False)
+    monkeypatch.setattr(
+        CustomOrderedDict, "index_of", lambda self, key: pytest.fail("scanned")
+    )
+
+    simple_odict.insert(["b"], "bx", 0, "bb")
+    simple_odict.remove(["b"], "ba")
+    assert [e.index for e in events] == [None, None]
+
+
+def test_unsubscribed_listener_not_notified(simple_odict):
+    events = []
+    simple_odict.subscribe(events.append)
+    simple_odict.unsubscribe(events.append)
+
+    simple_odict.update_nested_value([], "a", 2)
+    assert events == []
+
+
+def test_snapshot_unaffected_by_edits(complex_odict):
+    snapshot = complex_odict.snapshot()
+    boundary_path = ["0", "U", "boundaryField"]
+
+    complex_odict.update_nested_value(boundary_path + ["model"], "type", "slip")
+    complex_odict.insert(boundary_path, "inlet", CustomOrderedDict(), "outlet")
+    complex_odict.rename_key(["0", "U"], "dimensions", "d")
+    complex_odict.remove_all(["system", "controlDict"])
+
+    boundary = snapshot.get_nested_value(boundary_path)
+    assert boundary["model"]["type"] == "noSlip"
+    assert "inlet" not in boundary
+    assert "dimensions" in snapshot.get_nested_value(["0", "U"])
+    assert len(snapshot.get_nested_value(["system", "controlDict"])) > 0
+    # only the edited paths are copied
+    edited_boundary = complex_odict.get_nested_value(boundary_path)
+    assert edited_boundary is not boundary
+    assert edited_boundary["side"] is boundary["side"]
+
+
+def test_nested_snapshot_unaffected_by_edits(simple_odict):
+    snapshot = simple_odict.snapshot(["b"])
+
+    simple_odict.update_nested_value(["b"], "ba", 0)
+    simple_odict.remove([], "b")
+
+    assert snapshot == CustomOrderedDict({"ba": 21, "bb": 22})
+    assert simple_odict.snapshot(["a"]) == 1
+
+
+def test_snapshot_rejects_edits_in_place(complex_odict):
+    boundary_path = ["0", "U", "boundaryField"]
+    snapshot = complex_odict.snapshot(boundary_path)
+
+    # the live tree reaches the nodes of the snapshot without the key path methods
+    with pytest.raises(SharedDictionaryError):
+        complex_odict.get_nested_value(boundary_path)["wall"] = "noSlip"
+    with pytest.raises(SharedDictionaryError):
+        complex_odict.get_nested_value(boundary_path + ["model"]).pop("type")
+    with pytest.raises(SharedDictionaryError):
+        snapshot.clear()
+
+    complex_odict.insert(boundary_path, "wall", "noSlip")
+    complex_odict.update_nested_value(boundary_path + ["model"], "type", "slip")
+    assert "wall" not in snapshot
+    assert snapshot["model"]["type"] == "noSlip"
+
+
+def test_digest_reset_along_edited_path(complex_odict):
+    boundary_path = ["0", "U", "boundaryField"]
+    root_digest = complex_odict.digest()
+    boundary = complex_odict.get_nested_value(boundary_path)
+    side_digest = boundary["side"].digest()
+
+    complex_odict.update_nested_value(boundary_path + ["model"], "type", "slip")
+
+    assert complex_odict.digest() != root_digest
+    assert boundary["side"]._digest == side_digest
+    complex_odict.update_nested_value(boundary_path + ["model"], "type", "noSlip")
+    assert complex_odict.digest() == root_digest
+
+
+def test_digest_reset_by_plain_mutation():
+    first = CustomOrderedDict({"x": CustomOrderedDict({"y": 1})})
+    second = CustomOrderedDict({"x": CustomOrderedDict({"y": 1})})
+    assert first.digest() == second.digest()
+
+    first["x"]["y"] = 2
+    assert first.digest() != second.digest()
+    assert first != second
+
+
+def test_equality(complex_odict):
+    snapshot = complex_odict.snapshot()
+    assert snapshot == complex_odict
+
+    complex_odict.insert(["0", "U"], "extra", "1")
+    assert snapshot != complex_odict
+    assert CustomOrderedDict({"a": "1"}) != CustomOrderedDict({"a": 1})
+    # values are compared by value, not by their representation
+    assert CustomOrderedDict({"a": 1}) == CustomOrderedDict({"a": 1.0})
+
+    # lists modified in place do not reset the cached digests
+    first = CustomOrderedDict({"a": [1, 2]})
+    second = CustomOrderedDict({"a": [1, 2]})
+    assert first.digest() == second.digest()
+    second["a"].append(3)
+    assert first != second
+
+
+def test_diff_reports_changes_only(complex_odict):
+    snapshot = complex_odict.snapshot()
+    boundary_path = ["0", "U", "boundaryField"]
+    complex_odict.update_nested_value(boundary_path + ["model"], "type", "slip")
+    complex_odict.remove(boundary_path, "side")
+    complex_odict.insert(["system", "controlDict"], "libs", "(fvMotion)", "startTime")
+
+    changes = snapshot.diff(complex_odict)
+
+    assert [(c.change_type, c.key_path, c.key) for c in changes] == [
+        (ChangeType.REMOVE, boundary_path, "side"),
+        (ChangeType.UPDATE, boundary_path + ["model"], "type"),
+        (ChangeType.INSERT, ["system", "controlDict"], "libs"),
+    ]
+    assert (changes[1].old_value, changes[1].value) == ("noSlip", "slip")
+    assert snapshot.diff(snapshot) == []
+
+
+def test_find_identical_children():
+    boundary = CustomOrderedDict(
+        {
+            "inlet": CustomOrderedDict({"type": "zeroGradient"}),
+            "wall": CustomOrderedDict({"type": "noSlip"}),
+            "outlet": CustomOrderedDict({"type": "zeroGradient"}),
+            "value": "uniform 0",
+        }
+    )
+    assert boundary.find_identical_children() == [["inlet", "outlet"]]
+
+
+def test_path_cache_hits_and_misses(complex_odict):
+    boundary_path = ["0", "U", "boundaryField"]
+    boundary = complex_odict.get_nested_value(boundary_path)
+
+    assert complex_odict.get_nested_value(boundary_path) is boundary
+    assert complex_odict.get_nested_value(boundary_path + ["model"], True)["type"]
+    stats = complex_odict.get_path_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+    # editing values keeps the cached nodes valid
+    complex_odict.update_nested_value(boundary_path + ["model"], "type", "slip")
+    assert complex_odict.get_nested_value(boundary_path) is boundary
+    assert complex_odict.get_path_cache_stats()["hits"] == 3
+
+
+def test_path_cache_invalidated_by_structural_changes(complex_odict):
+    boundary_path = ["0", "U", "boundaryField"]
+    complex_odict.get_nested_value(boundary_path + ["model"])
+
+    complex_odict.rename_key(boundary_path, "model", "wall")
+    with pytest.raises(KeyError):
+        complex_odict.get_nested_value(boundary_path + ["model"])
+
+    complex_odict.get_nested_value(boundary_path + ["wall"])
+    new_wall = CustomOrderedDict({"type": "zeroGradient"})
+    complex_odict.get_nested_value(boundary_path)["wall"] = new_wall
+    assert complex_odict.get_nested_value(boundary_path + ["wall"]) is new_wall
+
+    # a snapshot taken after caching still protects its nodes from later edits
+    snapshot = complex_odict.snapshot()
+    complex_odict.update_nested_value(boundary_path + ["wall"], "type", "noSlip")
+    assert snapshot.get_nested_value(boundary_path + ["wall"])["type"] == "zeroGradient"
+
+
+def test_path_cache_kept_by_edits_off_the_path(complex_odict):
+    boundary_path = ["0", "U", "boundaryField"]
+    complex_odict.get_nested_value(boundary_path + ["model"])
+
+    complex_odict.remove(boundary_path + ["airinlet"], "refValue")
+    complex_odict.insert(boundary_path + ["outlet"], "nested", CustomOrderedDict())
+    complex_odict.get_nested_value(boundary_path + ["model"])
+    assert complex_odict.get_path_cache_stats()["hits"] == 1
+
+
+def test_path_cache_invokes_access_hooks(simple_odict):
+    accessed = []
+
+    def access_hook(foamdict):
+        accessed.append(foamdict)
+        return False
+
+    simple_odict["b"].access_hook = access_hook
+    simple_odict.get_nested_value(["b"])
+    simple_odict.get_nested_value(["b"])
+
+    assert simple_odict.get_path_cache_stats()["hits"] == 1
+    assert accessed == [simple_odict["b"]] * 2
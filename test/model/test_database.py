@@ -0,0 +1,566 @@
+import gc
+import os
+import shutil
+import weakref
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from PyQt6.QtTest import QSignalSpy
+from PyQt6.QtWidgets import QApplication
+
+from controller.commands.command import RenamePatchCommand
+from model.core.foamfile import FoamFile
+from model.custom_ordered_dict import CustomOrderedDict
+from model.database import Database
+from model.model import OrderedDictItem, OrderedDictModel
+from model.patch_index import read_mesh_patches
+from model.snapshot import WorkspaceSnapshot
+from util.constants import SNAPSHOT_FILE_NAME, ODictType
+from util.exceptions import DuplicateKeyError
+
+TEMPLATE_DIR = Path(__file__).parents[2] / "templates" / "intermixingPhaseChangeFoam"
+
+
+@pytest.fixture
+def case_dir(tmp_path):
+    case_path = tmp_path / "case"
+    shutil.copytree(TEMPLATE_DIR, case_path)
+    yield case_path
+
+
+@pytest.fixture
+def app():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def database(case_dir):
+    db = Database(MagicMock())
+    db.initialise_from_case(str(case_dir))
+    yield db
+
+
+def test_file_class_refreshed_on_write(database, case_dir):
+    path_str = str(case_dir / "system" / "controlDict")
+    assert database.get_file_class(path_str) == "dictionary"
+
+    text = Path(path_str).read_text().replace("dictionary;", "IOobject;")
+    database.update_files([], {path_str: text})
+    assert database.get_file_class(path_str) == "IOobject"
+
+    database.foamfile_store[path_str].header["class"] = "dictionary"
+    database.update_files([path_str])
+    assert database.get_file_class(path_str) == "dictionary"
+
+
+def test_memory_budget_evicts_least_recently_used(database, case_dir):
+    u_path = str(case_dir / "0" / "U")
+    database.set_memory_budget(1)
+
+    # only the most recently used file stays resident
+    assert len(database.file_lru) == 1
+    assert database.eviction_count == len(database.evicted_files)
+    assert u_path in database.evicted_files
+    zero_dir = database.get_dict()[str(case_dir / "0")]
+    assert zero_dir[u_path] == CustomOrderedDict()
+
+
+def test_evicted_file_reloaded_on_access(database, case_dir):
+    u_path = str(case_dir / "0" / "U")
+    key_path = [str(case_dir / "0"), u_path, "boundaryField", "waterinlet", "type"]
+    original = database.get_dict().get_nested_value(key_path)
+    database.get_dict().get_nested_value(
+        [str(case_dir / "system"), str(case_dir / "system" / "controlDict")]
+    )
+
+    database.set_memory_budget(1)
+    assert u_path in database.evicted_files
+
+    assert database.get_dict().get_nested_value(key_path) == original
+    assert u_path not in database.evicted_files
+    assert database.reload_count == 1
+
+
+def test_evicted_tree_freed_after_cached_lookup(database, case_dir):
+    u_path = str(case_dir / "0" / "U")
+    key_path = [str(case_dir / "0"), u_path, "boundaryField", "waterinlet"]
+    tree = weakref.ref(database.get_dict().get_nested_value(key_path[:2]))
+    database.get_dict().get_nested_value(key_path)
+    database.get_dict().get_nested_value(
+        [str(case_dir / "system"), str(case_dir / "system" / "controlDict")]
+    )
+
+    database.set_memory_budget(1)
+    gc.collect()
+    assert u_path in database.evicted_files
+    assert tree() is None
+
+
+def test_dirty_files_not_evicted(database, case_dir):
+    u_path = str(case_dir / "0" / "U")
+    database.dirty_files.add(u_path)
+    database.set_memory_budget(1)
+    assert u_path not in database.evicted_files
+
+
+def test_no_eviction_without_budget(database):
+    database.enforce_memory_budget()
+    assert not database.evicted_files
+    assert database.get_memory_stats()["evictions"] == 0
+
+
+def test_snapshot_round_trip(database, case_dir):
+    database.save_snapshot()
+    assert (case_dir / SNAPSHOT_FILE_NAME).exists()
+
+    reopened = Database(MagicMock())
+    reopened.initialise_from_case(str(case_dir))
+    assert repr(reopened.get_dict()) == repr(database.get_dict())
+
+    u_path = str(case_dir / "0" / "U")
+    assert reopened.foamfile_store[u_path].header == database.foamfile_store[u_path].header
+    assert reopened.file_class_index == database.file_class_index
+
+
+def test_snapshot_skips_parsing_unchanged_files(database, case_dir):
+    database.save_snapshot()
+
+    with patch.object(FoamFile, "read", autospec=True) as read:
+        reopened = Database(MagicMock())
+        reopened.initialise_from_case(str(case_dir))
+    read.assert_not_called()
+
+
+def test_snapshot_reparses_modified_files(database, case_dir):
+    database.save_snapshot()
+    u_path = case_dir / "0" / "U"
+    u_path.write_text(u_path.read_text().replace("noSlip", "slip"))
+
+    reopened = Database(MagicMock())
+    reopened.initialise_from_case(str(case_dir))
+    model_type = reopened.get_dict().get_nested_value(
+        [str(case_dir / "0"), str(u_path), "boundaryField", "model", "type"]
+    )
+    assert model_type == "slip"
+
+
+def test_snapshot_stores_unsaved_files_from_disk(database, case_dir):
+    u_path = str(case_dir / "0" / "U")
+    boundary_path = [str(case_dir / "0"), u_path, "boundaryField", "model"]
+    database.get_dict().update_nested_value(boundary_path, "type", "slip")
+    assert u_path in database.dirty_files
+    database.save_snapshot()
+
+    reopened = Database(MagicMock())
+    reopened.initialise_from_case(str(case_dir))
+    assert reopened.get_dict().get_nested_value(boundary_path)["type"] == "noSlip"
+
+
+def test_corrupted_snapshot_ignored(database, case_dir):
+    (case_dir / SNAPSHOT_FILE_NAME).write_bytes(WorkspaceSnapshot.MAGIC + b"\xff\xff")
+
+    reopened = Database(MagicMock())
+    reopened.initialise_from_case(str(case_dir))
+    assert repr(reopened.get_dict()) == repr(database.get_dict())
+
+
+def load_in_background(database, case_dir):
+    finished = QSignalSpy(database.loading_finished)
+    database.start_loading(str(case_dir))
+    assert finished.wait(10000)
+    return finished[0][0]
+
+
+def test_background_loading_matches_initialise(app, database, case_dir):
+    loaded = Database(MagicMock())
+    cancelled = load_in_background(loaded, case_dir)
+
+    assert not cancelled
+    assert not loaded.is_loading()
+    for path_str, key_path in database.file_key_paths.items():
+        assert loaded.file_key_paths[path_str] == key_path
+        assert repr(loaded.get_dict().get_nested_value(key_path + [path_str])) == repr(
+            database.get_dict().get_nested_value(key_path + [path_str])
+        )
+    assert loaded.file_stats == database.file_stats
+
+
+def test_background_loading_reads_system_before_fields(app, case_dir):
+    loaded = Database(MagicMock())
+    file_key_paths = []
+    loaded.file_loaded.connect(file_key_paths.append)
+    load_in_background(loaded, case_dir)
+
+    top_dirs = [key_path[0] for key_path in file_key_paths]
+    assert top_dirs[0] == str(case_dir / "system")
+    zero_dir = str(case_dir / "0")
+    assert top_dirs[top_dirs.index(zero_dir) :] == [zero_dir] * top_dirs.count(zero_dir)
+    # directories are listed in case order before any file is loaded
+    assert list(loaded.get_dict()) == [
+        str(case_dir / subdir) for subdir in ["0", "system", "constant"]
+    ]
+
+
+def test_background_scan_classifies_files_from_headers(app, case_dir):
+    loaded = Database(MagicMock())
+    classes_when_loaded = []
+    loaded.file_loaded.connect(
+        lambda key_path: classes_when_loaded.append(dict(loaded.file_class_index))
+    )
+    load_in_background(loaded, case_dir)
+
+    # every file is classified before the first file is parsed
+    u_path = str(case_dir / "0" / "U")
+    assert classes_when_loaded[0][u_path] == "volVectorField"
+    assert loaded.file_class_index[u_path] == "volVectorField"
+
+
+def test_background_loading_fills_model(app, case_dir):
+    loaded = Database(MagicMock())
+    model = OrderedDictModel(loaded)
+    loaded.directory_loaded.connect(model.insert_loaded_entry)
+    loaded.file_loaded.connect(model.insert_loaded_entry)
+    load_in_background(loaded, case_dir)
+
+    root = model.invisibleRootItem()
+    assert [root.child(row).text() for row in range(root.rowCount())] == [
+        "0",
+        "system",
+        "constant",
+    ]
+    system_item = root.child(1)
+    system_files = [
+        system_item.child(row).text() for row in range(system_item.rowCount())
+    ]
+    assert "controlDict" in system_files
+
+
+def test_model_item_types_from_database_index(database, case_dir, monkeypatch):
+    # a nested key matching a directory relative to the working directory
+    monkeypatch.chdir(case_dir)
+    system_dir = str(case_dir / "system")
+    control_dict_path = [system_dir, str(case_dir / "system" / "controlDict")]
+    database.get_dict().insert(control_dict_path, "constant", CustomOrderedDict())
+    model = OrderedDictModel(database)
+
+    with patch("os.stat", side_effect=AssertionError("filesystem accessed")):
+        root = model.invisibleRootItem()
+        assert [root.child(row).item_type() for row in range(3)] == [
+            ODictType.ZERO_DIR,
+            ODictType.SYSTEM_DIR,
+            ODictType.CONSTANT_DIR,
+        ]
+        control_dict = model.itemFromIndex(model.index_from_key_path(control_dict_path))
+        assert control_dict.item_type() == ODictType.FILE
+        assert control_dict.text() == "controlDict"
+        nested_index = model.index_from_key_path(control_dict_path + ["constant"])
+        assert model.data(nested_index, OrderedDictItem.ROLE_TYPE) == ODictType.OTHER
+        u_path = [str(case_dir / "0"), str(case_dir / "0" / "U")]
+        boundary_index = model.index_from_key_path(u_path + ["boundaryField"])
+        assert model.data(boundary_index, OrderedDictItem.ROLE_TYPE) == (
+            ODictType.BOUNDARY_FIELD
+        )
+
+
+def test_file_path_from_database_index(database, case_dir, monkeypatch):
+    # a nested key matching a directory relative to the working directory
+    monkeypatch.chdir(case_dir)
+    control_dict = str(case_dir / "system" / "controlDict")
+    file_key_path = [str(case_dir / "system"), control_dict]
+    database.get_dict().insert(file_key_path, "constant", CustomOrderedDict())
+    nested_key_path = file_key_path + ["constant"]
+    database.get_dict().insert(nested_key_path, "application", "solver")
+
+    with patch.object(Path, "exists", side_effect=AssertionError("path checked")):
+        assert database.get_file_path(nested_key_path) == (
+            control_dict,
+            file_key_path,
+        )
+        assert database.get_file_path([str(case_dir / "system")]) == ("", [])
+        database.update_file(nested_key_path)
+    assert "solver" in Path(control_dict).read_text()
+
+
+def test_cancel_background_loading(app, case_dir):
+    loaded = Database(MagicMock())
+    finished = QSignalSpy(loaded.loading_finished)
+    loaded.start_loading(str(case_dir))
+    loaded.cancel_loading()
+
+    assert finished.wait(10000)
+    assert finished[0][0]
+    total_files = sum(1 for path in case_dir.rglob("*") if path.is_file())
+    assert len(loaded.file_stats) < total_files
+
+
+def test_results_loaded_in_removed_directory_dropped(database, case_dir):
+    zero_dir = str(case_dir / "0")
+    database.get_dict().remove([], zero_dir)
+    loaded_key_paths = []
+    database.directory_loaded.connect(loaded_key_paths.append)
+    database.file_loaded.connect(loaded_key_paths.append)
+
+    # results of a load still running, for a directory removed meanwhile
+    database.loader = MagicMock()
+    database.on_directory_found([zero_dir, str(case_dir / "0" / "sub")])
+    database.on_file_loaded([zero_dir], MagicMock())
+    database.loader = None
+    assert not loaded_key_paths
+    assert zero_dir not in database.get_dict()
+
+
+def test_edited_file_not_evicted_until_written(database, case_dir):
+    u_path = str(case_dir / "0" / "U")
+    key_path = [str(case_dir / "0"), u_path, "boundaryField", "model"]
+    database.get_dict().update_nested_value(key_path, "type", "slip")
+
+    database.set_memory_budget(1)
+    assert u_path not in database.evicted_files
+
+    database.update_file(key_path)
+    assert u_path not in database.dirty_files
+
+
+def test_snapshot_of_database_unaffected_by_edits_and_evictions(database, case_dir):
+    zero_dir, u_path = str(case_dir / "0"), str(case_dir / "0" / "U")
+    snapshot = database.get_dict().snapshot()
+
+    database.get_dict().update_nested_value(
+        [zero_dir, u_path, "boundaryField", "model"], "type", "slip"
+    )
+    database.update_file([zero_dir, u_path, "boundaryField", "model"])
+    database.set_memory_budget(1)
+
+    snapshot_zero_dir = snapshot[zero_dir]
+    assert snapshot_zero_dir[u_path]["boundaryField"]["model"]["type"] == "noSlip"
+    assert all(len(tree) > 0 for tree in snapshot_zero_dir.values())
+    assert database.evicted_files
+    # evicted files are still reloaded in the copied directories
+    evicted_path = next(iter(database.evicted_files))
+    reloaded = database.get_dict().get_nested_value(
+        database.file_key_paths[evicted_path] + [evicted_path]
+    )
+    assert len(reloaded) > 0
+
+
+def test_search_keys_and_values(database, case_dir):
+    zero_dir, u_path = str(case_dir / "0"), str(case_dir / "0" / "U")
+    waterinlet_path = (zero_dir, u_path, "boundaryField", "waterinlet")
+
+    assert waterinlet_path in [match.key_path for match in database.search("WATERIN")]
+    type_matches = database.search(r"^fixed\w+$", regex=True)
+    assert waterinlet_path + ("type",) in [match.key_path for match in type_matches]
+    assert all(match.text.startswith("fixed") for match in type_matches)
+    assert len(database.search("e", limit=5)) == 5
+
+
+def test_search_index_follows_edits(database, case_dir):
+    zero_dir, u_path = str(case_dir / "0"), str(case_dir / "0" / "U")
+    key_path = [zero_dir, u_path, "boundaryField", "waterinlet"]
+    database.get_dict().update_nested_value(key_path, "type", "slipWall")
+    database.get_dict().rename_key(key_path[:-1], "waterinlet", "waterinflow")
+
+    [match] = database.search("slipWall", case_sensitive=True)
+    assert match.key_path == (zero_dir, u_path, "boundaryField", "waterinflow", "type")
+    assert match.nested_keys() == ("boundaryField", "waterinflow", "type")
+    assert u_path not in [match.path_str for match in database.search("waterinlet")]
+
+    database.delete_file(u_path)
+    assert not database.search("waterinflow")
+
+
+def test_delete_file_forgets_file(database, case_dir):
+    u_path = str(case_dir / "0" / "U")
+    database.get_dict().update_nested_value(
+        [str(case_dir / "0"), u_path, "boundaryField", "model"], "type", "slip"
+    )
+    database.delete_file(u_path)
+
+    for file_map in [
+        database.foamfile_store,
+        database.file_stats,
+        database.file_class_index,
+        database.file_lru,
+        database.file_key_paths,
+        database.stored_files,
+        database.dirty_files,
+        database.evicted_files,
+    ]:
+        assert u_path not in file_map
+    assert database.get_item_type(u_path) == ODictType.OTHER
+    assert database.resident_size == sum(database.file_lru.values())
+
+
+def test_background_loading_indexes_files(app, database, case_dir):
+    loaded = Database(MagicMock())
+    load_in_background(loaded, case_dir)
+    assert loaded.search_index.postings == database.search_index.postings
+
+
+def test_find_key_paths(database, case_dir):
+    zero_dir, u_path = str(case_dir / "0"), str(case_dir / "0" / "U")
+    type_path = (zero_dir, u_path, "boundaryField", "waterinlet", "type")
+
+    assert database.find_key_paths("U.bF.waterin.type")[0] == type_path
+    assert database.find_key_paths("0.U.boundaryField.waterinlet.type")[0] == type_path
+    assert type_path in database.find_key_paths("waterinlet.ty", limit=100)
+    assert not database.find_key_paths("U.noSuchKey")
+
+
+def test_key_path_index_follows_edits(database, case_dir):
+    zero_dir, u_path = str(case_dir / "0"), str(case_dir / "0" / "U")
+    key_path = [zero_dir, u_path, "boundaryField"]
+    database.get_dict().rename_key(key_path, "waterinlet", "waterinflow")
+    database.get_dict().insert(
+        key_path, "bottom", CustomOrderedDict({"type": "noSlip"})
+    )
+
+    assert (*key_path, "waterinlet") not in database.find_key_paths("U.bF.waterinlet")
+    assert database.find_key_paths("U.bF.waterinflow.type") == [
+        (*key_path, "waterinflow", "type")
+    ]
+    assert database.find_key_paths("U.bottom.type") == [(*key_path, "bottom", "type")]
+
+    database.delete_file(u_path)
+    assert not database.find_key_paths("waterinflow")
+
+
+BOUNDARY_TEXT = """\
+/*--------------------------------*- C++ -*----------------------------------*\\
+| =========                 |                                                 |
+| \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox           |
+|  \\\\    /   O peration     | Version:  4.0                                   |
+|   \\\\  /    A nd           | Web:      www.OpenFOAM.org                      |
+|    \\\\/     M anipulation  |                                                 |
+\\*---------------------------------------------------------------------------*/
+FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       polyBoundaryMesh;
+    object      boundary;
+}
+
+6
+(
+    airinlet { type patch; nFaces 10; startFace 100; }
+    waterinlet { type patch; nFaces 10; startFace 110; }
+    outlet { type patch; nFaces 10; startFace 120; }
+    model { type wall; inGroups 1(wall); nFaces 10; startFace 130; }
+    symmetry { type symmetryPlane; nFaces 10; startFace 140; }
+    side { type symmetryPlane; nFaces 10; startFace 150; }
+)
+"""
+
+
+@pytest.fixture
+def mesh_database(case_dir):
+    mesh_dir = case_dir / "constant" / "polyMesh"
+    mesh_dir.mkdir()
+    (mesh_dir / "boundary").write_text(BOUNDARY_TEXT)
+    db = Database(MagicMock())
+    db.initialise_from_case(str(case_dir))
+    yield db
+
+
+def test_patch_index(mesh_database, case_dir):
+    database = mesh_database
+    mesh_dir = case_dir / "constant" / "polyMesh"
+    patch_index = database.patch_index
+    boundary_path, zero_dir = str(mesh_dir / "boundary"), str(case_dir / "0")
+    u_path, k_path = str(case_dir / "0" / "U"), str(case_dir / "0" / "k")
+
+    assert patch_index.mesh_files == {boundary_path}
+    assert patch_index.patch_type(boundary_path, "model") == "wall"
+    assert patch_index.patch_type(u_path, "waterinlet") == "fixedValue"
+    assert patch_index.files_defining("inlet") == {
+        str(case_dir / "0" / name) for name in ("k", "nut", "p_rgh")
+    }
+    assert database.find_missing_patches()[k_path] == {"airinlet", "waterinlet"}
+    assert u_path not in database.find_missing_patches()
+    assert database.get_patch_conditions(u_path)["waterinlet"]["type"] == "fixedValue"
+
+    # the index follows the edits of the boundary fields
+    key_path = [zero_dir, k_path, "boundaryField"]
+    database.get_dict().rename_key(key_path, "inlet", "waterinlet")
+    database.get_dict().insert(
+        key_path, "airinlet", CustomOrderedDict({"type": "zeroGradient"})
+    )
+    assert k_path not in database.find_missing_patches()
+    assert k_path in patch_index.files_defining("waterinlet")
+    assert patch_index.patch_type(k_path, "airinlet") == "zeroGradient"
+    database.get_dict().update_nested_value(key_path + ["airinlet"], "type", "slip")
+    assert patch_index.patch_type(k_path, "airinlet") == "slip"
+
+    database.delete_file(u_path)
+    assert u_path not in patch_index.files_defining("waterinlet")
+
+
+def test_rename_patch_in_every_file(mesh_database, case_dir):
+    database = mesh_database
+    zero_dir, u_path = str(case_dir / "0"), str(case_dir / "0" / "U")
+    boundary_path = str(case_dir / "constant" / "polyMesh" / "boundary")
+    model = OrderedDictModel(database)
+    model.update_model()
+    boundary_index = model.index_from_key_path([zero_dir, u_path, "boundaryField"])
+    boundary_item = model.itemFromIndex(boundary_index)
+    renamed_files = set(database.patch_index.files_defining("waterinlet"))
+
+    command = RenamePatchCommand(model, "waterinlet", "waterInlet")
+    command.redo()
+    assert set(command.path_strs) == renamed_files
+    assert database.patch_index.files_defining("waterInlet") == renamed_files
+    assert "waterInlet" in FoamFile(u_path).read()["boundaryField"]
+    assert "waterInlet" in read_mesh_patches(boundary_path)[0]
+    assert boundary_item.child_by_key("waterInlet") is not None
+    assert not database.dirty_files
+
+    command.undo()
+    assert database.patch_index.files_defining("waterinlet") == renamed_files
+    assert "waterinlet" in FoamFile(u_path).read()["boundaryField"]
+    assert "waterinlet" in read_mesh_patches(boundary_path)[0]
+
+    # nothing is renamed if a file already has a patch with the new name
+    with pytest.raises(DuplicateKeyError):
+        model.rename_patch("airinlet", "outlet")
+    assert "airinlet" in FoamFile(u_path).read()["boundaryField"]
+
+
+def test_rename_patch_leaves_files_and_trees_if_a_write_fails(mesh_database, case_dir):
+    database = mesh_database
+    boundary_path = str(case_dir / "constant" / "polyMesh" / "boundary")
+    path_strs = sorted(database.patch_index.files_defining("waterinlet"))
+    texts = {path_str: Path(path_str).read_text() for path_str in path_strs}
+    # the temporary file of the last file cannot be written
+    Path(path_strs[-1] + ".tmp").mkdir()
+
+    with pytest.raises(OSError):
+        database.rename_patch("waterinlet", "waterInlet")
+    assert {path_str: Path(path_str).read_text() for path_str in path_strs} == texts
+    assert not any(Path(path_str + ".tmp").is_file() for path_str in path_strs)
+    assert database.patch_index.files_defining("waterinlet") == set(path_strs)
+    assert not database.patch_index.files_defining("waterInlet")
+
+    # the files already replaced are restored if the last one cannot be replaced
+    Path(path_strs[-1] + ".tmp").rmdir()
+    replace = os.replace
+
+    def replace_but_last(src, dst):
+        if src == path_strs[-1] + ".tmp":
+            raise PermissionError(dst)
+        replace(src, dst)
+
+    with patch("os.replace", replace_but_last):
+        with pytest.raises(PermissionError):
+            database.rename_patch("waterinlet", "waterInlet")
+    assert {path_str: Path(path_str).read_text() for path_str in path_strs} == texts
+    assert not list(case_dir.rglob("*.tmp")) and not list(case_dir.rglob("*.bak"))
+    assert database.patch_index.files_defining("waterinlet") == set(path_strs)
+
+    # the mesh file read again once renamed
+    mesh_foamfile = database.foamfile_store[boundary_path]
+    database.rename_patch("waterinlet", "waterInlet")
+    assert database.foamfile_store[boundary_path] is not mesh_foamfile
+    assert database.patch_index.patch_type(boundary_path, "waterInlet") == "patch"
@@ -1,8 +1,8 @@
-from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
-from PyQt6.QtTest import QSignalSpy
+from PyQt6.QtCore import QPersistentModelIndex, Qt, qInstallMessageHandler
+from PyQt6.QtTest import QAbstractItemModelTester, QSignalSpy
 
 from model.custom_ordered_dict import CustomOrderedDict
 from model.model import (
@@ -12,7 +12,13 @@ from model.model import (
     OrderedDictModel,
     QModelIndex,
 )
-from util.constants import ModelCreateType, ModelDeleteType, ModelUpdateType
+from model.patch_index import PatchIndex, field_patches
+from util.constants import (
+    ChangeType,
+    ModelCreateType,
+    ModelDeleteType,
+    ModelUpdateType,
+)
 from util.exceptions import DuplicateKeyError
 
 
@@ -20,6 +26,11 @@ from util.exceptions import DuplicateKeyError
 def database():
     # Mock the Database class
     class MockDatabase:
+        def __init__(self):
+            self.patch_index = PatchIndex()
+            for path_str, foamdict in self.get_dict()["/standardise"].items():
+                self.patch_index.add_file(path_str, field_patches(foamdict))
+
         def get_dict(self):
             return CustomOrderedDict(
                 {
@@ -69,6 +80,11 @@ def database():
         def handle_data_changed(self, key_path, data):
             pass
 
+        def get_item_type(self, key):
+            if key == "boundaryField":
+                return ODictType.BOUNDARY_FIELD
+            return ODictType.OTHER
+
         def update_file(self, key_path):
             pass
 
@@ -86,18 +102,18 @@ def test_get_key_path_valid(model):
     root_item = invisible_item.child(0)
     subdir1_item = root_item.child(0)
     subdir1_index = subdir1_item.index()
-    assert model.get_key_path(subdir1_index) == ["/root", "/root/subdir1"]
+    assert model.get_key_path(subdir1_index) == ("/root", "/root/subdir1")
 
 
 def test_get_key_path_invalid(model):
     model.update_model()
     invalid_index = QModelIndex()
-    assert model.get_key_path(invalid_index) == []
+    assert model.get_key_path(invalid_index) == ()
 
 
 def test_index_from_key_path_valid(model):
     model.update_model()
-    valid_key_path = ["/root", "/root/subdir1"]
+    valid_key_path = ("/root", "/root/subdir1")
     res_index = model.index_from_key_path(valid_key_path)
     assert model.get_key_path(res_index) == valid_key_path
 
@@ -109,18 +125,121 @@ def test_index_from_key_path_invalid(model):
     assert model.get_key_path(res_index) != invalid_key_path
 
 
-def test_ordered_dict_item(tmpdir):
-    subdir = tmpdir / "root/subdir1"
-    subdir_path = Path(subdir)
-    subdir_path.mkdir(parents=True)
-    item = OrderedDictItem(str(subdir))
-    assert subdir_path.exists()
+def test_rows_follow_inserts_removes_and_renames(model):
+    root = model.invisibleRootItem().child(0)  # /root
+    subdir1 = root.child(0)
+    model.insert_new_data(ModelCreateType.AFTER, subdir1.index(), "middle", "value")
+    model.insert_new_data(ModelCreateType.BEFORE, subdir1.index(), "first", "value")
+    model.update_data(ModelUpdateType.KEY, root.child(3).index(), "/root/renamed")
+    model.delete_data(ModelDeleteType.KEY_VALUE, root.child(2).index())
+
+    keys = ["first", "/root/subdir1", "/root/renamed", "file4"]
+    assert [root.child(row).key for row in range(root.rowCount())] == keys
+    for row, key in enumerate(keys):
+        assert root.child(row).row() == row
+        index = model.index_from_key_path(["/root", key])
+        assert (index.row(), model.get_key_path(index)) == (row, ("/root", key))
+    assert not model.index_from_key_path(["/root", "/root/subdir2"]).isValid()
+    assert not model.index_from_key_path(["/root", "middle"]).isValid()
+
+
+def test_key_paths_cached_until_ancestor_renamed(model):
+    root = model.invisibleRootItem().child(0)  # /root
+    file3 = root.child(0).child(2)
+    assert file3.key_path() == ("/root", "/root/subdir1", "file3")
+    assert file3.key_path() is file3.key_path()
+
+    model.update_data(ModelUpdateType.KEY, root.index(), "/renamed")
+    assert file3.key_path() == ("/renamed", "/root/subdir1", "file3")
+    content3 = model.index_from_key_path(file3.key_path() + ("content3",))
+    assert model.data(content3) == "content3: test3"
+
+
+def test_model_reads_values_from_data_tree(model):
+    root_index = model.index(0, 0)
+    file4_index = model.index(2, 0, root_index)
+    assert model.data(file4_index) == "file4: content4"
+
+    model._data.update_nested_value(["/root"], "file4", "changed")
+    assert model.data(file4_index) == "file4: changed"
+    assert model.customItemFromIndex(file4_index).value == "changed"
+
+
+def test_model_edits_pass_model_tester(model):
+    warnings = []
+    previous_handler = qInstallMessageHandler(
+        lambda mode, context, message: warnings.append(message)
+    )
+    try:
+        tester = QAbstractItemModelTester(
+            model, QAbstractItemModelTester.FailureReportingMode.Warning
+        )
+        root_index = model.index(0, 0)
+        subdir1_index = model.index(0, 0, root_index)
+        model.insert_new_data(ModelCreateType.CHILD, subdir1_index, "new", "value")
+        model.update_data(ModelUpdateType.KEY, subdir1_index, "/root/renamed")
+        model.delete_data(ModelDeleteType.KEY_VALUE, model.index(1, 0, root_index))
+        model.delete_data(ModelDeleteType.CLEAR_DICT, subdir1_index)
+        model.update_model()
+    finally:
+        qInstallMessageHandler(previous_handler)
+
+    assert warnings == []
+    assert model.get_key_path(model.index(0, 0, model.index(0, 0))) == (
+        "/root",
+        "/root/renamed",
+    )
+    assert model.rowCount(model.index(0, 0, model.index(0, 0))) == 0
+
+
+def test_update_model_reports_only_changed_rows(model):
+    root_index = model.index(0, 0)
+    subdir1_index = model.index(0, 0, root_index)
+    file3_index = model.index(2, 0, subdir1_index)
+    content3 = QPersistentModelIndex(model.index(0, 0, file3_index))
+    subdir2 = QPersistentModelIndex(model.index(1, 0, root_index))
+
+    data = model._data
+    data.insert(["/root"], "new", "value", insert_key="/root/subdir1")
+    data.remove(["/root", "/root/subdir1"], "file2")
+    data.update_nested_value(["/root", "/root/subdir1", "file3"], "content3", "x")
+    data.rename_key(["/root"], "file4", "file5")
+
+    warnings = []
+    previous_handler = qInstallMessageHandler(
+        lambda mode, context, message: warnings.append(message)
+    )
+    try:
+        tester = QAbstractItemModelTester(
+            model, QAbstractItemModelTester.FailureReportingMode.Warning
+        )
+        resets = QSignalSpy(model.modelReset)
+        removed = QSignalSpy(model.rowsRemoved)
+        inserted = QSignalSpy(model.rowsInserted)
+        model.update_model()
+    finally:
+        qInstallMessageHandler(previous_handler)
+
+    assert warnings == []
+    assert (len(resets), len(removed), len(inserted)) == (0, 2, 2)
+    assert content3.isValid() and model.data(QModelIndex(content3)) == "content3: x"
+    assert subdir2.isValid() and subdir2.row() == 2
+    root = model.invisibleRootItem().child(0)
+    assert [root.child(row).key for row in range(root.rowCount())] == list(
+        data["/root"]
+    )
+    assert [root.child(1).child(row).key for row in range(2)] == ["file1", "file3"]
+
+
+def test_ordered_dict_item():
+    item = OrderedDictItem("/root/subdir1", item_type=ODictType.OTHER_DIR)
     assert item.text() == "subdir1"
-    assert item.key == str(subdir)
+    assert item.key == "/root/subdir1"
 
     item_non_file = OrderedDictItem("non_file_item")
     assert item_non_file.text() == "non_file_item"
     assert item_non_file.key == "non_file_item"
+    assert item_non_file.item_type() == ODictType.OTHER
 
 
 def test_load_model(model):
@@ -166,9 +285,10 @@ def test_update_model_value(model):
     # Using QSignalSpy to spy on signals sent
     spy = QSignalSpy(model.dataChanged)
 
-    model.itemFromIndex(file4_index).setData("file4_new")
+    assert model.setData(file4_index, "file4_new")
     assert len(spy) == 1
-    assert model.itemFromIndex(file4_index).data() == "file4_new"
+    assert model.data(file4_index, Qt.ItemDataRole.EditRole) == "file4_new"
+    assert model.data(file4_index) == "file4: file4_new"
 
 
 def test_insert_model_new_kv(model):
@@ -320,3 +440,64 @@ def test_standardise_all_items_valid(model):
     )
     assert target_item_subdir2_entry.value != template_entry.value
     assert target_item_subdir3_entry.value == template_entry.value
+
+
+def test_standardise_all_items_writes_each_file_once(model):
+    standardise_item = model.invisibleRootItem().child(1)
+    template_item = standardise_item.child(0).child(1)
+    target_path = ("/standardise", "/standardise/subdir3", "boundaryField")
+
+    changes = model.preview_standardisation(template_item.index())
+    assert list(changes) == [target_path]
+    assert {(change.change_type, change.key) for change in changes[target_path]} == {
+        (ChangeType.REMOVE, "haha"),
+        (ChangeType.INSERT, "inlet"),
+    }
+    assert dict(model._data.get_nested_value(target_path)) == {"haha": "lol"}
+
+    written = []
+    model.db.update_file = written.append
+    cache = model.standardise_all_items(template_item.index())
+    assert written == [target_path[:-1]]
+    assert dict(model._data.get_nested_value(target_path)) == {"inlet": "test"}
+
+    model.replace_dicts(cache)
+    assert dict(model._data.get_nested_value(target_path)) == {"haha": "lol"}
+    assert standardise_item.child(2).child(0).child(0).key == "haha"
+
+
+def test_children_loaded_in_chunks(model):
+    root_item = model.invisibleRootItem().child(0)
+    assert not root_item.load_children(2)
+    first_items = list(root_item.partial_children())
+    assert [item.key for item in first_items] == ["/root/subdir1", "/root/subdir2"]
+
+    assert root_item.load_children(2)
+    assert root_item.children()[:2] == first_items
+    assert root_item.child(0).row() == 0
+
+    # handles created before the dictionary changed are created again
+    other_item = model.invisibleRootItem().child(1)
+    assert not other_item.load_children(1)
+    stale_item = other_item.partial_children()[0]
+    model._data.rename_key(["/standardise"], "/standardise/subdir1", "renamed")
+    other_item.load_children()
+    assert other_item.child(0).key == "renamed"
+    assert other_item.child(0) is not stale_item
+
+
+def test_insert_updates_file_of_inserted_key(model, database, monkeypatch):
+    updated = []
+    monkeypatch.setattr(database, "update_file", updated.append)
+    monkeypatch.setattr(
+        database,
+        "get_item_type",
+        lambda key: ODictType.FILE if key == "/root/subdir2" else ODictType.OTHER,
+    )
+    model.update_model()
+    root = model.invisibleRootItem().child(0)  # /root
+
+    # the file inserted into is written, without looking up the key on disk
+    model.insert_new_data(ModelCreateType.CHILD, root.child(1).index(), "new", "a")
+    model.insert_new_data(ModelCreateType.CHILD, root.child(0).index(), "new", "b")
+    assert updated == [("/root", "/root/subdir2"), ("/root",)]
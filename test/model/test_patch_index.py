@@ -0,0 +1,99 @@
+import re
+
+import pytest
+
+from model.custom_ordered_dict import CustomOrderedDict
+from model.patch_index import PatchIndex, PatchMatcher, field_patches
+
+
+def make_field(entries: dict[str, str]) -> CustomOrderedDict:
+    return CustomOrderedDict(
+        {
+            "boundaryField": CustomOrderedDict(
+                {
+                    key: CustomOrderedDict({"type": patch_type})
+                    for key, patch_type in entries.items()
+                }
+            )
+        }
+    )
+
+
+@pytest.fixture
+def patch_index():
+    index = PatchIndex()
+    index.add_file(
+        "boundary",
+        {"inlet1": "patch", "inlet2": "patch", "outlet": "patch", "top": "wall"},
+        mesh=True,
+        groups={"top": ["walls"]},
+    )
+    return index
+
+
+def test_matcher_prefers_last_key():
+    matcher = PatchMatcher(['"in.*"', '"(inlet|outlet).*"', '"bad("'])
+    assert matcher.match("inlet1") == '"(inlet|outlet).*"'
+    assert matcher.match("intake") == '"in.*"'
+    # keys must match the whole patch name
+    assert matcher.match("topinlet") is None
+
+
+def test_matcher_scopes_inline_flags():
+    matcher = PatchMatcher(['"wall.*"', '"(?i)inlet.*"'])
+    assert matcher.match("INLET1") == '"(?i)inlet.*"'
+    assert matcher.match("wall1") == '"wall.*"'
+    assert matcher.match("WALL1") is None
+
+
+def test_matcher_tries_keys_in_turn_if_not_combined(monkeypatch):
+    compile = re.compile
+
+    def compile_single(pattern):
+        if "|(?P<" in pattern:
+            raise re.error("cannot combine")
+        return compile(pattern)
+
+    monkeypatch.setattr(re, "compile", compile_single)
+    matcher = PatchMatcher(['"in.*"', '"(inlet|outlet).*"'])
+    assert matcher.pattern is None
+    assert matcher.match("inlet1") == '"(inlet|outlet).*"'
+    assert matcher.match("intake") == '"in.*"'
+    assert matcher.match("top") is None
+
+
+def test_resolve_with_precedence(patch_index):
+    field = make_field(
+        {
+            "inlet1": "fixedValue",
+            '"(inlet|outlet).*"': "zeroGradient",
+            '"top"': "slip",
+            "walls": "noSlip",
+        }
+    )
+    patch_index.add_file("U", field_patches(field))
+
+    assert patch_index.resolve("U") == {
+        "inlet1": "inlet1",
+        "inlet2": '"(inlet|outlet).*"',
+        "outlet": '"(inlet|outlet).*"',
+        "top": '"top"',
+    }
+    assert patch_index.patch_type("U", "inlet2") == "zeroGradient"
+    assert not patch_index.missing_patches()
+
+
+def test_resolution_invalidated_on_edit(patch_index):
+    patch_index.add_file("p", field_patches(make_field({"walls": "noSlip"})))
+    assert patch_index.patch_type("p", "top") == "noSlip"
+    assert patch_index.missing_patches()["p"] == {"inlet1", "inlet2", "outlet"}
+
+    patch_index.add_file(
+        "p", field_patches(make_field({"walls": "noSlip", '".*"': "calculated"}))
+    )
+    assert patch_index.patch_type("p", "outlet") == "calculated"
+    assert "p" not in patch_index.missing_patches()
+
+    # the patches of the mesh changed
+    patch_index.add_file("boundary", {"side": "patch"}, mesh=True)
+    assert patch_index.resolve("p") == {"side": '".*"'}
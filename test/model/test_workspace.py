@@ -0,0 +1,98 @@
+import shutil
+import struct
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from model.workspace import Workspace
+
+TEMPLATE_DIR = Path(__file__).parents[2] / "templates" / "intermixingPhaseChangeFoam"
+
+
+@pytest.fixture
+def case_dirs(tmp_path):
+    case_paths = []
+    for name in ["case1", "case2", "case3"]:
+        case_path = tmp_path / name
+        shutil.copytree(TEMPLATE_DIR, case_path)
+        case_paths.append(case_path)
+    yield case_paths
+
+
+@pytest.fixture
+def workspace():
+    yield Workspace(MagicMock(), max_open_cases=2)
+
+
+def boundary_field(database, case_dir: Path):
+    return database.get_dict().get_nested_value(
+        [str(case_dir / "0"), str(case_dir / "0" / "U"), "boundaryField"]
+    )
+
+
+def test_open_case_reuses_database(workspace, case_dirs):
+    database = workspace.open_case(str(case_dirs[0]))
+    assert workspace.open_case(str(case_dirs[0])) is database
+
+
+def test_identical_files_shared_between_cases(workspace, case_dirs):
+    db1 = workspace.open_case(str(case_dirs[0]))
+    db2 = workspace.open_case(str(case_dirs[1]))
+
+    assert boundary_field(db1, case_dirs[0]) is boundary_field(db2, case_dirs[1])
+    assert workspace.content_store.file_hits == len(db2.file_stats)
+
+
+def test_identical_subtrees_shared_within_file(workspace, case_dirs):
+    database = workspace.open_case(str(case_dirs[0]))
+    nut = database.get_dict().get_nested_value(
+        [str(case_dirs[0] / "0"), str(case_dirs[0] / "0" / "nut"), "boundaryField"]
+    )
+    assert nut["side"] is nut["outlet"] is nut["inlet"]
+
+
+def test_edit_does_not_leak_between_cases(workspace, case_dirs):
+    db1 = workspace.open_case(str(case_dirs[0]))
+    db2 = workspace.open_case(str(case_dirs[1]))
+    key_path = [str(case_dirs[0] / "0"), str(case_dirs[0] / "0" / "U")]
+
+    db1.get_dict().update_nested_value(
+        key_path + ["boundaryField", "model"], "type", "slip"
+    )
+
+    assert boundary_field(db1, case_dirs[0])["model"]["type"] == "slip"
+    assert boundary_field(db2, case_dirs[1])["model"]["type"] == "noSlip"
+    # siblings of the edited path stay shared
+    assert (
+        boundary_field(db1, case_dirs[0])["outlet"]
+        is boundary_field(db2, case_dirs[1])["outlet"]
+    )
+
+
+def test_least_recently_used_case_closed(workspace, case_dirs):
+    closed = []
+    workspace.case_closed.connect(closed.append)
+
+    workspace.open_case(str(case_dirs[0]))
+    workspace.open_case(str(case_dirs[1]))
+    workspace.open_case(str(case_dirs[0]))
+    workspace.open_case(str(case_dirs[2]))
+
+    assert closed == [str(case_dirs[1])]
+    assert workspace.get_open_cases() == [str(case_dirs[0]), str(case_dirs[2])]
+
+
+def test_snapshot_save_failure_reported(workspace, case_dirs, monkeypatch):
+    failures = []
+    workspace.snapshot_save_failed.connect(lambda *args: failures.append(args))
+    database = workspace.open_case(str(case_dirs[0]))
+
+    def fail():
+        raise struct.error("argument out of range")
+
+    monkeypatch.setattr(database, "save_snapshot", fail)
+    workspace.close_case(str(case_dirs[0]))
+
+    assert failures == [(str(case_dirs[0]), "argument out of range")]
+    assert workspace.get_open_cases() == []
@@ -164,3 +164,8 @@ DROPDOWN_CHOICES = {
     "Coupled": coupled_boundary_conditions,
     "Generic": generic_boundary_conditions,
 }
+
+# the names of every boundary condition of the choices
+BOUNDARY_CONDITIONS = frozenset(
+    condition for conditions in DROPDOWN_CHOICES.values() for condition in conditions
+)
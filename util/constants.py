@@ -10,6 +10,17 @@ VALUE = "value"
 NONUNIFORM = "nonuniform"
 UNIFORM = "uniform"
 
+# Default memory budget for parsed file trees, in megabytes
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+# Default number of cases kept open in the workspace
+DEFAULT_MAX_OPEN_CASES = 8
+
+# Name of the workspace snapshot file saved in the case directory
+SNAPSHOT_FILE_NAME = ".foamgui.snapshot"
+
+BOUNDARY_MESH_CLASS = "polyBoundaryMesh"
+
 
 class ModelUpdateType(Enum):
     KEY = auto()
@@ -29,6 +40,14 @@ class ModelDeleteType(Enum):
     CLEAR_DICT = auto()
 
 
+class ChangeType(Enum):
+    INSERT = auto()
+    RENAME = auto()
+    UPDATE = auto()
+    REMOVE = auto()
+    CLEAR = auto()
+
+
 class CaseDirMode(Enum):
     NEW = auto()
     EXISTING = auto()
@@ -49,3 +68,4 @@ class DictMenuFlag(IntFlag):
     FILE = auto()
     SUB_DIR = auto()
     BOUNDARY_FIELD = auto()
+    PATCH = auto()
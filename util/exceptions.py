@@ -11,6 +11,13 @@ class DictionaryError(Exception):
         super().__init__(message, *args)
 
 
+class SharedDictionaryError(DictionaryError):
+    """Raised when a dictionary shared between several trees is modified in place"""
+
+    def __init__(self, message: str, *args: object) -> None:
+        super().__init__(message, *args)
+
+
 class DirectoryExistsError(FileExistsError):
     """Raised when an existing directory is provided as an empty directory"""
 
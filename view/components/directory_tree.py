@@ -1,8 +1,13 @@
 from PyQt6.QtCore import QModelIndex, QPoint, QSize, pyqtSignal
-from PyQt6.QtGui import QContextMenuEvent, QStandardItem
+from PyQt6.QtGui import QContextMenuEvent
 from PyQt6.QtWidgets import QMenu, QTreeView
 
-from model.model import DictionaryEntryItem, OrderedDictItem, OrderedDictModel
+from model.model import (
+    DictionaryEntryItem,
+    ModelItem,
+    OrderedDictItem,
+    OrderedDictModel,
+)
 from util.constants import DictMenuFlag, ODictType
 
 
@@ -73,7 +78,7 @@ class DirectoryTree(QTreeView):
             return QSize(window.size().width() // 2, window.size().height())
         return super().sizeHint()
 
-    def get_dict_menu_flag(self, item: QStandardItem):
+    def get_dict_menu_flag(self, item: ModelItem):
         parent_item = item.parent()
         if not parent_item:
             return DictMenuFlag.SUB_DIR
@@ -91,6 +96,8 @@ class DirectoryTree(QTreeView):
             and item.data(OrderedDictItem.ROLE_TYPE) == ODictType.BOUNDARY_FIELD
         ):
             return DictMenuFlag.BOUNDARY_FIELD
+        elif parent_type == ODictType.BOUNDARY_FIELD:
+            return DictMenuFlag.PATCH
         else:
             return DictMenuFlag.NONE
 
@@ -1,38 +1,352 @@
+import time
+
 from PyQt6.QtCore import (
     QItemSelection,
     QModelIndex,
-    QPersistentModelIndex,
     QSize,
+    QTimer,
     pyqtSignal,
 )
+from PyQt6.QtGui import QStandardItem
 from PyQt6.QtWidgets import (
-    QFormLayout,
+    QAbstractScrollArea,
     QFrame,
-    QLabel,
+    QHBoxLayout,
     QLineEdit,
     QPushButton,
-    QScrollArea,
-    QStackedLayout,
     QVBoxLayout,
     QWidget,
 )
 
 from controller.custom_combo_box_controller import CustomComboBoxController
-from model.model import (
-    DictionaryEntryItem,
-    OrderedDictItem,
-    OrderedDictModel,
-    QStandardItem,
-)
-from util.boundary_conditions import DROPDOWN_CHOICES
+from model.model import ModelItem, OrderedDictItem, OrderedDictModel
+from util.boundary_conditions import BOUNDARY_CONDITIONS, DROPDOWN_CHOICES
 from util.constants import ODictType
 from view.components.custom_combo_box import CustomComboBox
 from view.components.information_display import InformationDisplay
 
 
+def is_boundary_condition(test_value: str) -> bool:
+    """
+    The function checks if the test_value is a valid boundary condition value
+    in OpenFOAM.
+    """
+    return test_value in BOUNDARY_CONDITIONS
+
+
+class FormRow(QWidget):
+    """
+    A row of the form, showing the key of an entry and either its value or a button
+    to go to its dictionary. Rows are recycled: a row is bound to another entry
+    whenever the entry it shows is scrolled out of view.
+
+    Attributes:
+        item (ModelItem | None): The entry shown by the row.
+        key_field (QLineEdit): The field with the key of the entry.
+        value_field (QLineEdit): The field with the value of the entry.
+        combo_box (CustomComboBox | None): The choices of boundary condition, created
+            the first time the row shows a boundary condition.
+        goto_button (QPushButton): The button to go to the dictionary of the entry.
+    """
+
+    key_edited = pyqtSignal(QModelIndex, str)
+    value_edited = pyqtSignal(QModelIndex, str)
+    choice_edited = pyqtSignal(QModelIndex, str)
+    go_to_pressed = pyqtSignal(object)
+    combo_highlighted = pyqtSignal(QStandardItem)
+    combo_closed = pyqtSignal()
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.item: ModelItem | None = None
+
+        self.row_layout = QHBoxLayout()
+        self.row_layout.setContentsMargins(4, 2, 4, 2)
+        self.setLayout(self.row_layout)
+
+        self.key_field = QLineEdit(self)
+        self.key_field.editingFinished.connect(self.on_key_editing_finished)
+        self.row_layout.addWidget(self.key_field, 1)
+
+        self.value_field = QLineEdit(self)
+        self.value_field.editingFinished.connect(self.on_value_editing_finished)
+        self.row_layout.addWidget(self.value_field, 2)
+
+        self.goto_button = QPushButton(self)
+        self.goto_button.clicked.connect(lambda: self.go_to_pressed.emit(self.item))
+        self.row_layout.addWidget(self.goto_button, 2)
+
+        self.combo_box: CustomComboBox | None = None
+        self.combo_box_controller: CustomComboBoxController | None = None
+
+    def create_combo_box(self) -> CustomComboBox:
+        combo_box = CustomComboBox(self)
+        self.combo_box_controller = CustomComboBoxController(
+            combo_box, DROPDOWN_CHOICES
+        )
+        self.combo_box_controller.combo_item_highlighted.connect(
+            self.combo_highlighted
+        )
+        self.combo_box_controller.combo_focus_lost.connect(self.combo_closed)
+        combo_box.currentTextChanged.connect(self.on_choice_changed)
+        self.row_layout.insertWidget(1, combo_box, 2)
+        return combo_box
+
+    def bind(self, item: ModelItem | None, refresh: bool = False):
+        """
+        Shows an entry in the row.
+
+        Parameters:
+        -----------
+            item (ModelItem | None): The entry to show, or None to clear the row.
+            refresh (bool): Whether to read the entry again if the row already shows
+                it, e.g. after it was edited.
+        """
+        if item is self.item and not refresh:
+            return
+        if item is not self.item:
+            # the edits not yet finished apply to the entry shown until now
+            self.commit()
+        # the edits not yet finished of the entry shown are kept on refresh
+        keep_key = item is self.item and self.key_field.isModified()
+        keep_value = item is self.item and self.value_field.isModified()
+        self.item = item
+        if item is None:
+            return
+
+        is_dict = isinstance(item, OrderedDictItem)
+        if not keep_key:
+            self.key_field.setText(item.text() if is_dict else str(item.key))
+        self.key_field.setReadOnly(
+            is_dict
+            and item.item_type() not in [ODictType.OTHER, ODictType.BOUNDARY_FIELD]
+        )
+
+        self.goto_button.setVisible(is_dict)
+        if is_dict:
+            self.goto_button.setText(f"Go to '{item.text()}'")
+            self.value_field.hide()
+            if self.combo_box:
+                self.combo_box.hide()
+            return
+
+        value = item.value  # type: ignore
+        has_value = not item.no_value()  # type: ignore
+        is_choice = has_value and is_boundary_condition(value)
+        if is_choice and self.combo_box is None:
+            self.combo_box = self.create_combo_box()
+        if self.combo_box:
+            self.combo_box.setVisible(is_choice)
+            if is_choice:
+                # the choice shown is not an edit of the entry
+                self.combo_box.blockSignals(True)
+                self.combo_box.set_current_choice(value)
+                self.combo_box.blockSignals(False)
+        self.value_field.setVisible(has_value and not is_choice)
+        if not keep_value:
+            self.value_field.setText(value)
+
+    def commit(self):
+        """Emits the edits of the fields of the row which are not yet finished."""
+        if self.key_field.isModified():
+            self.on_key_editing_finished()
+        if self.value_field.isModified():
+            self.on_value_editing_finished()
+
+    def item_index(self) -> QModelIndex:
+        # the entry shown may have been removed since it was bound to the row
+        return QModelIndex() if self.item is None else self.item.index()
+
+    def on_key_editing_finished(self):
+        if not self.key_field.isModified():
+            return
+        self.key_field.setModified(False)
+        index = self.item_index()
+        if index.isValid():
+            self.key_edited.emit(index, self.key_field.text())
+
+    def on_value_editing_finished(self):
+        if not self.value_field.isModified():
+            return
+        self.value_field.setModified(False)
+        index = self.item_index()
+        if index.isValid():
+            self.value_edited.emit(index, self.value_field.text())
+
+    def on_choice_changed(self, text: str):
+        index = self.item_index()
+        if index.isValid():
+            self.choice_edited.emit(index, text)
+
+
+class FormView(QAbstractScrollArea):
+    """
+    A virtualized form of the entries of a dictionary. Only the rows in view have a
+    widget, taken from a pool of rows which grows with the height of the view rather
+    than with the number of entries, so that the memory used by the form stays the
+    same however many entries are shown.
+
+    Attributes:
+        parent_item (ModelItem | None): The dictionary whose entries are shown, or the
+            entry shown if it is not a dictionary.
+        row_count (int): The number of rows of the form.
+        rows (list[FormRow]): The pool of rows. The row of the form at position i is
+            shown by rows[i % len(rows)], so rows stay bound to their entry while
+            they are in view.
+        row_height (int): The height of every row, in pixels.
+        load_timer (QTimer): Timer creating the handles of the entries of a large
+            dictionary from the event loop, a time slice at a time, while the entries
+            created so far are shown.
+    """
+
+    # entries whose handles are created between two checks of the time slice
+    CHUNK_SIZE = 200
+    # time spent creating handles before returning to the event loop, in seconds
+    LOAD_SLICE = 0.01
+
+    key_edited = pyqtSignal(QModelIndex, str)
+    value_edited = pyqtSignal(QModelIndex, str)
+    choice_edited = pyqtSignal(QModelIndex, str)
+    go_to_pressed = pyqtSignal(object)
+    combo_highlighted = pyqtSignal(QStandardItem)
+    combo_closed = pyqtSignal()
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.parent_item: ModelItem | None = None
+        self.row_count = 0
+        self.rows: list[FormRow] = []
+        # the rows of the form in view
+        self.first_row = 0
+        self.visible = 0
+        self.row_height = self.create_row().sizeHint().height()
+        self.verticalScrollBar().setSingleStep(self.row_height)  # type: ignore
+
+        self.load_timer = QTimer(self)
+        self.load_timer.setInterval(0)
+        self.load_timer.timeout.connect(self.on_load_timeout)
+
+    def create_row(self) -> FormRow:
+        row = FormRow(self.viewport())
+        row.key_edited.connect(self.key_edited)
+        row.value_edited.connect(self.value_edited)
+        row.choice_edited.connect(self.choice_edited)
+        row.go_to_pressed.connect(self.go_to_pressed)
+        row.combo_highlighted.connect(self.combo_highlighted)
+        row.combo_closed.connect(self.combo_closed)
+        row.hide()
+        self.rows.append(row)
+        return row
+
+    def set_parent_item(self, parent_item: ModelItem | None):
+        """
+        Shows the entries of a dictionary, or a single entry, scrolling back to the
+        top if another dictionary was shown, and reading every row in view again.
+        """
+        if parent_item is not self.parent_item:
+            # the entries of the dictionary shown before are no longer created
+            self.load_timer.stop()
+            self.parent_item = parent_item
+            self.verticalScrollBar().setValue(0)  # type: ignore
+        if self.is_loading() and not self.load_entries():
+            self.load_timer.start()
+        self.row_count = self.count_rows(parent_item)
+        self.update_scroll_range()
+        self.layout_rows(refresh=True)
+
+    def is_loading(self) -> bool:
+        """Returns whether the handles of the entries shown are being created."""
+        parent_item = self.parent_item
+        return isinstance(parent_item, OrderedDictItem) and not parent_item.is_loaded()
+
+    def load_entries(self) -> bool:
+        """
+        Creates the handles of the entries shown for a time slice, and returns
+        whether they have all been created.
+        """
+        deadline = time.perf_counter() + self.LOAD_SLICE
+        while not self.parent_item.load_children(self.CHUNK_SIZE):  # type: ignore
+            if time.perf_counter() >= deadline:
+                return False
+        return True
+
+    def on_load_timeout(self):
+        if not self.is_loading() or self.load_entries():
+            self.load_timer.stop()
+        self.row_count = self.count_rows(self.parent_item)
+        self.update_scroll_range()
+        self.layout_rows()
+
+    def count_rows(self, parent_item: ModelItem | None) -> int:
+        if isinstance(parent_item, OrderedDictItem):
+            return len(parent_item.partial_children())
+        return 0 if parent_item is None else 1
+
+    def item_at(self, row: int) -> ModelItem | None:
+        if isinstance(self.parent_item, OrderedDictItem):
+            children = self.parent_item.partial_children()
+            return children[row] if 0 <= row < len(children) else None
+        return self.parent_item
+
+    def update_scroll_range(self):
+        height = self.viewport().height()  # type: ignore
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setPageStep(height)  # type: ignore
+        scroll_bar.setRange(  # type: ignore
+            0, max(0, self.row_count * self.row_height - height)
+        )
+
+    def layout_rows(self, refresh: bool = False):
+        """Binds the rows of the pool to the entries in view, and places them."""
+        offset = self.verticalScrollBar().value()  # type: ignore
+        first_row = offset // self.row_height
+        # rows partly in view at the top and the bottom
+        in_view = self.viewport().height() // self.row_height + 2  # type: ignore
+        visible = max(0, min(in_view, self.row_count - first_row))
+        while len(self.rows) < visible:
+            self.create_row()
+        self.first_row, self.visible = first_row, visible
+
+        # rows showing an entry out of view are cleared, so edits apply first
+        shown = {(first_row + i) % len(self.rows) for i in range(visible)}
+        for position, row in enumerate(self.rows):
+            if position not in shown:
+                row.hide()
+                row.bind(None)
+
+        width = self.viewport().width()  # type: ignore
+        for i in range(visible):
+            row_number = first_row + i
+            row = self.rows[row_number % len(self.rows)]
+            row.bind(self.item_at(row_number), refresh)
+            row.setGeometry(
+                0, row_number * self.row_height - offset, width, self.row_height
+            )
+            row.show()
+
+    def update_rows(self, first: int, last: int):
+        """Reads the entries of the rows from first to last again, if in view."""
+        first = max(first, self.first_row)
+        last = min(last, self.first_row + self.visible - 1)
+        for row_number in range(first, last + 1):
+            row = self.rows[row_number % len(self.rows)]
+            row.bind(self.item_at(row_number), refresh=True)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scroll_range()
+        self.layout_rows()
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        self.layout_rows()
+
+    def sizeHint(self) -> QSize:
+        return QSize(super().sizeHint().width(), self.row_height * 10)
+
+
 class FieldEditor(QFrame):
     current_selection_changed = pyqtSignal(QItemSelection)
-    go_to_item = pyqtSignal(QStandardItem)
+    go_to_item = pyqtSignal(object)
     combobox_highlighted = pyqtSignal(QStandardItem)
     combobox_closed = pyqtSignal()
     add_field = pyqtSignal()
@@ -60,17 +374,26 @@ class FieldEditor(QFrame):
         self.main_layout = QVBoxLayout()
         self.setLayout(self.main_layout)
 
-        # Stacked layout which displays the various form views
-        self.stacked_layout = QStackedLayout()
-        self.main_layout.addLayout(self.stacked_layout)
+        # Form of the current selection, reused for every selection
+        self.form_view = FormView(self)
+        self.form_view.key_edited.connect(self.key_updated)
+        self.form_view.value_edited.connect(self.value_updated)
+        self.form_view.choice_edited.connect(self.combobox_updated)
+        self.form_view.go_to_pressed.connect(self.on_goto_button_pressed)
+        self.form_view.combo_highlighted.connect(self.on_combo_item_highlighted)
+        self.form_view.combo_closed.connect(self.on_combo_closed)
+        self.main_layout.addWidget(self.form_view)
+
+        # button for easier adding of fields
+        self.add_button = QPushButton("Add...", self)
+        self.add_button.clicked.connect(self.on_add_btn_pressed)
+        self.add_button.hide()
+        self.main_layout.addWidget(self.add_button)
 
         # Information display of highlighted selection
         self.information_display = InformationDisplay(self)
         self.main_layout.addWidget(self.information_display)
 
-        # Maps model indexes to the button they are associated with
-        self.index_to_button: dict[QPersistentModelIndex, QPushButton] = {}
-
     def sizeHint(self) -> QSize:
         window = self.window()
         if window:
@@ -78,111 +401,19 @@ class FieldEditor(QFrame):
         return super().sizeHint()
 
     def is_boundary_condition(self, test_value: str):
+        return is_boundary_condition(test_value)
+
+    def set_form_item(self, parent_item: ModelItem | None):
         """
-        The function checks if the test_value is a valid boundary condition value
-        in OpenFOAM.
+        Shows the entries of a dictionary in the form, or a single entry if it is not
+        a dictionary.
         """
-        for condition_dict in DROPDOWN_CHOICES.values():
-            if test_value in condition_dict.keys():
-                return True
-        return False
-
-    def add_odict_item(self, item: OrderedDictItem | QStandardItem, form: QFormLayout):
-        item_type = item.data(OrderedDictItem.ROLE_TYPE)
-        key_field = QLineEdit(item.text())
-        if item_type not in [ODictType.OTHER, ODictType.BOUNDARY_FIELD]:
-            key_field.setReadOnly(True)
-        goto_button = QPushButton(f"Go to '{item.text()}'", self)
-        goto_button.clicked.connect(lambda: self.on_goto_button_pressed(item))
-        form.addRow(key_field, goto_button)
-
-        # Map the item to the button for future updates
-        self.index_to_button[QPersistentModelIndex(item.index())] = goto_button
-
-        self.emit_changes(item, key_field, goto_button)
-
-    def add_kv_pair(self, item: DictionaryEntryItem, form: QFormLayout):
-        key_field = QLineEdit(item.key)
-
-        if self.is_boundary_condition(item.value):
-            value_field = CustomComboBox(self)
-            combo_box_controller = CustomComboBoxController(
-                value_field, DROPDOWN_CHOICES, item.value
-            )
-            combo_box_controller.combo_item_highlighted.connect(
-                self.on_combo_item_highlighted
-            )
-            combo_box_controller.combo_focus_lost.connect(self.on_combo_closed)
-        else:
-            value_field = QLineEdit(item.value)
-
-        if item.no_value():
-            form.addRow(key_field)
-        else:
-            form.addRow(key_field, value_field)
-
-        self.emit_changes(item, key_field, value_field)
+        self.form_view.set_parent_item(parent_item)
+        self.add_button.setVisible(isinstance(parent_item, OrderedDictItem))
 
-    def emit_changes(
-        self,
-        item: QStandardItem | OrderedDictItem | DictionaryEntryItem,
-        key_field: QLineEdit | QLabel,
-        value_field: QLineEdit | QPushButton | CustomComboBox,
-    ):
-        if isinstance(key_field, QLineEdit):
-            key_field.editingFinished.connect(
-                lambda: self.key_updated.emit(item.index(), key_field.text())
-            )
-
-        if isinstance(value_field, QLineEdit):
-            value_field.editingFinished.connect(
-                lambda: self.value_updated.emit(item.index(), value_field.text())
-            )
-
-        if isinstance(value_field, CustomComboBox):
-            value_field.currentTextChanged.connect(
-                lambda: self.combobox_updated.emit(
-                    item.index(), value_field.currentText()
-                )
-            )
-
-    def create_form_widget(
-        self, parent_item: QStandardItem | OrderedDictItem | DictionaryEntryItem | None
-    ):
-        if not parent_item:
-            return
-
-        form_widget = QWidget(self)
-        form_layout = QFormLayout()
-        form_widget.setLayout(form_layout)
-
-        if not parent_item.hasChildren() and isinstance(
-            parent_item, DictionaryEntryItem
-        ):
-            # we have a dictionary entry item
-            self.add_kv_pair(parent_item, form_layout)
-        elif isinstance(parent_item, (QStandardItem, OrderedDictItem)):
-            for row in range(parent_item.rowCount()):
-                item = parent_item.child(row)
-                if item:
-                    if isinstance(item, DictionaryEntryItem):
-                        self.add_kv_pair(item, form_layout)
-                    elif isinstance(item, OrderedDictItem):
-                        self.add_odict_item(item, form_layout)
-
-            # button for easier adding of fields
-            add_btn = QPushButton("Add...", form_widget)
-            add_btn.clicked.connect(self.on_add_btn_pressed)
-            form_layout.addRow(add_btn)
-
-        return form_widget
-
-    def update_form_widget(self, widget: QWidget):
-        self.scroll_area = QScrollArea(self)
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setWidget(widget)
-        self.stacked_layout.addWidget(self.scroll_area)
-        self.stacked_layout.setCurrentWidget(self.scroll_area)
+    def update_rows(self, first: int, last: int):
+        """Reads the entries of the rows from first to last of the form again."""
+        self.form_view.update_rows(first, last)
 
     def on_combo_item_highlighted(self, item: QStandardItem):
         self.combobox_highlighted.emit(item)
@@ -190,19 +421,13 @@ class FieldEditor(QFrame):
     def on_combo_closed(self):
         self.combobox_closed.emit()
 
-    def on_goto_button_pressed(self, item: QStandardItem):
+    def on_goto_button_pressed(self, item: OrderedDictItem):
         self.go_to_item.emit(item)
-
-        widget = self.create_form_widget(item)
-        if widget:
-            self.update_form_widget(widget)
+        self.set_form_item(item)
 
     def on_add_btn_pressed(self):
         self.add_field.emit()
 
-    def get_button_from_index(self, index: QPersistentModelIndex):
-        return self.index_to_button.get(index)
-
     def update_info_display(self, text: str):
         self.information_display.set_information(text)
 
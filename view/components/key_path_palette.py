@@ -0,0 +1,109 @@
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QKeyEvent
+from PyQt6.QtWidgets import (
+    QDialog,
+    QLabel,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+
+class KeyPathPalette(QDialog):
+    """
+    A popup to go to an entry of the open case by typing a fuzzy dotted key path, such
+    as `U.bF.waterin.type`, listing the key paths matched as the user types.
+
+    Attributes:
+        query_changed (pyqtSignal): Signal emitted with the query typed.
+        key_path_activated (pyqtSignal): Signal emitted with the key path chosen.
+    """
+
+    QUERY_DELAY_MS = 50
+
+    query_changed = pyqtSignal(str)
+    key_path_activated = pyqtSignal(tuple)
+
+    def __init__(self, parent: QWidget | None = None):
+        super().__init__(parent, Qt.WindowType.Popup)
+        self.setMinimumWidth(500)
+        layout = QVBoxLayout()
+
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Go to key path, e.g. U.bF.inlet.type")
+        self.query_edit.installEventFilter(self)
+        layout.addWidget(self.query_edit)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.match_list = QListWidget()
+        layout.addWidget(self.match_list)
+        self.setLayout(layout)
+
+        # waits for the user to stop typing before matching
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(self.QUERY_DELAY_MS)
+        self.query_timer.timeout.connect(self.emit_query)
+        self.query_edit.textChanged.connect(self.query_timer.start)
+        self.query_edit.returnPressed.connect(self.activate_current)
+        self.match_list.itemActivated.connect(self.on_item_activated)
+
+    def open_palette(self):
+        parent = self.parentWidget()
+        if parent is not None:
+            # centred near the top of the window, like a menu
+            top_center = parent.mapToGlobal(parent.rect().center())
+            top = parent.mapToGlobal(parent.rect().topLeft()).y() + 50
+            self.move(top_center.x() - self.width() // 2, top)
+        self.show()
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+
+    def emit_query(self):
+        self.query_timer.stop()
+        self.query_changed.emit(self.query_edit.text())
+
+    def set_matches(self, matches: list[tuple[str, tuple]]):
+        """Lists the key paths matched, with the text shown for each of them."""
+        self.match_list.clear()
+        for text, key_path in matches:
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, key_path)
+            self.match_list.addItem(item)
+        if matches:
+            self.match_list.setCurrentRow(0)
+        self.status_label.setText(f"{len(matches)} key paths found")
+
+    def set_error(self, message: str):
+        self.status_label.setText(message)
+
+    def activate_current(self):
+        # the query typed last may not have been matched yet
+        if self.query_timer.isActive():
+            self.emit_query()
+        item = self.match_list.currentItem()
+        if item is not None:
+            self.on_item_activated(item)
+
+    def on_item_activated(self, item: QListWidgetItem):
+        self.hide()
+        self.key_path_activated.emit(item.data(Qt.ItemDataRole.UserRole))
+
+    def eventFilter(self, obj, event) -> bool:
+        # moves through the key paths found while typing
+        if (
+            obj is self.query_edit
+            and isinstance(event, QKeyEvent)
+            and event.type() == QKeyEvent.Type.KeyPress
+            and event.key() in (Qt.Key.Key_Up, Qt.Key.Key_Down)
+        ):
+            step = -1 if event.key() == Qt.Key.Key_Up else 1
+            row = self.match_list.currentRow() + step
+            if 0 <= row < self.match_list.count():
+                self.match_list.setCurrentRow(row)
+            return True
+        return super().eventFilter(obj, event)
@@ -0,0 +1,105 @@
+from pathlib import Path
+
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from model.search_index import SearchMatch
+
+
+class SearchPanel(QWidget):
+    """
+    A panel to search the keys and values of the open case, listing the entries found.
+
+    The query is sent once the user stops typing for a moment, and activating an
+    entry found requests the directory tree to show it.
+
+    Attributes:
+        query_changed (pyqtSignal): Signal emitted with the query, whether it is a
+            regular expression and whether its case must match.
+        match_activated (pyqtSignal): Signal emitted with the key path of the entry
+            found activated.
+    """
+
+    QUERY_DELAY_MS = 150
+
+    query_changed = pyqtSignal(str, bool, bool)
+    match_activated = pyqtSignal(tuple)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Search keys and values...")
+        self.query_edit.setClearButtonEnabled(True)
+        layout.addWidget(self.query_edit)
+
+        options_layout = QHBoxLayout()
+        self.regex_check_box = QCheckBox("Regex")
+        self.case_check_box = QCheckBox("Match case")
+        options_layout.addWidget(self.regex_check_box)
+        options_layout.addWidget(self.case_check_box)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        self.match_list = QListWidget()
+        layout.addWidget(self.match_list)
+        self.setLayout(layout)
+
+        # waits for the user to stop typing before searching
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(self.QUERY_DELAY_MS)
+        self.query_timer.timeout.connect(self.emit_query)
+        self.query_edit.textChanged.connect(self.query_timer.start)
+        self.query_edit.returnPressed.connect(self.emit_query)
+        self.regex_check_box.toggled.connect(self.query_timer.start)
+        self.case_check_box.toggled.connect(self.query_timer.start)
+        self.match_list.itemActivated.connect(self.on_item_activated)
+
+    def focus_query(self):
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+
+    def emit_query(self):
+        self.query_timer.stop()
+        self.query_changed.emit(
+            self.query_edit.text(),
+            self.regex_check_box.isChecked(),
+            self.case_check_box.isChecked(),
+        )
+
+    def set_matches(self, matches: list[SearchMatch], limit: int | None = None):
+        self.match_list.clear()
+        for match in matches:
+            file_path = Path(match.path_str)
+            names = [f"{file_path.parent.name}/{file_path.name}"]
+            names += [str(key) for key in match.nested_keys()]
+            item = QListWidgetItem(f"{' > '.join(names)}  ({match.text})")
+            item.setData(Qt.ItemDataRole.UserRole, match.key_path)
+            self.match_list.addItem(item)
+
+        if limit is not None and len(matches) >= limit:
+            self.status_label.setText(f"First {len(matches)} entries found")
+        else:
+            self.status_label.setText(f"{len(matches)} entries found")
+
+    def set_error(self, message: str):
+        self.match_list.clear()
+        self.status_label.setText(message)
+
+    def on_item_activated(self, item: QListWidgetItem):
+        self.match_activated.emit(item.data(Qt.ItemDataRole.UserRole))
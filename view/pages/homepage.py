@@ -1,10 +1,15 @@
-from PyQt6.QtCore import QPoint, QSettings, QSize, Qt
+from functools import partial
+
+from PyQt6.QtCore import QObject, QPoint, QSettings, QSize, Qt
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import (
     QFrame,
+    QLabel,
     QMainWindow,
     QMenu,
     QMessageBox,
+    QProgressBar,
+    QPushButton,
     QSplitter,
     QStatusBar,
     QVBoxLayout,
@@ -15,12 +20,16 @@ from controller.commands.command_handler import CommandHandler
 from controller.crud_manager import CRUDManager
 from controller.directory_tree_controller import DirectoryTreeController
 from controller.form_controller import FieldEditorController
+from controller.key_path_palette_controller import KeyPathPaletteController
+from controller.search_controller import SearchController
 from env_var.environment import EnvironmentVariables
-from model.database import Database
 from model.model import OrderedDictModel
-from util.constants import CaseDirMode
+from model.workspace import Workspace
+from util.constants import DEFAULT_MEMORY_BUDGET_MB, CaseDirMode
 from view.components.directory_tree import DirectoryTree
 from view.components.form import FieldEditor
+from view.components.key_path_palette import KeyPathPalette
+from view.components.search_panel import SearchPanel
 from view.pages.setup_wizard import SetupMode, SetupWizard
 
 
@@ -46,9 +55,12 @@ class MainWindow(QMainWindow):
         self.new_case_action.triggered.connect(self.on_new_case)
         self.open_case_action = QAction("Open case...")
         self.open_case_action.triggered.connect(self.on_open_case)
+        self.switch_case_menu = QMenu("Switch case", self)
+        self.switch_case_menu.aboutToShow.connect(self.populate_switch_case_menu)
         self.file_menu.addAction(self.new_case_action)
         self.file_menu.addSeparator()
         self.file_menu.addAction(self.open_case_action)
+        self.file_menu.addMenu(self.switch_case_menu)
 
         self.edit_menu = QMenu("Edit", self)
         self.undo_action = QAction("Undo", self)
@@ -61,7 +73,15 @@ class MainWindow(QMainWindow):
         self.fullscreen_action = QAction("Fullscreen")
         self.fullscreen_action.setCheckable(True)
         self.fullscreen_action.toggled.connect(self.toggle_fullscreen)
-        self.view_menu.addAction(self.fullscreen_action)
+        self.search_action = QAction("Search case...", self)
+        self.search_action.setShortcut("Ctrl+Shift+F")
+        self.search_action.triggered.connect(self.show_search_panel)
+        self.key_path_action = QAction("Go to key path...", self)
+        self.key_path_action.setShortcut("Ctrl+P")
+        self.key_path_action.triggered.connect(self.show_key_path_palette)
+        self.view_menu.addActions(
+            [self.fullscreen_action, self.search_action, self.key_path_action]
+        )
 
         self.help_menu = QMenu("Help", self)
         self.documentation_action = QAction("Go to documentation...", self)
@@ -79,31 +99,76 @@ class MainWindow(QMainWindow):
         self.status_bar.showMessage("Ready")
         self.setStatusBar(self.status_bar)
 
+        # memory usage of the case files, shown at the right of the status bar
+        self.memory_label = QLabel(self)
+        self.status_bar.addPermanentWidget(self.memory_label)
+
+        # progress of a case being loaded in the background, which can be cancelled
+        self.loading_progress_bar = QProgressBar(self)
+        self.loading_progress_bar.setMaximumWidth(200)
+        self.loading_progress_bar.setFormat("Loading %v / %m files")
+        self.cancel_loading_button = QPushButton("Cancel", self)
+        self.cancel_loading_button.clicked.connect(self.on_cancel_loading)
+        self.status_bar.addPermanentWidget(self.loading_progress_bar)
+        self.status_bar.addPermanentWidget(self.cancel_loading_button)
+        self.loading_progress_bar.hide()
+        self.cancel_loading_button.hide()
+
+        # cases open at the same time, with the model and undo history of each case
+        self.workspace = Workspace(self.env_var, memory_budget=self.read_memory_budget())
+        self.workspace.case_closed.connect(self.on_case_closed)
+        self.workspace.snapshot_save_failed.connect(self.on_snapshot_save_failed)
+        self.case_sessions: dict[str, tuple[OrderedDictModel, CommandHandler]] = {}
+        # controllers and popups of the case shown, which are connected to its model
+        # and disposed of when another case is shown
+        self.case_objects: list[QObject] = []
+        # created with the other widgets of the case shown
+        self.search_panel: SearchPanel | None = None
+        self.key_path_palette: KeyPathPalette | None = None
+
         # upon change in case directory, refresh main window
         self.env_var.caseDirectoryChanged.connect(lambda: self.initUI)
 
     def initUI(self):
+        # the widgets of the previous case are deleted with the central widget they
+        # are replaced with, and its controllers and popups are deleted here
+        for case_object in self.case_objects:
+            case_object.deleteLater()
+
         self.central_widget = QWidget(self)
         self.main_layout = QVBoxLayout()
         self.central_widget.setLayout(self.main_layout)
 
-        # initialise database
-        self.database = Database(self.env_var)
-        self.database.initialise_from_case(self.env_var.get_case_directory())
-
-        # initialise item model
-        self.model = OrderedDictModel(self.database, self)
+        # initialise database, reusing it if the case is still open in the workspace,
+        # and load new cases in the background
+        case_dir = self.env_var.get_case_directory()
+        self.database = self.workspace.open_case(case_dir, background=True)
+
+        if case_dir not in self.case_sessions:
+            # initialise item model, which is filled as files are loaded
+            model = OrderedDictModel(self.database, self)
+            self.database.database_updated.connect(model.update_model)
+            self.database.directory_loaded.connect(model.insert_loaded_entry)
+            self.database.file_loaded.connect(model.insert_loaded_entry)
+            self.database.memory_stats_changed.connect(self.show_memory_stats)
+            self.database.loading_progress.connect(
+                partial(self.show_loading_progress, self.database)
+            )
+            self.database.loading_finished.connect(
+                partial(self.on_loading_finished, self.database)
+            )
+            self.database.file_load_failed.connect(self.on_file_load_failed)
+
+            # initialise command handler
+            self.case_sessions[case_dir] = (model, CommandHandler())
+        self.model, self.command_handler = self.case_sessions[case_dir]
+        self.show_memory_stats()
+        self.loading_progress_bar.setVisible(self.database.is_loading())
+        self.cancel_loading_button.setVisible(self.database.is_loading())
 
         # initialise manager for operations
         self.crud_manager = CRUDManager(self)
 
-        # initialise command handler
-        self.command_handler = CommandHandler()
-
-        # load database into model
-        self.model.load_model(self.database.get_dict(), self.model.invisibleRootItem())
-        self.database.database_updated.connect(self.model.update_model)
-
         # Create case files browser widget
         self.splitter = QSplitter(Qt.Orientation.Horizontal, self)
 
@@ -127,19 +192,44 @@ class MainWindow(QMainWindow):
             QFrame.Shape.StyledPanel | QFrame.Shadow.Plain
         )
         self.directory_tree.setStyleSheet("QTreeView { border: 1px solid gray; }")
-        self.splitter.addWidget(self.directory_tree)
+
+        # Search panel below the directory tree, shown on demand
+        self.search_panel = SearchPanel(self)
+        self.search_panel.hide()
+        self.search_controller = SearchController(
+            self.database, self.model, self.search_panel, self
+        )
+        self.tree_splitter = QSplitter(Qt.Orientation.Vertical, self)
+        self.tree_splitter.addWidget(self.directory_tree)
+        self.tree_splitter.addWidget(self.search_panel)
+        self.splitter.addWidget(self.tree_splitter)
+
+        # Palette to go to a key path, shown on demand
+        self.key_path_palette = KeyPathPalette(self)
+        self.key_path_palette_controller = KeyPathPaletteController(
+            self.database, self.model, self.key_path_palette, self
+        )
 
         # Create form view of current selection
         self.form = FieldEditor(self.model, self)
         self.form.setFrameStyle(QFrame.Shape.StyledPanel | QFrame.Shadow.Plain)
         self.form.setStyleSheet(
-            "QScrollArea, FieldEditor, InformationDisplay { border: 1px solid gray; }"
+            "FormView, FieldEditor, InformationDisplay { border: 1px solid gray; }"
         )
         self.form_controller = FieldEditorController(
             self.model, self.form, self.crud_manager, self.command_handler
         )
         self.splitter.addWidget(self.form)
 
+        self.case_objects = [
+            self.crud_manager,
+            self.directory_tree_controller,
+            self.search_controller,
+            self.key_path_palette,
+            self.key_path_palette_controller,
+            self.form_controller,
+        ]
+
         # Add slots to signals
         self.directory_tree_controller.tree_selection_changed.connect(
             self.form_controller.handle_selection_change
@@ -151,6 +241,12 @@ class MainWindow(QMainWindow):
         self.form_controller.jump_to_item.connect(
             self.directory_tree_controller.jump_to_item
         )
+        self.search_controller.jump_to_item.connect(
+            self.directory_tree_controller.jump_to_item
+        )
+        self.key_path_palette_controller.jump_to_item.connect(
+            self.directory_tree_controller.jump_to_item
+        )
 
         # Set widgets to be non-collapsible
         for index in range(self.splitter.count()):
@@ -182,6 +278,7 @@ class MainWindow(QMainWindow):
 
         if close == QMessageBox.StandardButton.Yes:
             self.write_settings()
+            self.workspace.close_all()
             event.accept()
         else:
             event.ignore()
@@ -192,6 +289,15 @@ class MainWindow(QMainWindow):
         else:
             self.showNormal()
 
+    def show_search_panel(self):
+        if self.search_panel is not None:
+            self.search_panel.show()
+            self.search_panel.focus_query()
+
+    def show_key_path_palette(self):
+        if self.key_path_palette is not None:
+            self.key_path_palette.open_palette()
+
     def show_status_message(self, message: str):
         status_bar = self.statusBar()
         if status_bar:
@@ -199,6 +305,65 @@ class MainWindow(QMainWindow):
         else:
             print("Status bar is not initialized.")
 
+    def populate_switch_case_menu(self):
+        self.switch_case_menu.clear()
+        for case_dir in reversed(self.workspace.get_open_cases()):
+            action = self.switch_case_menu.addAction(case_dir)
+            if action:
+                action.triggered.connect(
+                    lambda checked, case_dir=case_dir: self.switch_case(case_dir)
+                )
+
+    def switch_case(self, case_dir: str):
+        self.env_var.set_case_directory(case_dir)
+        self.initUI()
+
+    def on_case_closed(self, case_dir: str):
+        model, _ = self.case_sessions.pop(case_dir, (None, None))
+        if model:
+            model.deleteLater()
+
+    def on_snapshot_save_failed(self, case_dir: str, message: str):
+        self.show_status_message(f"Snapshot of {case_dir} not saved: {message}")
+
+    def show_loading_progress(self, database, done: int, total: int):
+        if database is not self.database:
+            return
+        self.loading_progress_bar.setRange(0, total)
+        self.loading_progress_bar.setValue(done)
+        self.loading_progress_bar.show()
+        self.cancel_loading_button.show()
+
+    def on_cancel_loading(self):
+        self.database.cancel_loading()
+
+    def on_loading_finished(self, database, cancelled: bool):
+        if database is not self.database:
+            return
+        self.loading_progress_bar.hide()
+        self.cancel_loading_button.hide()
+        self.show_memory_stats()
+        if cancelled:
+            self.show_status_message(
+                f"Loading cancelled, {len(database.file_stats)} files loaded."
+            )
+        else:
+            self.show_status_message(f"Loaded {len(database.file_stats)} files.")
+
+    def on_file_load_failed(self, path_str: str, message: str):
+        self.show_status_message(f"Failed to load {path_str}: {message}")
+
+    def show_memory_stats(self):
+        stats = self.database.get_memory_stats()
+        self.memory_label.setText(
+            f"Memory: {stats['resident_size'] // 2**20} MB"
+            + f" / {stats['memory_budget'] // 2**20} MB"
+            + f" | Evicted: {stats['evicted_files']} files"
+            + f" ({stats['evictions']} evictions, {stats['reloads']} reloads)"
+            + f" | Shared: {self.workspace.content_store.file_hits} files,"
+            + f" {self.workspace.content_store.subtree_hits} subtrees"
+        )
+
     def write_settings(self):
         settings = QSettings("DSO", "FoamGUI")
         settings.beginGroup("MainWindow")
@@ -214,6 +379,15 @@ class MainWindow(QMainWindow):
         self.move(settings.value("position", QPoint(200, 200)))
         settings.endGroup()
 
+    def read_memory_budget(self):
+        settings = QSettings("DSO", "FoamGUI")
+        settings.beginGroup("Database")
+        memory_budget_mb = settings.value(
+            "memorybudget", DEFAULT_MEMORY_BUDGET_MB, int
+        )
+        settings.endGroup()
+        return memory_budget_mb * 2**20
+
     def on_new_case(self):
         self.env_var.set_case_dir_mode(CaseDirMode.NEW)
         self.setup_wizard.set_sequence(SetupMode.CASE)